@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from apps.core.models import Meeting, Resolution, Notification, Referral, FollowUp, UserProfile, ResolutionComment, ResolutionAction, ResolutionCommentAttachment
+from apps.core.models import Meeting, Resolution, Notification, NotificationArchive, Referral, FollowUp, UserProfile, ResolutionComment, ResolutionAction, ResolutionCommentAttachment
 
 class UserProfileInline(admin.StackedInline):
     model = UserProfile
@@ -38,6 +38,7 @@ admin.site.register(UserProfile, UserProfileAdmin)
 admin.site.register(Meeting)
 admin.site.register(Resolution)
 admin.site.register(Notification)
+admin.site.register(NotificationArchive)
 admin.site.register(Referral)
 admin.site.register(FollowUp)
 
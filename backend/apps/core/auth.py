@@ -5,6 +5,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+USER_ATTRIBUTES = ['cn', 'sn', 'givenName', 'mail', 'displayName', 'department', 'title', 'description', 'memberOf']
+
 class LDAPBackend(ModelBackend):
     """
     LDAP Authentication Backend with fallback to JSON file
@@ -18,92 +20,66 @@ class LDAPBackend(ModelBackend):
         try:
             import ldap
             from ldap.filter import filter_format
+            from .services.ldap_pool import get_pool
             
             # LDAP Configuration
-            ldap_server_uri = getattr(settings, 'LDAP_SERVER_URI', 'ldap://localhost:389')
-            ldap_bind_dn = getattr(settings, 'LDAP_BIND_DN', 'cn=admin,dc=rh-tse,dc=local')
-            ldap_bind_password = getattr(settings, 'LDAP_BIND_PASSWORD', 'admin123')
             ldap_user_base = getattr(settings, 'LDAP_USER_BASE', 'ou=people,dc=rh-tse,dc=local')
             ldap_group_base = getattr(settings, 'LDAP_GROUP_BASE', 'ou=groups,dc=rh-tse,dc=local')
+            pool = get_pool()
             
-            # Connect to LDAP server
-            conn = ldap.initialize(ldap_server_uri)
-            conn.set_option(ldap.OPT_REFERRALS, 0)
-            conn.set_option(ldap.OPT_PROTOCOL_VERSION, 3)
-            
-            # Bind with admin credentials
-            conn.simple_bind_s(ldap_bind_dn, ldap_bind_password)
-            
-            # Search for user
+            # Search for user (and its memberOf groups) over a pooled service-bound connection
             search_filter = filter_format("(uid=%s)", [username])
-            result = conn.search_s(
-                ldap_user_base,
-                ldap.SCOPE_SUBTREE,
-                search_filter,
-                ['cn', 'sn', 'givenName', 'mail', 'displayName', 'department', 'title', 'description']
-            )
+            with pool.connection() as conn:
+                result = conn.search_s(
+                    ldap_user_base,
+                    ldap.SCOPE_SUBTREE,
+                    search_filter,
+                    USER_ATTRIBUTES
+                )
             
             if not result:
                 logger.warning(f"User not found in LDAP: {username}")
-                conn.unbind_s()
                 return self._fallback_to_json(username, password)
             
             user_dn, user_attrs = result[0]
             
             # Try to bind with user credentials
-            try:
-                conn.simple_bind_s(user_dn, password)
-                logger.info(f"LDAP authentication successful for user: {username}")
-            except ldap.INVALID_CREDENTIALS:
+            if not pool.check_credentials(user_dn, password):
                 logger.warning(f"Invalid password for user: {username}")
-                conn.unbind_s()
                 return None
+            logger.info(f"LDAP authentication successful for user: {username}")
             
             # Get user groups
-            groups = self._get_user_groups(conn, user_dn, ldap_group_base)
+            groups = self._get_user_groups(pool, user_dn, user_attrs, ldap_group_base)
             
-            # Get or create Django user
+            # Get or create Django user; the scheduled directory sync (LDAPDirectorySync)
+            # does the bulk work, so only fields that actually changed are written here
+            from .services.ldap_sync import apply_changes, entry_fields
+            fields = entry_fields(user_attrs)
+            department = fields.pop('department')
             UserModel = get_user_model()
             
             try:
                 user = UserModel.objects.get(username=username)
                 # Update user info from LDAP
-                user.first_name = user_attrs.get('givenName', [b''])[0].decode('utf-8')
-                user.last_name = user_attrs.get('sn', [b''])[0].decode('utf-8')
-                user.email = user_attrs.get('mail', [b''])[0].decode('utf-8')
-                user.save()
+                changed = apply_changes(user, fields)
+                if changed:
+                    user.save(update_fields=changed)
             except UserModel.DoesNotExist:
                 # Create new user
                 user = UserModel.objects.create_user(
                     username=username,
-                    first_name=user_attrs.get('givenName', [b''])[0].decode('utf-8'),
-                    last_name=user_attrs.get('sn', [b''])[0].decode('utf-8'),
-                    email=user_attrs.get('mail', [b''])[0].decode('utf-8'),
                     is_staff=username == 'admin',  # Only admin is staff
-                    is_superuser=username == 'admin'  # Only admin is superuser
+                    is_superuser=username == 'admin',  # Only admin is superuser
+                    **fields
                 )
             
             # Add user to groups
-            from django.contrib.auth.models import Group
-            for group_name in groups:
-                group, created = Group.objects.get_or_create(name=group_name)
-                user.groups.add(group)
-            
-            # Create or update user profile (position will be set manually)
-            from .models import UserProfile
-            profile, created = UserProfile.objects.get_or_create(
-                user=user,
-                defaults={
-                    'position': 'employee',  # Default position - to be set manually
-                    'department': user_attrs.get('department', [b''])[0].decode('utf-8') if user_attrs.get('department') else '',
-                }
-            )
-            if not created:
-                # Update existing profile (keep position as is, only update department)
-                profile.department = user_attrs.get('department', [b''])[0].decode('utf-8') if user_attrs.get('department') else profile.department
-                profile.save()
+            self._add_missing_groups(user, groups)
+            
+            # Create or update user profile (position will be set manually, only department is synced)
+            self._update_profile(user, {'department': department}, defaults={'position': 'employee'})
             
-            conn.unbind_s()
             return user
                 
         except ImportError:
@@ -116,73 +92,49 @@ class LDAPBackend(ModelBackend):
     def _fallback_to_json(self, username, password):
         """Fallback to JSON file authentication"""
         try:
-            import json
-            import os
-            
-            # Load users from JSON file
-            json_file_path = os.path.join(settings.BASE_DIR, 'ldap_users.json')
+            from .services.json_user_store import JSONUserStore
+            from .services.ldap_sync import apply_changes
             
-            if not os.path.exists(json_file_path):
-                logger.error(f"LDAP users file not found: {json_file_path}")
+            # Users are indexed by username and reloaded when the file changes
+            try:
+                user_data = JSONUserStore.get(username)
+            except FileNotFoundError:
+                logger.error(f"LDAP users file not found: {JSONUserStore.path()}")
                 return None
-                
-            with open(json_file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Find user in the JSON data
-            user_data = None
-            for user in data.get('users', []):
-                if user.get('username') == username and user.get('password') == password:
-                    user_data = user
-                    break
             
-            if not user_data:
+            if not user_data or not JSONUserStore.check_password(user_data, password):
                 logger.warning(f"User not found or invalid password: {username}")
                 return None
             
             # Authentication successful, get or create Django user
             UserModel = get_user_model()
+            fields = {
+                'first_name': user_data.get('first_name', ''),
+                'last_name': user_data.get('last_name', ''),
+                'email': user_data.get('email', ''),
+                'is_staff': user_data.get('is_staff', False),
+                'is_superuser': user_data.get('is_superuser', False),
+            }
             
             try:
                 user = UserModel.objects.get(username=username)
-                # Update user info
-                user.first_name = user_data.get('first_name', '')
-                user.last_name = user_data.get('last_name', '')
-                user.email = user_data.get('email', '')
-                user.is_staff = user_data.get('is_staff', False)
-                user.is_superuser = user_data.get('is_superuser', False)
-                user.save()
+                # Update user info (only fields that changed)
+                changed = apply_changes(user, fields)
+                if changed:
+                    user.save(update_fields=changed)
             except UserModel.DoesNotExist:
                 # Create new user
-                user = UserModel.objects.create_user(
-                    username=username,
-                    first_name=user_data.get('first_name', ''),
-                    last_name=user_data.get('last_name', ''),
-                    email=user_data.get('email', ''),
-                    is_staff=user_data.get('is_staff', False),
-                    is_superuser=user_data.get('is_superuser', False)
-                )
+                user = UserModel.objects.create_user(username=username, **fields)
             
             # Add user to groups
-            from django.contrib.auth.models import Group
-            for group_name in user_data.get('groups', []):
-                group, created = Group.objects.get_or_create(name=group_name)
-                user.groups.add(group)
+            self._add_missing_groups(user, user_data.get('groups', []))
             
             # Create or update user profile
-            from .models import UserProfile
-            profile, created = UserProfile.objects.get_or_create(
-                user=user,
-                defaults={
-                    'position': user_data.get('position', 'employee'),
-                    'department': user_data.get('department', ''),
-                }
+            self._update_profile(
+                user,
+                {'position': user_data.get('position'), 'department': user_data.get('department')},
+                defaults={'position': 'employee'}
             )
-            if not created:
-                # Update existing profile
-                profile.position = user_data.get('position', profile.position)
-                profile.department = user_data.get('department', profile.department)
-                profile.save()
             
             logger.info(f"JSON authentication successful for user: {username}")
             return user
@@ -191,18 +143,57 @@ class LDAPBackend(ModelBackend):
             logger.error(f"JSON authentication error: {str(e)}")
             return None
     
-    def _get_user_groups(self, conn, user_dn, ldap_group_base):
+    def _add_missing_groups(self, user, group_names):
+        """Add the user to groups it is not yet a member of"""
+        from django.contrib.auth.models import Group
+        missing = set(group_names) - set(user.groups.values_list('name', flat=True))
+        for group_name in missing:
+            group, created = Group.objects.get_or_create(name=group_name)
+            user.groups.add(group)
+    
+    def _update_profile(self, user, values, defaults=None):
+        """Create the profile or write only the fields that changed"""
+        from .models import UserProfile
+        from .services.ldap_sync import apply_changes
+        try:
+            profile = user.profile
+        except UserProfile.DoesNotExist:
+            create_values = dict(defaults or {})
+            create_values.update({field: value for field, value in values.items() if value is not None})
+            create_values.setdefault('department', '')
+            return UserProfile.objects.create(user=user, **create_values)
+        changed = apply_changes(profile, values)
+        if changed:
+            profile.save(update_fields=changed)
+        return profile
+    
+    def _get_user_groups(self, pool, user_dn, user_attrs, ldap_group_base):
         """Get user groups from LDAP"""
         try:
+            import ldap
+            from ldap.dn import str2dn
             from ldap.filter import filter_format
+            
+            # Directories with the memberOf overlay return groups with the user search
+            if getattr(settings, 'LDAP_USE_MEMBEROF', True) and user_attrs.get('memberOf'):
+                groups = []
+                for group_dn in user_attrs['memberOf']:
+                    group_dn = group_dn.decode('utf-8')
+                    if not group_dn.lower().endswith(ldap_group_base.lower()):
+                        continue
+                    rdn = str2dn(group_dn)[0]
+                    groups.extend(value for attr, value, _ in rdn if attr.lower() == 'cn')
+                return groups
+            
             # Search for groups that contain this user
             search_filter = filter_format("(member=%s)", [user_dn])
-            result = conn.search_s(
-                ldap_group_base,
-                ldap.SCOPE_SUBTREE,
-                search_filter,
-                ['cn']
-            )
+            with pool.connection() as conn:
+                result = conn.search_s(
+                    ldap_group_base,
+                    ldap.SCOPE_SUBTREE,
+                    search_filter,
+                    ['cn']
+                )
             
             groups = []
             for group_dn, group_attrs in result:
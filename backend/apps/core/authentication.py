@@ -0,0 +1,41 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .services.token_cache import CachedAccessToken, TokenCache
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication با payload و کاربر کش‌شده (TokenCache)
+
+    توکنی که JWTAuthCookieMiddleware در همین درخواست بررسی کرده دوباره
+    decode نمی‌شود و کاربر در حالت معمول بدون کوئری خوانده می‌شود.
+    request.auth یک AccessToken (CachedAccessToken) است.
+    """
+
+    def get_validated_token(self, raw_token):
+        try:
+            return CachedAccessToken(raw_token)
+        except TokenError as e:
+            raise InvalidToken({
+                'detail': _('Given token not valid for any token type'),
+                'messages': [{
+                    'token_class': CachedAccessToken.__name__,
+                    'token_type': CachedAccessToken.token_type,
+                    'message': e.args[0],
+                }],
+            })
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        user = TokenCache.user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return user
@@ -1,17 +1,31 @@
+import asyncio
 import json
-import base64
-import hashlib
+import logging
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from datetime import datetime
+from django.conf import settings
+
+from .models import Resolution
+from .services.access_policy import ResolutionAccessPolicy
+from .services.presence import Presence
+from .services.event_stream import EventStream
+from .services.websocket_service import adispatch_events, chat_group_name, dispatch_events
+
+logger = logging.getLogger(__name__)
+
+# رویدادهایی که پس از اتصال مجدد از EventStream دوباره ارسال می‌شوند
+REPLAY_HANDLERS = {'notification_message', 'unread_count', 'chat_message', 'interaction_notification'}
 
 
 class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         # Get user from scope
         self.user = self.scope.get("user")
+        self.chat_groups = set()
         
-        print(f"WebSocket connection attempt for user: {self.user}")
+        logger.debug(f"WebSocket connection attempt for user: {self.user}")
         
         # Allow connection even without authentication for now
         if self.user and hasattr(self.user, 'is_authenticated') and self.user.is_authenticated:
@@ -22,14 +36,14 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             # Also join chat room for this user
             self.chat_room_name = f"chat_user_{self.user.id}"
             
-            print(f"User {self.user.username} connecting to room: {self.room_group_name}")
+            logger.debug(f"User {self.user.username} connecting to room: {self.room_group_name}")
         else:
             # Create a general room for unauthenticated users
             self.room_name = "general"
             self.room_group_name = "notifications_general"
             self.chat_room_name = "chat_general"
             
-            print(f"Unauthenticated user connecting to general room: {self.room_group_name}")
+            logger.debug(f"Unauthenticated user connecting to general room: {self.room_group_name}")
         
         # Join notification room group
         await self.channel_layer.group_add(
@@ -44,10 +58,33 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         )
         
         await self.accept()
-        print(f"WebSocket connection accepted for room: {self.room_group_name}")
+        logger.debug(f"WebSocket connection accepted for room: {self.room_group_name}")
+
+        # ثبت حضور تا نوتیفیکیشن‌های لحظه‌ای فقط برای کاربران آنلاین ارسال شوند
+        self.presence_task = None
+        if self.user and getattr(self.user, 'is_authenticated', False):
+            await self.update_presence()
+            self.presence_task = asyncio.ensure_future(self.presence_heartbeat())
+
+    async def update_presence(self):
+        try:
+            await sync_to_async(Presence.heartbeat)(self.user.id, self.channel_name)
+        except Exception as e:
+            logger.error(f"Error updating presence: {e}")
+
+    async def presence_heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.PRESENCE_HEARTBEAT_INTERVAL)
+            await self.update_presence()
 
     async def disconnect(self, close_code):
-        print(f"WebSocket disconnected for room: {getattr(self, 'room_group_name', 'unknown')}, code: {close_code}")
+        logger.debug(f"WebSocket disconnected for room: {getattr(self, 'room_group_name', 'unknown')}, code: {close_code}")
+        if getattr(self, 'presence_task', None):
+            self.presence_task.cancel()
+            try:
+                await sync_to_async(Presence.disconnect)(self.user.id, self.channel_name)
+            except Exception as e:
+                logger.error(f"Error removing presence: {e}")
         # Leave room groups
         if hasattr(self, 'room_group_name'):
             await self.channel_layer.group_discard(
@@ -62,23 +99,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
 
     def _encode_resolution_id(self, resolution_id: str) -> str:
         """Encode resolution_id to a valid group name"""
-        # Use base64 encoding to handle special characters
-        import base64
-        try:
-            # First try to decode if it's already base64
-            decoded = base64.b64decode(resolution_id + '==').decode('utf-8')
-            # Use the decoded string for hash
-            hash_object = hashlib.md5(decoded.encode())
-        except:
-            # If decoding fails, use the original string
-            hash_object = hashlib.md5(resolution_id.encode())
-        
-        return f"chat_resolution_{hash_object.hexdigest()}"
+        return chat_group_name(resolution_id)
 
     async def receive(self, text_data):
-        # Handle messages from client
-        print(f"Received message from client: {text_data}")
-        
+        # Handle messages from client (bodies are not logged)
         try:
             data = json.loads(text_data)
             message_type = data.get('type')
@@ -89,13 +113,15 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 await self.handle_join_chat(data)
             elif message_type == 'leave_chat':
                 await self.handle_leave_chat(data)
+            elif message_type == 'resume':
+                await self.handle_resume(data)
             else:
-                print(f"Unknown message type: {message_type}")
+                logger.warning(f"Unknown websocket message type: {str(message_type)[:64]}")
                 
         except json.JSONDecodeError:
-            print(f"Invalid JSON received: {text_data}")
+            logger.warning(f"Invalid JSON received on channel {self.channel_name}")
         except Exception as e:
-            print(f"Error handling message: {e}")
+            logger.error(f"Error handling websocket message: {e}")
 
     async def handle_chat_message(self, data):
         """Handle chat messages"""
@@ -106,30 +132,51 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         if resolution_id and message and author_id:
             # Send to all users in the resolution chat
             chat_group = self._encode_resolution_id(resolution_id)
+            # فقط در چت‌هایی که به آن‌ها join شده و کاربر در وضعیت فعلی مصوبه اجازه ارسال دارد
+            if chat_group not in self.chat_groups or not await self.has_access(resolution_id, 'can_chat'):
+                return
             
-            await self.channel_layer.group_send(
-                chat_group,
-                {
-                    'type': 'chat_message',
-                    'resolution_id': resolution_id,
-                    'message': message,
-                    'author_id': author_id,
-                    'timestamp': data.get('timestamp')
-                }
-            )
-            print(f"Chat message sent to resolution {resolution_id}")
+            await adispatch_events([(chat_group, {
+                'type': 'chat_message',
+                'resolution_id': resolution_id,
+                'message': message,
+                'author_id': author_id,
+                'timestamp': data.get('timestamp')
+            })], self.channel_layer)
+            logger.debug(f"Chat message sent to resolution {resolution_id}")
 
     async def handle_join_chat(self, data):
         """Handle joining a chat room"""
         resolution_id = data.get('resolution_id')
         if resolution_id:
+            # دریافت رویدادهای چت برای هر کسی که مصوبه را می‌بیند؛ ارسال پیام جداگانه با can_chat
+            if not await self.has_access(resolution_id, 'can_view'):
+                logger.warning(f"Chat join denied for resolution {resolution_id}")
+                return
             chat_group = self._encode_resolution_id(resolution_id)
             await self.channel_layer.group_add(
                 chat_group,
                 self.channel_name
             )
+            self.chat_groups.add(chat_group)
             user_info = getattr(self.user, 'username', 'anonymous') if self.user else 'anonymous'
-            print(f"🔵 User {user_info} joined chat for resolution {resolution_id} -> group: {chat_group}")
+            logger.debug(f"User {user_info} joined chat for resolution {resolution_id} -> group: {chat_group}")
+            # کلاینتی که دوباره وصل شده رویدادهای از دست رفته چت را می‌گیرد
+            if data.get('last_event_id'):
+                await self.replay(chat_group, data['last_event_id'], resolution_id=resolution_id)
+
+    @database_sync_to_async
+    def has_access(self, resolution_id, check):
+        """
+        دسترسی کاربر احراز هویت‌شده به مصوبه (resolution_id همان public_id است)
+
+        Args:
+            check: متد ResolutionAccessPolicy ('can_view' یا 'can_chat')
+        """
+        if not (self.user and getattr(self.user, 'is_authenticated', False)):
+            return False
+        resolution = Resolution.objects.filter(public_id=resolution_id).first()
+        return resolution is not None and getattr(ResolutionAccessPolicy(self.user), check)(resolution)
 
     async def handle_leave_chat(self, data):
         """Handle leaving a chat room"""
@@ -140,8 +187,40 @@ class NotificationConsumer(AsyncWebsocketConsumer):
                 chat_group,
                 self.channel_name
             )
+            self.chat_groups.discard(chat_group)
             user_info = getattr(self.user, 'username', 'anonymous') if self.user else 'anonymous'
-            print(f"🔵 User {user_info} left chat for resolution {resolution_id} -> group: {chat_group}")
+            logger.debug(f"User {user_info} left chat for resolution {resolution_id} -> group: {chat_group}")
+
+    async def handle_resume(self, data):
+        """
+        Replay events missed since last_event_id after a reconnect
+
+        Without resolution_id the user's notifications stream is replayed;
+        with it, the chat stream of a resolution the client has joined.
+        """
+        resolution_id = data.get('resolution_id')
+        if resolution_id:
+            group_name = self._encode_resolution_id(resolution_id)
+            if group_name not in self.chat_groups:
+                return
+        elif self.user and getattr(self.user, 'is_authenticated', False):
+            group_name = self.room_group_name
+        else:
+            return
+        await self.replay(group_name, data.get('last_event_id'), resolution_id=resolution_id)
+
+    async def replay(self, group_name, last_event_id, resolution_id=None):
+        events, complete = await sync_to_async(EventStream.replay)(group_name, last_event_id)
+        for event in events:
+            if event.get('type') in REPLAY_HANDLERS:
+                await getattr(self, event['type'])(event)
+        # complete=False: the gap is no longer in the stream, client should refetch
+        await self.send(text_data=json.dumps({
+            'type': 'resume_complete',
+            'resolution_id': resolution_id,
+            'replayed': len(events),
+            'complete': complete
+        }))
 
     async def notification_message(self, event):
         # Send notification to WebSocket
@@ -152,6 +231,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'notification_type': event.get('notification_type', 'info'),
             'resolution': None
         }
+        if 'unread_count' in event:
+            message_data['unread_count'] = event['unread_count']
+        if 'event_id' in event:
+            message_data['event_id'] = event['event_id']
         # If resolution is present, convert its id to string if possible
         if event.get('resolution'):
             res = event['resolution']
@@ -163,10 +246,16 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             else:
                 message_data['resolution'] = str(res)
         
-        user_info = getattr(self.user, 'username', 'anonymous') if self.user else 'anonymous'
-        print(f"Sending notification to user {user_info}: {message_data}")
         await self.send(text_data=json.dumps(message_data))
 
+    async def unread_count(self, event):
+        """Send the updated unread notifications count"""
+        await self.send(text_data=json.dumps({
+            'type': 'unread_count',
+            'count': event['count'],
+            'event_id': event.get('event_id')
+        }))
+
     async def chat_message(self, event):
         """Handle incoming chat messages"""
         message_data = {
@@ -175,12 +264,10 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'message': event['message'],
             'author_id': event['author_id'],
             'timestamp': event.get('timestamp'),
-            'author_name': event.get('author_name', 'Unknown')
+            'author_name': event.get('author_name', 'Unknown'),
+            'event_id': event.get('event_id')
         }
         
-        user_info = getattr(self.user, 'username', 'anonymous') if self.user else 'anonymous'
-        print(f"🔵 Sending chat message to user {user_info}: {message_data}")
-        print(f"Sending chat message to user {user_info}: {message_data}")
         await self.send(text_data=json.dumps(message_data))
 
     async def interaction_notification(self, event):
@@ -190,124 +277,50 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'resolution_id': event['resolution_id'],
             'interaction_data': event['interaction_data'],
             'author_name': event.get('author_name', 'Unknown'),
-            'timestamp': event.get('timestamp')
+            'timestamp': event.get('timestamp'),
+            'event_id': event.get('event_id')
         }
         
-        user_info = getattr(self.user, 'username', 'anonymous') if self.user else 'anonymous'
-        print(f"Sending interaction notification to user {user_info}: {message_data}")
         await self.send(text_data=json.dumps(message_data))
 
     @staticmethod
     def send_notification_to_user(user_id, message, notification_id):
         """Static method to send notification to specific user"""
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        
-        print(f"🔵 send_notification_to_user called for user_id: {user_id}")
-        print(f"🔵 Message: {message}")
-        print(f"🔵 Notification ID: {notification_id}")
-        
         try:
-            channel_layer = get_channel_layer()
-            group_name = f"notifications_{user_id}"
-            print(f"🔵 Sending to group: {group_name}")
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    'type': 'notification_message',
-                    'message': message,
-                    'notification_id': notification_id
-                }
-            )
-            print(f"🔵 WebSocket message sent to group {group_name}")
+            dispatch_events([(f"notifications_{user_id}", {
+                'type': 'notification_message',
+                'message': message,
+                'notification_id': notification_id
+            })])
         except Exception as e:
-            print(f"❌ Error in send_notification_to_user: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"Error in send_notification_to_user: {e}")
 
     @staticmethod
     def send_chat_message_to_resolution(resolution_id, message, author_id, author_name=None):
         """Static method to send chat message to resolution participants"""
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        
-        print(f"🔵 send_chat_message_to_resolution called for resolution_id: {resolution_id}")
-        print(f"🔵 Message: {message}")
-        print(f"🔵 Author ID: {author_id}")
-        
         try:
-            channel_layer = get_channel_layer()
-            # Use base64 encoding to handle special characters
-            import base64
-            try:
-                # First try to decode if it's already base64
-                decoded = base64.b64decode(resolution_id + '==').decode('utf-8')
-                # Use the decoded string for hash
-                hash_object = hashlib.md5(decoded.encode())
-            except:
-                # If decoding fails, use the original string
-                hash_object = hashlib.md5(resolution_id.encode())
-            
-            group_name = f"chat_resolution_{hash_object.hexdigest()}"
-            print(f"🔵 Sending to chat group: {group_name}")
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    'type': 'chat_message',
-                    'resolution_id': resolution_id,
-                    'message': message,
-                    'author_id': author_id,
-                    'author_name': author_name,
-                    'timestamp': str(datetime.now())
-                }
-            )
-            print(f"🔵 Chat message sent to group {group_name}")
+            dispatch_events([(chat_group_name(resolution_id), {
+                'type': 'chat_message',
+                'resolution_id': resolution_id,
+                'message': message,
+                'author_id': author_id,
+                'author_name': author_name,
+                'timestamp': str(datetime.now())
+            })])
         except Exception as e:
-            print(f"❌ Error in send_chat_message_to_resolution: {e}")
-            import traceback
-            traceback.print_exc() 
+            logger.error(f"Error in send_chat_message_to_resolution: {e}")
 
     @staticmethod
     def send_interaction_notification_to_resolution(resolution_id, interaction_data, author_name=None):
         """Static method to send interaction notification to resolution participants"""
-        from channels.layers import get_channel_layer
-        from asgiref.sync import async_to_sync
-        
-        print(f"🔵 send_interaction_notification_to_resolution called for resolution_id: {resolution_id}")
-        print(f"🔵 Interaction data: {interaction_data}")
-        print(f"🔵 Author name: {author_name}")
-        
         try:
-            channel_layer = get_channel_layer()
-            # Use the same encoding method as _encode_resolution_id
-            import base64
-            try:
-                # First try to decode if it's already base64
-                decoded = base64.b64decode(resolution_id + '==').decode('utf-8')
-                # Use the decoded string for hash
-                hash_object = hashlib.md5(decoded.encode())
-            except:
-                # If decoding fails, use the original string
-                hash_object = hashlib.md5(resolution_id.encode())
-            
-            # Use the same group name as chat_resolution_ to match frontend
-            group_name = f"chat_resolution_{hash_object.hexdigest()}"
-            print(f"🔵 Sending to chat group: {group_name}")
-            
-            async_to_sync(channel_layer.group_send)(
-                group_name,
-                {
-                    'type': 'interaction_notification',
-                    'resolution_id': resolution_id,
-                    'interaction_data': interaction_data,
-                    'author_name': author_name,
-                    'timestamp': str(datetime.now())
-                }
-            )
-            print(f"🔵 Interaction notification sent to group {group_name}")
+            # Same group name as chat_resolution_ to match frontend
+            dispatch_events([(chat_group_name(resolution_id), {
+                'type': 'interaction_notification',
+                'resolution_id': resolution_id,
+                'interaction_data': interaction_data,
+                'author_name': author_name,
+                'timestamp': str(datetime.now())
+            })])
         except Exception as e:
-            print(f"❌ Error in send_interaction_notification_to_resolution: {e}")
-            import traceback
-            traceback.print_exc() 
\ No newline at end of file
+            logger.error(f"Error in send_interaction_notification_to_resolution: {e}")
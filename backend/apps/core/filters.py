@@ -0,0 +1,35 @@
+import django_filters
+
+from .models import Notification, Resolution
+
+
+class CharInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """فیلتر چندمقداری با ورودی جداشده با کاما (مثلاً ?status=notified,in_progress)"""
+
+
+class ResolutionListFilter(django_filters.FilterSet):
+    """فیلترهای لیست مصوبات: وضعیت، نوع، جلسه و واحد مجری"""
+    status = CharInFilter(field_name='status', lookup_expr='in')
+    type = django_filters.ChoiceFilter(field_name='type', choices=Resolution.TYPE_CHOICES)
+    meeting = django_filters.NumberFilter(field_name='meeting_id')
+    meeting_number = django_filters.NumberFilter(field_name='meeting__number')
+    executor = django_filters.NumberFilter(field_name='executor_unit_id')
+
+    class Meta:
+        model = Resolution
+        fields = ['status', 'type', 'meeting', 'meeting_number', 'executor']
+
+
+class NotificationListFilter(django_filters.FilterSet):
+    """فیلترهای لیست نوتیفیکیشن‌ها: فقط خوانده‌نشده، نوع، اولویت و مصوبه"""
+    unread = django_filters.BooleanFilter(method='filter_unread')
+    type = CharInFilter(field_name='notification_type', lookup_expr='in')
+    priority = CharInFilter(field_name='priority', lookup_expr='in')
+    resolution = django_filters.UUIDFilter(field_name='resolution_id')
+
+    class Meta:
+        model = Notification
+        fields = ['unread', 'type', 'priority', 'resolution']
+
+    def filter_unread(self, queryset, name, value):
+        return queryset.filter(read=False) if value else queryset
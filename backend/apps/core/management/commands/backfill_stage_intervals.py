@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Prefetch
+
+from apps.core.models import Resolution, ResolutionAction, ResolutionStageInterval
+from apps.core.services.stage_interval_service import StageIntervalService
+
+
+class Command(BaseCommand):
+    help = 'Build ResolutionStageInterval rows from the existing ResolutionAction history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of resolutions processed per transaction'
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recreate intervals for resolutions that already have them'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        resolutions = Resolution.objects.order_by('id')
+        if not options['rebuild']:
+            resolutions = resolutions.filter(stage_intervals__isnull=True)
+
+        ids = list(resolutions.values_list('id', flat=True).distinct())
+        self.stdout.write(f'Backfilling stage intervals for {len(ids)} resolutions...')
+
+        created = 0
+        for start in range(0, len(ids), batch_size):
+            batch_ids = ids[start:start + batch_size]
+            batch = Resolution.objects.filter(id__in=batch_ids).prefetch_related(
+                Prefetch('actions', queryset=ResolutionAction.objects.order_by('created_at'))
+            )
+            intervals = []
+            for resolution in batch:
+                intervals.extend(StageIntervalService.build_intervals(resolution, list(resolution.actions.all())))
+
+            with transaction.atomic():
+                ResolutionStageInterval.objects.filter(resolution_id__in=batch_ids).delete()
+                ResolutionStageInterval.objects.bulk_create(intervals, batch_size=1000)
+            created += len(intervals)
+            self.stdout.write(f'  {min(start + batch_size, len(ids))}/{len(ids)} resolutions')
+
+        self.stdout.write(self.style.SUCCESS(f'Created {created} stage intervals'))
@@ -0,0 +1,215 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
+
+from apps.core.models import (
+    Meeting, Notification, Resolution, ResolutionAction, ResolutionComment, UserProfile, jalali_month_of
+)
+
+# داده‌های آزمایشی با این پیشوند/بازه ساخته و پاک می‌شوند
+BENCH_USER_PREFIX = 'bench_user_'
+BENCH_MEETING_BASE = 900000
+
+# ایندکس‌های مسیرهای پرتکرار (migration 0002)
+HOT_PATH_INDEXES = [
+    (Resolution, 'res_status_type_idx'),
+    (Resolution, 'res_status_deadline_idx'),
+    (Resolution, 'res_executor_status_idx'),
+    (Resolution, 'res_created_id_idx'),
+    (Notification, 'notif_recipient_read_idx'),
+    (ResolutionComment, 'rescomment_res_type_idx'),
+    (ResolutionAction, 'resaction_res_type_idx'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Seed a large dataset and time the hot dashboard/notification queries with and without composite indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resolutions', type=int, default=20000, help='Number of resolutions to seed')
+        parser.add_argument('--users', type=int, default=200, help='Number of users to seed')
+        parser.add_argument('--notifications-per-user', type=int, default=100, help='Notifications per seeded user')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query (median is reported)')
+        parser.add_argument('--skip-seed', action='store_true', help='Reuse previously seeded data')
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Drop the hot-path indexes, time the queries, then recreate them and time again'
+        )
+        parser.add_argument('--cleanup', action='store_true', help='Delete the seeded data and exit')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.cleanup()
+            return
+
+        if not options['skip_seed']:
+            self.seed(options['users'], options['resolutions'], options['notifications_per_user'])
+
+        repeat = options['repeat']
+        if options['compare']:
+            self.stdout.write(self.style.WARNING('Dropping hot-path indexes...'))
+            with connection.schema_editor() as editor:
+                for model, index in self.get_indexes():
+                    editor.remove_index(model, index)
+            try:
+                before = self.run_queries(repeat)
+            finally:
+                self.stdout.write(self.style.WARNING('Recreating hot-path indexes...'))
+                with connection.schema_editor() as editor:
+                    for model, index in self.get_indexes():
+                        editor.add_index(model, index)
+            after = self.run_queries(repeat)
+            self.report(before, after)
+        else:
+            self.report(None, self.run_queries(repeat))
+
+    def get_indexes(self):
+        for model, name in HOT_PATH_INDEXES:
+            for index in model._meta.indexes:
+                if index.name == name:
+                    yield model, index
+
+    def seed(self, user_count, resolution_count, notifications_per_user):
+        self.stdout.write(f'Seeding {user_count} users, {resolution_count} resolutions...')
+        started = time.perf_counter()
+        rng = random.Random(42)
+
+        with transaction.atomic():
+            existing = User.objects.filter(username__startswith=BENCH_USER_PREFIX).count()
+            User.objects.bulk_create([
+                User(username=f'{BENCH_USER_PREFIX}{i}')
+                for i in range(existing, existing + user_count)
+            ], batch_size=500)
+            positions = ['deputy', 'manager', 'employee']
+            UserProfile.objects.bulk_create([
+                UserProfile(user=user, position=rng.choice(positions))
+                for user in User.objects.filter(username__startswith=BENCH_USER_PREFIX, profile__isnull=True)
+            ], batch_size=500)
+            users = list(User.objects.filter(username__startswith=BENCH_USER_PREFIX))
+
+            last_number = Meeting.objects.filter(number__gte=BENCH_MEETING_BASE).aggregate(n=Max('number'))['n']
+            meeting_start = (last_number or BENCH_MEETING_BASE - 1) + 1
+            held_dates = [date(2024, 1, 1) + timedelta(days=i) for i in range(max(1, resolution_count // 20))]
+            Meeting.objects.bulk_create([
+                Meeting(number=meeting_start + i, held_at=held_at, jalali_month=jalali_month_of(held_at))
+                for i, held_at in enumerate(held_dates)
+            ], batch_size=500)
+            meetings = list(Meeting.objects.filter(number__gte=meeting_start))
+
+            statuses = [choice for choice, _ in Resolution.STATUS_CHOICES]
+            types = [choice for choice, _ in Resolution.TYPE_CHOICES]
+            today = date.today()
+            resolutions = []
+            for i in range(resolution_count):
+                resolutions.append(Resolution(
+                    public_id=uuid.uuid4().hex[:22],
+                    meeting=rng.choice(meetings),
+                    clause=str(i % 50 + 1),
+                    subclause='1',
+                    description='benchmark',
+                    type=rng.choice(types),
+                    status=rng.choice(statuses),
+                    executor_unit=rng.choice(users),
+                    created_by=rng.choice(users),
+                    deadline=today + timedelta(days=rng.randint(-120, 120)),
+                ))
+            Resolution.objects.bulk_create(resolutions, batch_size=1000)
+
+            action_types = ['created', 'secretary_approved', 'ceo_approved', 'executor_accepted', 'progress_update']
+            actions = []
+            comments = []
+            for resolution in resolutions:
+                for action_type in action_types[:rng.randint(1, len(action_types))]:
+                    actions.append(ResolutionAction(
+                        resolution=resolution, actor=resolution.created_by,
+                        action_type=action_type, description='benchmark'
+                    ))
+                comments.append(ResolutionComment(
+                    resolution=resolution, author=resolution.executor_unit,
+                    content='benchmark', comment_type=rng.choice(['message', 'progress_update'])
+                ))
+            ResolutionAction.objects.bulk_create(actions, batch_size=1000)
+            ResolutionComment.objects.bulk_create(comments, batch_size=1000)
+
+            notifications = []
+            for user in users[-user_count:]:
+                for _ in range(notifications_per_user):
+                    notifications.append(Notification(
+                        recipient=user, resolution=rng.choice(resolutions),
+                        message='benchmark', read=rng.random() < 0.7
+                    ))
+            Notification.objects.bulk_create(notifications, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(f'Seeded in {time.perf_counter() - started:.1f}s'))
+
+    def get_queries(self):
+        user = User.objects.filter(username__startswith=BENCH_USER_PREFIX).first()
+        resolution = Resolution.objects.filter(meeting__number__gte=BENCH_MEETING_BASE).first()
+        today = date.today()
+        return [
+            ('status_type_counts', lambda: list(
+                Resolution.objects.values('status', 'type').annotate(total=Count('id'))
+            )),
+            ('overdue_count', lambda: Resolution.objects.filter(
+                status__in=['notified', 'in_progress'], deadline__lt=today
+            ).count()),
+            ('executor_workbench', lambda: list(
+                Resolution.objects.filter(executor_unit=user).exclude(status='pending_secretary_approval')
+                .order_by('-created_at', '-id').values_list('id', flat=True)[:50]
+            )),
+            ('latest_resolutions', lambda: list(
+                Resolution.objects.order_by('-created_at', '-id').values_list('id', flat=True)[:50]
+            )),
+            ('unread_notifications', lambda: Notification.objects.filter(recipient=user, read=False).count()),
+            ('notification_list', lambda: list(
+                Notification.objects.filter(recipient=user).order_by('-sent_at').values_list('id', flat=True)[:50]
+            )),
+            ('last_progress_update', lambda: ResolutionComment.objects.filter(
+                resolution=resolution, comment_type='progress_update'
+            ).order_by('-created_at').values_list('created_at', flat=True).first()),
+            ('approval_actions', lambda: list(
+                ResolutionAction.objects.filter(
+                    Q(action_type='secretary_approved') | Q(action_type='ceo_approved'),
+                    resolution=resolution
+                ).order_by('created_at').values_list('created_at', flat=True)
+            )),
+        ]
+
+    def run_queries(self, repeat):
+        results = {}
+        for name, query in self.get_queries():
+            query()  # گرم کردن کش پایگاه داده
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                query()
+                timings.append((time.perf_counter() - started) * 1000)
+            results[name] = statistics.median(timings)
+        return results
+
+    def report(self, before, after):
+        self.stdout.write('')
+        if before is None:
+            self.stdout.write(f'{"query":<24}{"median ms":>12}')
+            for name, value in after.items():
+                self.stdout.write(f'{name:<24}{value:>12.2f}')
+            return
+
+        self.stdout.write(f'{"query":<24}{"no index ms":>14}{"indexed ms":>14}{"speedup":>10}')
+        for name, value in after.items():
+            speedup = before[name] / value if value else 0
+            self.stdout.write(f'{name:<24}{before[name]:>14.2f}{value:>14.2f}{speedup:>9.1f}x')
+
+    def cleanup(self):
+        with transaction.atomic():
+            deleted, _ = Meeting.objects.filter(number__gte=BENCH_MEETING_BASE).delete()
+            users, _ = User.objects.filter(username__startswith=BENCH_USER_PREFIX).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted + users} benchmark rows'))
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.services.json_user_store import JSONUserStore
+
+
+class Command(BaseCommand):
+    help = 'Replace plaintext passwords in the JSON fallback users file with password hashes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            default=None,
+            help='Users file (defaults to LDAP_USERS_FILE)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many users would be migrated'
+        )
+
+    def handle(self, *args, **options):
+        path = options['file'] or JSONUserStore.path()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read {path}: {e}')
+
+        migrated = JSONUserStore.hash_passwords(data)
+        if options['dry_run'] or not migrated:
+            self.stdout.write(f'{migrated} users with plaintext passwords in {path}')
+            return
+
+        # فایل کامل در کنار فایل اصلی نوشته و سپس جایگزین می‌شود
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.json')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.chmod(tmp_path, os.stat(path).st_mode)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self.stdout.write(self.style.SUCCESS(f'Hashed passwords of {migrated} users in {path}'))
@@ -0,0 +1,39 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="resolution",
+            index=models.Index(fields=["status", "type"], name="res_status_type_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resolution",
+            index=models.Index(fields=["status", "deadline"], name="res_status_deadline_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resolution",
+            index=models.Index(fields=["executor_unit", "status"], name="res_executor_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resolution",
+            index=models.Index(fields=["-created_at", "-id"], name="res_created_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["recipient", "read", "-sent_at"], name="notif_recipient_read_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resolutioncomment",
+            index=models.Index(fields=["resolution", "comment_type", "created_at"], name="rescomment_res_type_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="resolutionaction",
+            index=models.Index(fields=["resolution", "action_type", "created_at"], name="resaction_res_type_idx"),
+        ),
+    ]
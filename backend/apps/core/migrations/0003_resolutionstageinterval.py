@@ -0,0 +1,62 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResolutionStageInterval",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "stage",
+                    models.CharField(
+                        choices=[
+                            ("secretary", "کارتابل دبیر"),
+                            ("ceo", "کارتابل مدیرعامل"),
+                            ("executor", "کارتابل واحد مجری"),
+                            ("execution", "اجرا"),
+                        ],
+                        max_length=20,
+                        verbose_name="مرحله",
+                    ),
+                ),
+                ("cycle", models.PositiveSmallIntegerField(default=1, verbose_name="دفعه")),
+                ("entered_at", models.DateTimeField(verbose_name="زمان ورود")),
+                ("exited_at", models.DateTimeField(blank=True, null=True, verbose_name="زمان خروج")),
+                ("entry_type", models.CharField(max_length=30, verbose_name="اکشن ورود")),
+                ("exit_type", models.CharField(blank=True, default="", max_length=30, verbose_name="اکشن خروج")),
+                ("duration_seconds", models.FloatField(blank=True, null=True, verbose_name="مدت (ثانیه)")),
+                (
+                    "resolution",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stage_intervals",
+                        to="core.resolution",
+                        verbose_name="مصوبه",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "بازه مرحله مصوبه",
+                "verbose_name_plural": "بازه‌های مراحل مصوبات",
+                "ordering": ["entered_at"],
+                "indexes": [
+                    models.Index(fields=["stage", "exit_type", "cycle"], name="resstage_stage_exit_idx"),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+from persiantools.jdatetime import JalaliDate
+
+
+def populate_jalali_month(apps, schema_editor):
+    Meeting = apps.get_model("core", "Meeting")
+    meetings = []
+    for meeting in Meeting.objects.exclude(held_at__isnull=True).only("id", "held_at").iterator(chunk_size=1000):
+        jalali = JalaliDate.to_jalali(meeting.held_at)
+        meeting.jalali_month = jalali.year * 100 + jalali.month
+        meetings.append(meeting)
+    Meeting.objects.bulk_update(meetings, ["jalali_month"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_resolutionstageinterval"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="meeting",
+            name="jalali_month",
+            field=models.IntegerField(
+                blank=True,
+                db_index=True,
+                editable=False,
+                null=True,
+                verbose_name="ماه شمسی برگزاری",
+            ),
+        ),
+        migrations.RunPython(populate_jalali_month, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_meeting_jalali_month"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="digest_pending",
+            field=models.BooleanField(
+                db_index=True, default=False, verbose_name="در صف ایمیل خلاصه"
+            ),
+        ),
+        migrations.AddField(
+            model_name="userprofile",
+            name="email_delivery",
+            field=models.CharField(
+                choices=[
+                    ("immediate", "ارسال فوری"),
+                    ("digest", "ایمیل خلاصه دوره‌ای"),
+                ],
+                default="immediate",
+                max_length=20,
+                verbose_name="نحوه ارسال ایمیل",
+            ),
+        ),
+    ]
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("core", "0005_notification_email_digest"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(fields=["read", "sent_at"], name="notif_read_sent_idx"),
+        ),
+        migrations.CreateModel(
+            name="NotificationArchive",
+            fields=[
+                ("id", models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ("message", models.TextField()),
+                ("sent_at", models.DateTimeField()),
+                ("read", models.BooleanField(default=False)),
+                (
+                    "notification_type",
+                    models.CharField(
+                        choices=[
+                            ("info", "اطلاع‌رسانی"),
+                            ("success", "موفقیت"),
+                            ("warning", "هشدار"),
+                            ("error", "خطا"),
+                        ],
+                        default="info",
+                        max_length=20,
+                        verbose_name="نوع نوتیفیکیشن",
+                    ),
+                ),
+                (
+                    "priority",
+                    models.CharField(
+                        choices=[
+                            ("low", "کم"),
+                            ("normal", "عادی"),
+                            ("high", "زیاد"),
+                            ("urgent", "فوری"),
+                        ],
+                        default="normal",
+                        max_length=20,
+                        verbose_name="اولویت",
+                    ),
+                ),
+                ("action_url", models.URLField(blank=True, null=True, verbose_name="لینک عملیات")),
+                ("metadata", models.JSONField(blank=True, default=dict, verbose_name="اطلاعات اضافی")),
+                ("archived_at", models.DateTimeField(auto_now_add=True, verbose_name="زمان بایگانی")),
+                (
+                    "recipient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_notifications",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="archived_notifications",
+                        to="core.resolution",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "نوتیفیکیشن بایگانی‌شده",
+                "verbose_name_plural": "نوتیفیکیشن‌های بایگانی‌شده",
+                "ordering": ["-sent_at"],
+            },
+        ),
+    ]
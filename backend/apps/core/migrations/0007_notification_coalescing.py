@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_notificationarchive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="kind",
+            field=models.CharField(blank=True, default="", max_length=30, verbose_name="نوع رویداد"),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="coalesced_count",
+            field=models.PositiveIntegerField(default=1, verbose_name="تعداد رویدادهای ادغام‌شده"),
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_notification_recipient_sent_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="updated_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="زمان آخرین رویداد"),
+        ),
+        migrations.AddField(
+            model_name="notificationarchive",
+            name="kind",
+            field=models.CharField(blank=True, default="", max_length=30, verbose_name="نوع رویداد"),
+        ),
+        migrations.AddField(
+            model_name="notificationarchive",
+            name="coalesced_count",
+            field=models.PositiveIntegerField(default=1, verbose_name="تعداد رویدادهای ادغام‌شده"),
+        ),
+        migrations.AddField(
+            model_name="notificationarchive",
+            name="updated_at",
+            field=models.DateTimeField(blank=True, null=True, verbose_name="زمان آخرین رویداد"),
+        ),
+    ]
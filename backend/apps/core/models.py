@@ -7,6 +7,15 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from datetime import date
+from persiantools.jdatetime import JalaliDate
+
+def jalali_month_of(day):
+    """ماه شمسی یک تاریخ میلادی به صورت عدد YYYYMM (مثلاً 140211)"""
+    if isinstance(day, str):
+        day = date.fromisoformat(day)
+    jalali = JalaliDate.to_jalali(day)
+    return jalali.year * 100 + jalali.month
 
 class Meeting(models.Model):
     number = models.IntegerField(unique=True, db_index=True)
@@ -16,6 +25,15 @@ class Meeting(models.Model):
     other_invitees = models.CharField(max_length=255, blank=True, null=True, verbose_name="سایر مدعوین")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # ماه شمسی برگزاری (YYYYMM) برای گروه‌بندی در پایگاه داده، از روی held_at
+    jalali_month = models.IntegerField(null=True, blank=True, db_index=True, editable=False, verbose_name="ماه شمسی برگزاری")
+
+    def save(self, *args, **kwargs):
+        self.jalali_month = jalali_month_of(self.held_at) if self.held_at else None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'held_at' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'jalali_month'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"جلسه شماره {self.number} ({self.held_at})"
@@ -65,6 +83,18 @@ class Resolution(models.Model):
     # اعضای فعال در تعاملات مصوبه (برای چت گروهی)
     participants = models.ManyToManyField(settings.AUTH_USER_MODEL, blank=True, related_name="participated_resolutions", verbose_name="شرکت‌کنندگان")
 
+    class Meta:
+        indexes = [
+            # شمارش‌های داشبورد بر اساس وضعیت و نوع
+            models.Index(fields=['status', 'type'], name='res_status_type_idx'),
+            # مصوبات معوق: status in (...) and deadline < today
+            models.Index(fields=['status', 'deadline'], name='res_status_deadline_idx'),
+            # کارتابل و آمار هر واحد مجری
+            models.Index(fields=['executor_unit', 'status'], name='res_executor_status_idx'),
+            # مرتب‌سازی لیست‌ها و صفحه‌بندی keyset روی (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='res_created_id_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.public_id:
             # ابتدا شیء را ذخیره کنیم تا id تولید شود
@@ -137,9 +167,24 @@ class Notification(models.Model):
     priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='normal', verbose_name="اولویت")
     action_url = models.URLField(blank=True, null=True, verbose_name="لینک عملیات")
     metadata = models.JSONField(default=dict, blank=True, verbose_name="اطلاعات اضافی")
+    # در انتظار ارسال در ایمیل خلاصه دوره‌ای
+    digest_pending = models.BooleanField(default=False, db_index=True, verbose_name="در صف ایمیل خلاصه")
+    # نوع رویداد برای ادغام نوتیفیکیشن‌های پشت‌سرهم (مثلاً chat_message)؛ خالی یعنی بدون ادغام
+    kind = models.CharField(max_length=30, blank=True, default='', verbose_name="نوع رویداد")
+    coalesced_count = models.PositiveIntegerField(default=1, verbose_name="تعداد رویدادهای ادغام‌شده")
+    # زمان آخرین رویداد ادغام‌شده؛ sent_at (کلید صفحه‌بندی keyset) تغییر نمی‌کند
+    updated_at = models.DateTimeField(null=True, blank=True, verbose_name="زمان آخرین رویداد")
 
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            # لیست و شمارش نوتیفیکیشن‌های خوانده‌نشده هر کاربر
+            models.Index(fields=['recipient', 'read', '-sent_at'], name='notif_recipient_read_idx'),
+            # صفحه‌بندی keyset لیست نوتیفیکیشن‌های هر کاربر
+            models.Index(fields=['recipient', '-sent_at', '-id'], name='notif_recipient_sent_idx'),
+            # پاکسازی دسته‌ای نوتیفیکیشن‌های خوانده‌شده قدیمی
+            models.Index(fields=['read', 'sent_at'], name='notif_read_sent_idx'),
+        ]
         verbose_name = "نوتیفیکیشن"
         verbose_name_plural = "نوتیفیکیشن‌ها"
 
@@ -148,8 +193,10 @@ class Notification(models.Model):
     
     def mark_as_read(self):
         """علامت‌گذاری به عنوان خوانده شده"""
+        from .services.notification_service import NotificationService
+
+        NotificationService.mark_notification_read(self.recipient, self.id)
         self.read = True
-        self.save(update_fields=['read'])
     
     def get_action_url(self):
         """دریافت لینک عملیات"""
@@ -159,6 +206,31 @@ class Notification(models.Model):
             return f"/dashboard/resolutions/{self.resolution.id}"
         return None
 
+class NotificationArchive(models.Model):
+    """نوتیفیکیشن‌های قدیمی منتقل‌شده از جدول Notification توسط پاکسازی دوره‌ای"""
+    id = models.UUIDField(primary_key=True, editable=False)
+    resolution = models.ForeignKey(Resolution, on_delete=models.SET_NULL, related_name="archived_notifications", null=True, blank=True)
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="archived_notifications")
+    message = models.TextField()
+    sent_at = models.DateTimeField()
+    read = models.BooleanField(default=False)
+    notification_type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES, default='info', verbose_name="نوع نوتیفیکیشن")
+    priority = models.CharField(max_length=20, choices=Notification.PRIORITY_CHOICES, default='normal', verbose_name="اولویت")
+    action_url = models.URLField(blank=True, null=True, verbose_name="لینک عملیات")
+    metadata = models.JSONField(default=dict, blank=True, verbose_name="اطلاعات اضافی")
+    kind = models.CharField(max_length=30, blank=True, default='', verbose_name="نوع رویداد")
+    coalesced_count = models.PositiveIntegerField(default=1, verbose_name="تعداد رویدادهای ادغام‌شده")
+    updated_at = models.DateTimeField(null=True, blank=True, verbose_name="زمان آخرین رویداد")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="زمان بایگانی")
+
+    class Meta:
+        ordering = ['-sent_at']
+        verbose_name = "نوتیفیکیشن بایگانی‌شده"
+        verbose_name_plural = "نوتیفیکیشن‌های بایگانی‌شده"
+
+    def __str__(self):
+        return f"Archived notification to {self.recipient} for {self.resolution}"
+
 class Referral(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     resolution = models.ForeignKey(Resolution, on_delete=models.CASCADE, related_name="referrals")
@@ -199,11 +271,17 @@ class UserProfile(models.Model):
         ("board", "هیئت مدیره"),
         ("secretariat_expert", "کارشناس دبیرخانه"),
     ]
+
+    EMAIL_DELIVERY_CHOICES = [
+        ("immediate", "ارسال فوری"),
+        ("digest", "ایمیل خلاصه دوره‌ای"),
+    ]
     
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="profile", verbose_name="کاربر")
     supervisor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="subordinates", verbose_name="سرپرست")
     position = models.CharField(max_length=20, choices=POSITION_CHOICES, default="employee", verbose_name="سمت")
     department = models.CharField(max_length=100, blank=True, verbose_name="واحد/اداره")
+    email_delivery = models.CharField(max_length=20, choices=EMAIL_DELIVERY_CHOICES, default="immediate", verbose_name="نحوه ارسال ایمیل")
     
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username} - {self.get_position_display()}"
@@ -250,6 +328,10 @@ class ResolutionComment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # آخرین پیشرفت و کامنت‌های هر نوع برای یک مصوبه
+            models.Index(fields=['resolution', 'comment_type', 'created_at'], name='rescomment_res_type_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.author.username} on {self.resolution.clause}-{self.resolution.subclause}"
@@ -309,6 +391,10 @@ class ResolutionAction(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # تاریخچه و محاسبه مدت‌زمان‌ها بر اساس نوع اکشن
+            models.Index(fields=['resolution', 'action_type', 'created_at'], name='resaction_res_type_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_action_type_display()} - {self.actor.get_full_name() or self.actor.username}"
@@ -320,3 +406,45 @@ class ResolutionView(models.Model):
 
     class Meta:
         unique_together = ('user', 'resolution')
+
+class ResolutionStageInterval(models.Model):
+    """
+    بازه حضور مصوبه در هر مرحله از گردش کار
+
+    با ثبت هر اکشن گردش کار (تایید دبیر، تایید مدیرعامل، قبول مجری، برگشت و
+    رسیدن پیشرفت به ۱۰۰٪) بازه جاری بسته و بازه مرحله بعد باز می‌شود تا
+    آمار مدت‌زمان‌ها با یک کوئری تجمیعی محاسبه شود.
+    """
+    STAGE_CHOICES = [
+        ("secretary", "کارتابل دبیر"),
+        ("ceo", "کارتابل مدیرعامل"),
+        ("executor", "کارتابل واحد مجری"),
+        ("execution", "اجرا"),
+    ]
+
+    resolution = models.ForeignKey(Resolution, on_delete=models.CASCADE, related_name="stage_intervals", verbose_name="مصوبه")
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, verbose_name="مرحله")
+    # شماره دفعات ورود مصوبه به این مرحله (۱ برای اولین ورود)
+    cycle = models.PositiveSmallIntegerField(default=1, verbose_name="دفعه")
+    entered_at = models.DateTimeField(verbose_name="زمان ورود")
+    exited_at = models.DateTimeField(null=True, blank=True, verbose_name="زمان خروج")
+    # نوع اکشنی که بازه را باز/بسته کرده ('created' برای ثبت مصوبه)
+    entry_type = models.CharField(max_length=30, verbose_name="اکشن ورود")
+    exit_type = models.CharField(max_length=30, blank=True, default='', verbose_name="اکشن خروج")
+    duration_seconds = models.FloatField(null=True, blank=True, verbose_name="مدت (ثانیه)")
+
+    class Meta:
+        ordering = ['entered_at']
+        indexes = [
+            models.Index(fields=['stage', 'exit_type', 'cycle'], name='resstage_stage_exit_idx'),
+        ]
+        verbose_name = "بازه مرحله مصوبه"
+        verbose_name_plural = "بازه‌های مراحل مصوبات"
+
+    def close(self, at, exit_type):
+        self.exited_at = at
+        self.exit_type = exit_type
+        self.duration_seconds = (at - self.entered_at).total_seconds()
+
+    def __str__(self):
+        return f"{self.get_stage_display()} ({self.cycle}) - {self.resolution_id}"
@@ -0,0 +1,127 @@
+import base64
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    صفحه‌بندی keyset بر اساس (created_at, id)
+
+    برخلاف صفحه‌بندی offset، هر صفحه با یک شرط WHERE روی کلید آخرین ردیف
+    صفحه قبل خوانده می‌شود؛ بنابراین هزینه صفحه N برابر صفحه اول است.
+    صفحه‌بندی فقط وقتی فعال می‌شود که کلاینت `page_size` یا `cursor` بفرستد
+    تا پاسخ لیستی قدیمی برای کلاینت‌های فعلی حفظ شود.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 50
+    max_page_size = 200
+    ordering_field = 'created_at'
+    tiebreak_field = 'id'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_enabled(self, request):
+        return (
+            self.cursor_query_param in request.query_params or
+            self.page_size_query_param in request.query_params
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def encode_cursor(self, obj):
+        value = getattr(obj, self.ordering_field)
+        key = getattr(obj, self.tiebreak_field)
+        raw = f"{value.isoformat()}|{key}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8')
+            value, key = raw.split('|', 1)
+            return datetime.fromisoformat(value), self.parse_tiebreak(key)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def parse_tiebreak(self, key):
+        return uuid.UUID(key)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_enabled(request):
+            return None
+
+        self.request = request
+        self.page_size_value = self.get_page_size(request)
+
+        queryset = queryset.order_by(f'-{self.ordering_field}', f'-{self.tiebreak_field}')
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            value, key = self.decode_cursor(encoded)
+            queryset = queryset.filter(
+                Q(**{f'{self.ordering_field}__lt': value}) |
+                Q(**{self.ordering_field: value, f'{self.tiebreak_field}__lt': key})
+            )
+
+        # یک ردیف اضافه برای تشخیص وجود صفحه بعد
+        rows = list(queryset[:self.page_size_value + 1])
+        self.has_more = len(rows) > self.page_size_value
+        page = rows[:self.page_size_value]
+        self.next_cursor = self.encode_cursor(page[-1]) if self.has_more and page else None
+        return page
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_first_link(self):
+        url = self.request.build_absolute_uri()
+        return remove_query_param(url, self.cursor_query_param)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('next_cursor', self.next_cursor),
+            ('has_more', self.has_more),
+            ('page_size', self.page_size_value),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'has_more': {'type': 'boolean'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+
+class ResolutionCursorPagination(KeysetCursorPagination):
+    """صفحه‌بندی لیست مصوبات (کارتابل و لیست دبیر)"""
+    page_size = 50
+
+
+class NotificationCursorPagination(KeysetCursorPagination):
+    """صفحه‌بندی لیست نوتیفیکیشن‌های کاربر بر اساس (sent_at, id)"""
+    page_size = 30
+    ordering_field = 'sent_at'
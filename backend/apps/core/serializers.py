@@ -1,7 +1,9 @@
 from rest_framework import serializers
-from .models import Meeting, Resolution, Notification, Referral, FollowUp, UserProfile, ResolutionComment, ResolutionAction, ResolutionCommentAttachment, MeetingAttachment
+from .models import Meeting, Resolution, Notification, Referral, FollowUp, UserProfile, ResolutionComment, ResolutionAction, ResolutionCommentAttachment, MeetingAttachment, ResolutionView
 from django.contrib.auth.models import User
+from django.db.models import OuterRef, Subquery, Prefetch
 from .services.notification_service import NotificationService
+from .services.role_directory import RoleDirectory
 
 # تابع تبدیل اعداد انگلیسی به فارسی
 def to_persian_numbers(text):
@@ -144,7 +146,40 @@ class ResolutionSerializer(serializers.ModelSerializer):
     last_progress_update = serializers.SerializerMethodField()
     unread = serializers.SerializerMethodField()
     first_viewed_at = serializers.SerializerMethodField()
-    
+
+    @staticmethod
+    def setup_eager_loading(queryset, user=None):
+        """
+        آماده‌سازی queryset برای حالت لیست
+
+        همه داده‌های مورد نیاز سریالایزر (جلسه، کاربران، پروفایل‌ها، گروه‌ها،
+        زمان مشاهده کاربر و آخرین بروزرسانی پیشرفت) با تعداد ثابتی کوئری
+        بارگذاری می‌شوند و تعداد کوئری‌ها با تعداد ردیف‌ها رشد نمی‌کند.
+        """
+        users = User.objects.select_related('profile__supervisor').prefetch_related('groups')
+        queryset = queryset.select_related(
+            'meeting', 'executor_unit__profile__supervisor'
+        ).prefetch_related(
+            'executor_unit__groups',
+            Prefetch('coworkers', queryset=users),
+            Prefetch('inform_units', queryset=users),
+            Prefetch('participants', queryset=User.objects.only('id')),
+        )
+
+        last_progress = ResolutionComment.objects.filter(
+            resolution=OuterRef('pk'),
+            comment_type='progress_update'
+        ).order_by('-created_at').values('created_at')[:1]
+        queryset = queryset.annotate(last_progress_at=Subquery(last_progress))
+
+        if user is not None and user.is_authenticated:
+            viewed_at = ResolutionView.objects.filter(
+                user=user,
+                resolution=OuterRef('pk')
+            ).values('first_viewed_at')[:1]
+            queryset = queryset.annotate(user_first_viewed_at=Subquery(viewed_at))
+        return queryset
+
     def get_meeting(self, obj):
         if obj.meeting:
             return {
@@ -178,26 +213,36 @@ class ResolutionSerializer(serializers.ModelSerializer):
         return [user.id for user in obj.inform_units.all()]
     
     def get_last_progress_update(self, obj):
+        # مقدار annotate شده در حالت لیست (setup_eager_loading)
+        if hasattr(obj, 'last_progress_at'):
+            return obj.last_progress_at.isoformat() if obj.last_progress_at else None
         # دریافت آخرین به‌روزرسانی پیشرفت
         latest_progress = obj.comments.filter(comment_type='progress_update').order_by('-created_at').first()
         if latest_progress:
             return latest_progress.created_at.isoformat()
         return None
 
+    def _get_user_first_viewed_at(self, obj):
+        request = self.context.get('request')
+        if not request or not request.user.is_authenticated:
+            return None
+        # مقدار annotate شده در حالت لیست (setup_eager_loading)
+        if hasattr(obj, 'user_first_viewed_at'):
+            return obj.user_first_viewed_at
+        view = ResolutionView.objects.filter(user=request.user, resolution=obj).first()
+        return view.first_viewed_at if view else None
+
     def get_unread(self, obj):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        from .models import ResolutionView
+        if hasattr(obj, 'user_first_viewed_at'):
+            return obj.user_first_viewed_at is None
         return not ResolutionView.objects.filter(user=request.user, resolution=obj).exists()
 
     def get_first_viewed_at(self, obj):
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return None
-        from .models import ResolutionView
-        view = ResolutionView.objects.filter(user=request.user, resolution=obj).first()
-        return view.first_viewed_at.isoformat() if view and view.first_viewed_at else None
+        first_viewed_at = self._get_user_first_viewed_at(obj)
+        return first_viewed_at.isoformat() if first_viewed_at else None
 
     class Meta:
         model = Resolution
@@ -279,22 +324,18 @@ class ResolutionSerializer(serializers.ModelSerializer):
         
         if resolution.status == 'pending_ceo_approval':
             # نوتیفیکیشن برای مدیرعامل (فقط وقتی دبیر ثبت می‌کند)
-            ceos = User.objects.filter(profile__position='ceo')
-            for ceo in ceos:
-                NotificationService.create_notification(
-                    recipient=ceo,
-                    message=f"مصوبه جدید جلسه {meeting_num} بند {clause_subclause} برای تایید ارسال شده است.",
-                    resolution=resolution
-                )
+            NotificationService.create_bulk_notifications(
+                RoleDirectory.user_ids('ceo'),
+                f"مصوبه جدید جلسه {meeting_num} بند {clause_subclause} برای تایید ارسال شده است.",
+                resolution=resolution
+            )
         elif resolution.status == 'pending_secretary_approval':
             # نوتیفیکیشن برای دبیر (فقط وقتی کارشناس ثبت می‌کند)
-            secretaries = User.objects.filter(profile__position='secretary')
-            for secretary in secretaries:
-                NotificationService.create_notification(
-                    recipient=secretary,
-                    message=f"مصوبه جدید جلسه {meeting_num} بند {clause_subclause} برای تایید ارسال شده است.",
-                    resolution=resolution
-                )
+            NotificationService.create_bulk_notifications(
+                RoleDirectory.user_ids('secretary'),
+                f"مصوبه جدید جلسه {meeting_num} بند {clause_subclause} برای تایید ارسال شده است.",
+                resolution=resolution
+            )
         
         return resolution
 
@@ -360,6 +401,13 @@ class NotificationSerializer(serializers.ModelSerializer):
             }
         return None
 
+class CompactNotificationSerializer(NotificationSerializer):
+    """نوتیفیکیشن بدون metadata برای لیست‌ها (?compact=1)"""
+
+    class Meta:
+        model = Notification
+        exclude = ['metadata']
+
 class ReferralSerializer(serializers.ModelSerializer):
     class Meta:
         model = Referral
@@ -0,0 +1,167 @@
+from django.db.models import Exists, OuterRef, Q
+
+from ..models import Resolution
+
+# نقش‌هایی که به همه مصوبات دسترسی مشاهده دارند
+VIEW_ALL_POSITIONS = ('secretary', 'auditor', 'ceo')
+
+# وضعیت‌هایی که در آن‌ها گفتگو فقط بین دبیر، مجری، ناظر و مدیرعامل است
+DIALOGUE_STATUSES = ('notified', 'pending_ceo_approval', 'returned_to_secretary')
+
+# وضعیت‌های پس از قبول مجری
+EXECUTION_STATUSES = ('in_progress', 'completed')
+
+MEMBER_RELATIONS = ('executor', 'creator', 'coworkers', 'inform_units', 'participants')
+
+# شرط همیشه نادرست برای ترکیب در Q
+NOTHING = Q(pk__in=[])
+
+
+class ResolutionAccessPolicy:
+    """
+    سیاست دسترسی متمرکز به مصوبات
+
+    همه قواعد «مشاهده»، «چت» و «اقدام» یک‌جا و به صورت شرط SQL مبتنی بر
+    EXISTS تعریف می‌شوند تا هم برای فیلتر لیست‌ها و هم برای بررسی یک مصوبه
+    (با یک کوئری روی کلید اصلی) استفاده شوند. سمت کاربر فقط یک بار خوانده
+    و نگهداری می‌شود.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._position = None
+        self._position_loaded = False
+
+    @property
+    def position(self):
+        if not self._position_loaded:
+            profile = getattr(self.user, 'profile', None) if self.user.is_authenticated else None
+            self._position = profile.position if profile else None
+            self._position_loaded = True
+        return self._position
+
+    def has_position(self, *positions):
+        return self.position in positions
+
+    @property
+    def is_secretary(self):
+        return self.has_position('secretary')
+
+    @property
+    def is_auditor(self):
+        return self.has_position('auditor')
+
+    @property
+    def is_ceo(self):
+        return self.has_position('ceo')
+
+    # --- شرط‌های SQL ---
+
+    def _through_exists(self, field_name):
+        through = getattr(Resolution, field_name).through
+        return Exists(through.objects.filter(resolution_id=OuterRef('pk'), user_id=self.user.id))
+
+    def member_q(self, relations=MEMBER_RELATIONS):
+        """شرط عضویت کاربر در مصوبه (مجری، ایجادکننده، همکار، اطلاع‌رسانی، شرکت‌کننده)"""
+        if not self.user.is_authenticated:
+            return NOTHING
+        q = NOTHING
+        for relation in relations:
+            if relation == 'executor':
+                q |= Q(executor_unit_id=self.user.id)
+            elif relation == 'creator':
+                q |= Q(created_by_id=self.user.id)
+            else:
+                q |= Q(self._through_exists(relation))
+        return q
+
+    def view_q(self):
+        """شرط دسترسی مشاهده"""
+        if self.has_position(*VIEW_ALL_POSITIONS):
+            return Q()
+        return self.member_q()
+
+    def chat_q(self):
+        """شرط دسترسی ارسال پیام بر اساس وضعیت مصوبه"""
+        if not self.user.is_authenticated:
+            return NOTHING
+        executor = Q(executor_unit_id=self.user.id)
+
+        # گفتگو پیش از قبول: دبیر، مجری، ناظر و مدیرعامل
+        if self.has_position('secretary', 'auditor', 'ceo'):
+            dialogue = Q()
+        else:
+            dialogue = executor
+
+        # پس از قبول: مجری، همکاران، ناظر و مدیرعامل (دبیر خیر)
+        if self.is_secretary:
+            execution = NOTHING
+        elif self.has_position('auditor', 'ceo'):
+            execution = Q()
+        else:
+            execution = self.member_q(('executor', 'coworkers', 'inform_units', 'participants'))
+
+        # سایر حالات (مثل cancelled): همه اعضا و مدیرعامل
+        if self.is_ceo:
+            other = Q()
+        else:
+            other = self.member_q()
+
+        return (
+            (Q(status__in=DIALOGUE_STATUSES) & dialogue) |
+            (Q(status__in=EXECUTION_STATUSES) & execution) |
+            (~Q(status__in=DIALOGUE_STATUSES + EXECUTION_STATUSES) & other)
+        )
+
+    def act_q(self):
+        """شرط دسترسی اقدام (ثبت کامنت و ...): فقط اعضای مصوبه"""
+        return self.member_q()
+
+    def refer_q(self):
+        """شرط دسترسی ارجاع: مجری و همکاران"""
+        return self.member_q(('executor', 'coworkers'))
+
+    # --- فیلتر queryset ---
+
+    def viewable(self, queryset=None):
+        queryset = Resolution.objects.all() if queryset is None else queryset
+        return queryset.filter(self.view_q())
+
+    def chattable(self, queryset=None):
+        queryset = Resolution.objects.all() if queryset is None else queryset
+        return queryset.filter(self.chat_q())
+
+    # --- بررسی یک مصوبه ---
+
+    def _check(self, resolution, q):
+        if q == Q():
+            return True
+        if q == NOTHING:
+            return False
+        return Resolution.objects.filter(pk=resolution.pk).filter(q).exists()
+
+    def can_view(self, resolution):
+        if self.has_position(*VIEW_ALL_POSITIONS):
+            return True
+        if self.user.id in (resolution.executor_unit_id, resolution.created_by_id):
+            return True
+        return self._check(resolution, self.view_q())
+
+    def can_chat(self, resolution):
+        return self._check(resolution, self.chat_q())
+
+    def can_act(self, resolution):
+        if self.user.id in (resolution.executor_unit_id, resolution.created_by_id):
+            return True
+        return self._check(resolution, self.act_q())
+
+    def can_refer(self, resolution):
+        if resolution.executor_unit_id == self.user.id:
+            return True
+        return self._check(resolution, self.refer_q())
+
+    def is_executor(self, resolution):
+        return resolution.executor_unit_id == self.user.id
+
+    def is_creator(self, resolution):
+        return resolution.created_by_id == self.user.id
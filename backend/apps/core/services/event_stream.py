@@ -0,0 +1,109 @@
+import json
+import logging
+import re
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# گروه‌هایی که رویدادهایشان برای replay نگه داشته می‌شود: نوتیفیکیشن هر کاربر و چت هر مصوبه
+STREAM_GROUP = re.compile(r'^(notifications_\d+|chat_resolution_[0-9a-f]+)$')
+
+
+def _parse_id(event_id):
+    milliseconds, _, sequence = str(event_id).partition('-')
+    return int(milliseconds), int(sequence or 0)
+
+
+class EventStream:
+    """
+    نگهداری رویدادهای WebSocket در Redis Streams محدود برای replay پس از اتصال مجدد
+
+    هر رویداد ارسالی به گروه کاربر یا چت مصوبه با XADD (MAXLEN تقریبی
+    EVENT_STREAM_MAXLEN) ثبت و شناسه آن به عنوان event_id در رویداد قرار می‌گیرد.
+    کلاینت پس از اتصال مجدد آخرین event_id دیده‌شده را می‌فرستد و فقط رویدادهای
+    بعد از آن دوباره ارسال می‌شوند.
+    """
+
+    _client = None
+
+    @classmethod
+    def client(cls):
+        if cls._client is None:
+            cls._client = redis.Redis.from_url(settings.EVENT_STREAM_REDIS_URL)
+        return cls._client
+
+    @staticmethod
+    def key(group_name):
+        return f'events:{group_name}'
+
+    @classmethod
+    def record(cls, events):
+        """
+        ثبت رویدادهای گروه‌های قابل replay در یک pipeline و افزودن event_id به آن‌ها
+
+        Args:
+            events: لیست (group_name, event)؛ event ها تغییر می‌کنند
+        """
+        if not settings.EVENT_STREAM_ENABLED:
+            return
+        recorded = [(group_name, event) for group_name, event in events if STREAM_GROUP.match(group_name)]
+        if not recorded:
+            return
+        try:
+            pipe = cls.client().pipeline(transaction=False)
+            for group_name, event in recorded:
+                pipe.xadd(
+                    cls.key(group_name),
+                    {'event': json.dumps(event)},
+                    maxlen=settings.EVENT_STREAM_MAXLEN,
+                    approximate=True,
+                )
+            for group_name in {group_name for group_name, _ in recorded}:
+                pipe.expire(cls.key(group_name), settings.EVENT_STREAM_TTL)
+            results = pipe.execute()
+        except Exception as e:
+            # رویداد بدون event_id ارسال می‌شود؛ کلاینت در صورت قطعی کامل بارگذاری می‌کند
+            logger.error(f"Error recording websocket events: {e}")
+            return
+        for (_, event), event_id in zip(recorded, results):
+            event['event_id'] = event_id.decode() if isinstance(event_id, bytes) else event_id
+
+    @classmethod
+    def replay(cls, group_name, last_event_id):
+        """
+        رویدادهای بعد از last_event_id یک گروه
+
+        Returns:
+            tuple: (events, complete)؛ complete=False یعنی بخشی از فاصله دیگر در stream
+            نیست (یا قابل خواندن نبود) و کلاینت باید کامل بارگذاری کند
+        """
+        try:
+            last = _parse_id(last_event_id)
+        except (TypeError, ValueError):
+            return [], False
+        key = cls.key(group_name)
+        limit = settings.EVENT_STREAM_REPLAY_LIMIT
+        try:
+            client = cls.client()
+            oldest = client.xrange(key, count=1)
+            entries = client.xrange(key, min=last_event_id, count=limit + 1)
+        except Exception as e:
+            logger.error(f"Error replaying websocket events: {e}")
+            return [], False
+
+        # نبود stream (منقضی‌شده یا هرگز نوشته‌نشده) یا قدیمی‌ترین رویداد بعد از آخرین
+        # رویداد دیده‌شده یعنی ممکن است رویدادهایی از دست رفته باشند
+        complete = bool(oldest) and _parse_id(oldest[0][0].decode()) <= last
+        events = []
+        for entry_id, fields in entries:
+            entry_id = entry_id.decode()
+            if _parse_id(entry_id) <= last:
+                continue
+            event = json.loads(fields[b'event'])
+            event['event_id'] = entry_id
+            events.append(event)
+        if len(events) > limit:
+            return events[:limit], False
+        return events, complete
@@ -0,0 +1,79 @@
+import hmac
+import json
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+logger = logging.getLogger(__name__)
+
+
+class JSONUserStore:
+    """
+    کاربران فایل ldap_users.json (جایگزین LDAP) با ایندکس نام کاربری
+
+    فایل یک بار خوانده و با تغییر mtime یا اندازه آن دوباره بارگذاری می‌شود.
+    رمز کاربران به صورت password_hash (قالب hasher های Django) نگه داشته
+    می‌شود؛ ورودی‌های قدیمی password متنی تا اجرای دستور
+    hash_ldap_users_passwords همچنان پذیرفته می‌شوند.
+    """
+
+    _index = {}
+    _signature = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def path():
+        return str(settings.LDAP_USERS_FILE)
+
+    @classmethod
+    def _load(cls, path, signature):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        index = {user['username']: user for user in data.get('users', []) if user.get('username')}
+        plaintext = sum(1 for user in index.values() if 'password' in user)
+        if plaintext:
+            logger.warning(f"{plaintext} users in {path} have plaintext passwords; run hash_ldap_users_passwords")
+        cls._index, cls._signature = index, signature
+
+    @classmethod
+    def get(cls, username):
+        """
+        اطلاعات کاربر یا None
+
+        Raises:
+            FileNotFoundError: نبود فایل کاربران
+        """
+        path = cls.path()
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != cls._signature:
+            with cls._lock:
+                if signature != cls._signature:
+                    cls._load(path, signature)
+        return cls._index.get(username)
+
+    @staticmethod
+    def check_password(user_data, password):
+        if user_data.get('password_hash'):
+            return check_password(password, user_data['password_hash'])
+        if 'password' in user_data:
+            return hmac.compare_digest(str(user_data['password']).encode(), str(password).encode())
+        return False
+
+    @staticmethod
+    def hash_passwords(data):
+        """
+        جایگزینی password متنی با password_hash در داده فایل
+
+        Returns:
+            int: تعداد کاربران تبدیل‌شده
+        """
+        migrated = 0
+        for user in data.get('users', []):
+            if 'password' in user:
+                user['password_hash'] = make_password(user.pop('password'))
+                migrated += 1
+        return migrated
@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import ldap
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        # False پس از bind با اطلاعات کاربر؛ پیش از استفاده سرویسی دوباره bind می‌شود
+        self.service_bound = False
+        self.checked_at = 0.0
+
+
+class LDAPConnectionPool:
+    """
+    مخزن thread-safe اتصال‌های LDAP با bind حساب سرویس
+
+    اتصال‌ها باز نگه داشته و بین ورودها دوباره استفاده می‌شوند. اتصالی که بیش از
+    LDAP_POOL_HEALTHCHECK_INTERVAL ثانیه بیکار مانده پیش از تحویل با whoami بررسی
+    و در صورت قطع بودن دوباره ساخته می‌شود. بررسی رمز کاربر روی یکی از همین
+    اتصال‌ها انجام می‌شود و اتصال در استفاده سرویسی بعدی دوباره با حساب سرویس
+    bind می‌شود.
+    """
+
+    def __init__(self, uri, bind_dn, bind_password, size=5, timeout=5):
+        self.uri = uri
+        self.bind_dn = bind_dn
+        self.bind_password = bind_password
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._created = 0
+        self._condition = threading.Condition()
+
+    def _open(self):
+        conn = ldap.initialize(self.uri)
+        conn.set_option(ldap.OPT_REFERRALS, 0)
+        conn.set_option(ldap.OPT_PROTOCOL_VERSION, 3)
+        conn.set_option(ldap.OPT_NETWORK_TIMEOUT, settings.LDAP_NETWORK_TIMEOUT)
+        conn.set_option(ldap.OPT_TIMEOUT, settings.LDAP_NETWORK_TIMEOUT)
+        return _PooledConnection(conn)
+
+    @staticmethod
+    def _close(pooled):
+        try:
+            pooled.conn.unbind_s()
+        except Exception:
+            pass
+
+    def _acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._condition:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ldap.SERVER_DOWN({'desc': 'LDAP connection pool exhausted'})
+                self._condition.wait(remaining)
+        try:
+            return self._open()
+        except Exception:
+            self._discard()
+            raise
+
+    def _release(self, pooled):
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    def _discard(self, pooled=None):
+        if pooled is not None:
+            self._close(pooled)
+        with self._condition:
+            self._created -= 1
+            self._condition.notify()
+
+    def _ensure_service_bound(self, pooled):
+        now = time.monotonic()
+        if pooled.service_bound and now - pooled.checked_at > settings.LDAP_POOL_HEALTHCHECK_INTERVAL:
+            try:
+                pooled.conn.whoami_s()
+            except ldap.LDAPError:
+                # اتصال بیکار قطع شده؛ اتصال تازه جایگزین می‌شود
+                self._close(pooled)
+                pooled.conn = self._open().conn
+                pooled.service_bound = False
+        if not pooled.service_bound:
+            pooled.conn.simple_bind_s(self.bind_dn, self.bind_password)
+            pooled.service_bound = True
+        pooled.checked_at = now
+
+    @contextmanager
+    def _checkout(self, pooled=None):
+        pooled = pooled or self._acquire()
+        try:
+            yield pooled
+        except (ldap.SERVER_DOWN, ldap.CONNECT_ERROR, ldap.TIMEOUT):
+            self._discard(pooled)
+            raise
+        except BaseException:
+            self._release(pooled)
+            raise
+        else:
+            self._release(pooled)
+
+    @contextmanager
+    def connection(self):
+        """
+        اتصال bind‌شده با حساب سرویس برای جستجو
+
+        اگر bind اتصال قطع‌شده شکست بخورد یک بار با اتصال تازه تلاش می‌شود.
+        """
+        for attempt in range(2):
+            pooled = self._acquire()
+            try:
+                self._ensure_service_bound(pooled)
+                break
+            except Exception:
+                self._discard(pooled)
+                if attempt:
+                    raise
+        with self._checkout(pooled):
+            yield pooled.conn
+
+    def check_credentials(self, user_dn, password):
+        """
+        بررسی رمز کاربر با bind روی یکی از اتصال‌های مخزن
+
+        Returns:
+            bool: درست بودن رمز
+        """
+        if not password:
+            # bind بدون رمز در LDAP یک bind ناشناس موفق است
+            return False
+        for attempt in range(2):
+            try:
+                with self._checkout() as pooled:
+                    pooled.service_bound = False
+                    try:
+                        pooled.conn.simple_bind_s(user_dn, password)
+                    except ldap.INVALID_CREDENTIALS:
+                        return False
+                    return True
+            except ldap.SERVER_DOWN:
+                # اتصال بیکار مخزن قطع شده بود؛ یک بار با اتصال دیگر
+                if attempt:
+                    raise
+
+    def close(self):
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for pooled in idle:
+            self._close(pooled)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """مخزن مشترک پردازه با تنظیمات LDAP_*"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = LDAPConnectionPool(
+                settings.LDAP_SERVER_URI,
+                settings.LDAP_BIND_DN,
+                settings.LDAP_BIND_PASSWORD,
+                size=settings.LDAP_POOL_SIZE,
+                timeout=settings.LDAP_POOL_TIMEOUT,
+            )
+        return _pool
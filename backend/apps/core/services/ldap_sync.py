@@ -0,0 +1,230 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+
+from ..models import UserProfile
+from .role_directory import RoleDirectory
+from .stats_service import StatsCache
+from .token_cache import TokenCache
+
+logger = logging.getLogger(__name__)
+
+USER_FIELDS = ('first_name', 'last_name', 'email')
+
+
+def _first(attrs, name):
+    values = attrs.get(name)
+    return values[0].decode('utf-8') if values else ''
+
+
+def entry_fields(attrs):
+    """
+    فیلدهای کاربر و profile از attribute های LDAP
+
+    department در نبود attribute برابر None است (مقدار فعلی حفظ می‌شود).
+    """
+    return {
+        'first_name': _first(attrs, 'givenName'),
+        'last_name': _first(attrs, 'sn'),
+        'email': _first(attrs, 'mail'),
+        'department': _first(attrs, 'department') if attrs.get('department') else None,
+    }
+
+
+def chunked(values, size):
+    """تقسیم مقادیر به دسته‌های size تایی (برای IN زیر سقف پارامترهای SQL Server)"""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def apply_changes(instance, values):
+    """
+    مقداردهی فقط فیلدهای تغییرکرده
+
+    Returns:
+        list: نام فیلدهای تغییرکرده (برای save(update_fields=...))
+    """
+    changed = []
+    for field, value in values.items():
+        if value is not None and getattr(instance, field) != value:
+            setattr(instance, field, value)
+            changed.append(field)
+    return changed
+
+
+class LDAPDirectorySync:
+    """
+    همگام‌سازی دوره‌ای کاربران و گروه‌های LDAP با دیتابیس
+
+    ou=people و ou=groups به صورت صفحه‌ای (LDAP_SYNC_PAGE_SIZE) خوانده و فقط
+    تفاوت‌ها با bulk_create / bulk_update اعمال می‌شوند. عضویت فقط در گروه‌هایی
+    که در LDAP وجود دارند و فقط برای کاربران LDAP همگام می‌شود؛ سمت کاربران
+    دستی تعیین می‌شود و تغییر نمی‌کند. چون bulk ها signal ندارند، کش
+    RoleDirectory، StatsCache و TokenCache کاربران تغییرکرده اینجا باطل می‌شوند.
+    """
+
+    @staticmethod
+    def _paged_search(conn, base, filterstr, attrs):
+        import ldap
+        from ldap.controls import SimplePagedResultsControl
+
+        control = SimplePagedResultsControl(True, size=settings.LDAP_SYNC_PAGE_SIZE, cookie='')
+        while True:
+            msgid = conn.search_ext(base, ldap.SCOPE_SUBTREE, filterstr, attrs, serverctrls=[control])
+            _, entries, _, response_controls = conn.result3(msgid)
+            for dn, entry_attrs in entries:
+                # ارجاع‌ها (dn=None) نادیده گرفته می‌شوند
+                if dn:
+                    yield dn, entry_attrs
+            cookies = [
+                c.cookie for c in response_controls
+                if c.controlType == SimplePagedResultsControl.controlType
+            ]
+            if not cookies or not cookies[0]:
+                return
+            control.cookie = cookies[0]
+
+    @classmethod
+    def fetch(cls):
+        """
+        خواندن کاربران و گروه‌ها از LDAP
+
+        Returns:
+            tuple: ({username: fields}, {group_name: set(usernames)})
+        """
+        from .ldap_pool import get_pool
+
+        people = {}
+        dn_usernames = {}
+        groups = {}
+        with get_pool().connection() as conn:
+            for dn, attrs in cls._paged_search(
+                conn, settings.LDAP_USER_BASE, '(uid=*)', ['uid', 'givenName', 'sn', 'mail', 'department']
+            ):
+                username = _first(attrs, 'uid')
+                people[username] = entry_fields(attrs)
+                dn_usernames[dn.lower()] = username
+            for dn, attrs in cls._paged_search(conn, settings.LDAP_GROUP_BASE, '(cn=*)', ['cn', 'member']):
+                members = (dn_usernames.get(member.decode('utf-8').lower()) for member in attrs.get('member', []))
+                groups[_first(attrs, 'cn')] = {username for username in members if username}
+        return people, groups
+
+    @classmethod
+    def apply(cls, people, groups):
+        """
+        اعمال تفاوت‌های directory با دیتابیس
+
+        Returns:
+            dict: تعداد تغییرات هر بخش
+        """
+        batch_size = settings.LDAP_SYNC_BATCH_SIZE
+        stats = dict.fromkeys(
+            ('users_created', 'users_updated', 'profiles_created', 'profiles_updated',
+             'groups_created', 'memberships_added', 'memberships_removed'),
+            0,
+        )
+        with transaction.atomic():
+            # جدول‌ها کامل خوانده می‌شوند؛ IN با هزاران مقدار از سقف پارامترهای SQL Server می‌گذرد
+            users = {
+                user.username: user
+                for user in User.objects.only('id', 'username', *USER_FIELDS)
+                if user.username in people
+            }
+            new_users = []
+            for username, fields in people.items():
+                if username not in users:
+                    user = User(
+                        username=username,
+                        is_staff=username == 'admin',
+                        is_superuser=username == 'admin',
+                        **{field: fields[field] for field in USER_FIELDS}
+                    )
+                    user.set_unusable_password()
+                    new_users.append(user)
+            User.objects.bulk_create(new_users, batch_size=batch_size)
+            stats['users_created'] = len(new_users)
+
+            changed_users = []
+            for username, user in users.items():
+                if apply_changes(user, {field: people[username][field] for field in USER_FIELDS}):
+                    changed_users.append(user)
+            User.objects.bulk_update(changed_users, USER_FIELDS, batch_size=batch_size)
+            stats['users_updated'] = len(changed_users)
+
+            # شناسه کاربران تازه (bulk_create در SQL Server شناسه برنمی‌گرداند)
+            user_ids = {
+                username: user_id
+                for username, user_id in User.objects.values_list('username', 'id')
+                if username in people
+            }
+            profiles = {profile.user_id: profile for profile in UserProfile.objects.only('id', 'user_id', 'department')}
+            new_profiles = []
+            changed_profiles = []
+            for username, user_id in user_ids.items():
+                department = people[username]['department']
+                profile = profiles.get(user_id)
+                if profile is None:
+                    new_profiles.append(UserProfile(user_id=user_id, position='employee', department=department or ''))
+                elif apply_changes(profile, {'department': department}):
+                    changed_profiles.append(profile)
+            UserProfile.objects.bulk_create(new_profiles, batch_size=batch_size)
+            UserProfile.objects.bulk_update(changed_profiles, ['department'], batch_size=batch_size)
+            stats['profiles_created'] = len(new_profiles)
+            stats['profiles_updated'] = len(changed_profiles)
+
+            group_ids = {}
+            for names in chunked(groups, batch_size):
+                group_ids.update(Group.objects.filter(name__in=names).values_list('name', 'id'))
+            new_groups = [Group(name=name) for name in groups if name not in group_ids]
+            Group.objects.bulk_create(new_groups, batch_size=batch_size)
+            stats['groups_created'] = len(new_groups)
+            for names in chunked((group.name for group in new_groups), batch_size):
+                group_ids.update(Group.objects.filter(name__in=names).values_list('name', 'id'))
+
+            Membership = User.groups.through
+            wanted = {
+                (user_ids[username], group_ids[name])
+                for name, members in groups.items()
+                for username in members
+                if username in user_ids
+            }
+            ldap_user_ids = set(user_ids.values())
+            current = {
+                (user_id, group_id)
+                for ids in chunked(group_ids.values(), batch_size)
+                for user_id, group_id in Membership.objects.filter(group_id__in=ids).values_list('user_id', 'group_id')
+                if user_id in ldap_user_ids
+            }
+            Membership.objects.bulk_create(
+                [Membership(user_id=user_id, group_id=group_id) for user_id, group_id in wanted - current],
+                batch_size=batch_size,
+            )
+            stale = current - wanted
+            stale_by_group = {}
+            for user_id, group_id in stale:
+                stale_by_group.setdefault(group_id, []).append(user_id)
+            for group_id, stale_user_ids in stale_by_group.items():
+                for ids in chunked(stale_user_ids, batch_size):
+                    Membership.objects.filter(group_id=group_id, user_id__in=ids).delete()
+            stats['memberships_added'] = len(wanted - current)
+            stats['memberships_removed'] = len(stale)
+
+        changed_ids = {user.id for user in changed_users}
+        changed_ids |= {profile.user_id for profile in changed_profiles}
+        changed_ids |= {user_id for user_id, _ in (wanted - current) | stale}
+        if changed_ids or new_users:
+            TokenCache.invalidate_users(changed_ids)
+            RoleDirectory.invalidate()
+        if new_users or changed_users or new_profiles or changed_profiles:
+            # نام و واحد کاربران در آمار داشبوردها نمایش داده می‌شود
+            transaction.on_commit(StatsCache.invalidate)
+        logger.info(f"LDAP directory sync: {stats}")
+        return stats
+
+    @classmethod
+    def run(cls):
+        people, groups = cls.fetch()
+        return cls.apply(people, groups)
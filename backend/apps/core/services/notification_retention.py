@@ -0,0 +1,129 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Notification, NotificationArchive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = (
+    'id', 'resolution_id', 'recipient_id', 'message', 'sent_at', 'read',
+    'notification_type', 'priority', 'action_url', 'metadata',
+    'kind', 'coalesced_count', 'updated_at',
+)
+
+
+class NotificationRetention:
+    """
+    پاکسازی دسته‌ای نوتیفیکیشن‌های خوانده‌شده قدیمی
+
+    حذف در دسته‌های کوچک به ترتیب sent_at و هر دسته در تراکنش جداگانه انجام
+    می‌شود تا قفل‌ها در SQL Server به کل جدول ارتقا پیدا نکنند و درج
+    نوتیفیکیشن‌های جدید معطل نشود. فقط نوتیفیکیشن‌های خوانده‌شده حذف می‌شوند،
+    پس شمارنده خوانده‌نشده (UnreadCounter) تغییری نمی‌کند.
+    """
+
+    @staticmethod
+    def retention_days(notification_type, priority):
+        """
+        مدت نگهداری (روز) برای یک نوع و اولویت
+
+        اگر برای نوع یا اولویت مقدار جداگانه تنظیم شده باشد بیشترین آن‌ها،
+        وگرنه NOTIFICATION_RETENTION_DAYS اعمال می‌شود.
+        """
+        specific = [
+            days for days in (
+                settings.NOTIFICATION_RETENTION_BY_TYPE.get(notification_type),
+                settings.NOTIFICATION_RETENTION_BY_PRIORITY.get(priority),
+            )
+            if days is not None
+        ]
+        return max(specific) if specific else settings.NOTIFICATION_RETENTION_DAYS
+
+    @staticmethod
+    def policies(days=None):
+        """
+        گروه‌بندی ترکیب‌های نوع/اولویت بر اساس مدت نگهداری
+
+        Returns:
+            list: [(days, Q)] به ترتیب مدت نگهداری
+        """
+        if days is not None:
+            return [(days, Q())]
+        groups = {}
+        for notification_type, _ in Notification.NOTIFICATION_TYPES:
+            for priority, _ in Notification.PRIORITY_CHOICES:
+                retention = NotificationRetention.retention_days(notification_type, priority)
+                groups.setdefault(retention, []).append((notification_type, priority))
+        if len(groups) == 1:
+            return [(next(iter(groups)), Q())]
+
+        policies = []
+        for retention, pairs in sorted(groups.items()):
+            condition = Q()
+            for notification_type, priority in pairs:
+                condition |= Q(notification_type=notification_type, priority=priority)
+            policies.append((retention, condition))
+        return policies
+
+    @staticmethod
+    def archive(notification_ids):
+        rows = Notification.objects.filter(id__in=notification_ids).values(*ARCHIVE_FIELDS)
+        NotificationArchive.objects.bulk_create([NotificationArchive(**row) for row in rows])
+
+    @staticmethod
+    def run(days=None, archive=None, batch_size=None, max_seconds=None, progress=None):
+        """
+        حذف (یا بایگانی) نوتیفیکیشن‌های خوانده‌شده قدیمی
+
+        Args:
+            days: مدت نگهداری یکسان برای همه؛ None برای تنظیمات هر نوع و اولویت
+            archive: انتقال به NotificationArchive پیش از حذف (پیش‌فرض NOTIFICATION_ARCHIVE_ENABLED)
+            batch_size: تعداد ردیف هر دسته (پیش‌فرض NOTIFICATION_CLEANUP_BATCH_SIZE)
+            max_seconds: حداکثر زمان اجرا؛ باقی‌مانده در اجرای بعدی حذف می‌شود
+            progress: تابعی که پس از هر دسته با آمار جاری صدا زده می‌شود
+
+        Returns:
+            dict: deleted, archived, batches, seconds و complete (همه دسته‌ها حذف شدند یا نه)
+        """
+        archive = settings.NOTIFICATION_ARCHIVE_ENABLED if archive is None else archive
+        batch_size = batch_size or settings.NOTIFICATION_CLEANUP_BATCH_SIZE
+        max_seconds = settings.NOTIFICATION_CLEANUP_MAX_SECONDS if max_seconds is None else max_seconds
+        started = time.monotonic()
+        now = timezone.now()
+        metrics = {'deleted': 0, 'archived': 0, 'batches': 0, 'seconds': 0, 'complete': True}
+
+        for retention, condition in NotificationRetention.policies(days):
+            expired = Notification.objects.filter(condition, read=True, sent_at__lt=now - timedelta(days=retention))
+            while True:
+                if max_seconds and time.monotonic() - started > max_seconds:
+                    metrics['complete'] = False
+                    break
+                notification_ids = list(expired.order_by('sent_at').values_list('id', flat=True)[:batch_size])
+                if not notification_ids:
+                    break
+                with transaction.atomic():
+                    if archive:
+                        NotificationRetention.archive(notification_ids)
+                        metrics['archived'] += len(notification_ids)
+                    deleted, _ = Notification.objects.filter(id__in=notification_ids).delete()
+                metrics['deleted'] += deleted
+                metrics['batches'] += 1
+                metrics['seconds'] = round(time.monotonic() - started, 2)
+                logger.info(
+                    f"Notification cleanup batch {metrics['batches']} (retention {retention} days): "
+                    f"{metrics['deleted']} deleted, {metrics['archived']} archived in {metrics['seconds']}s"
+                )
+                if progress:
+                    progress(metrics)
+            if not metrics['complete']:
+                break
+
+        metrics['seconds'] = round(time.monotonic() - started, 2)
+        logger.info(f"Notification cleanup finished: {metrics}")
+        return metrics
@@ -1,12 +1,18 @@
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import Q
 from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 import json
 import logging
 from ..models import Notification, Resolution, UserProfile
-from .websocket_service import send_websocket_notification
+from .notification_retention import NotificationRetention
+from .presence import Presence
+from .role_directory import RoleDirectory
+from .unread_counter import UnreadCounter
+from .websocket_service import send_websocket_notifications
 
 logger = logging.getLogger(__name__)
 
@@ -42,16 +48,9 @@ class NotificationService:
                 priority=priority
             )
             
-            # ارسال نوتیفیکیشن لحظه‌ای
-            NotificationService.send_realtime_notification(notification)
-            
-            # ارسال ایمیل (اگر فعال باشد)
-            if NotificationService.should_send_email(recipient, notification_type):
-                NotificationService.send_email_notification(notification)
-            
-            # ارسال نوتیفیکیشن مرورگر (اگر فعال باشد)
-            if NotificationService.should_send_browser_notification(recipient, notification_type):
-                NotificationService.send_browser_notification(notification)
+            NotificationService.count_unread([notification])
+            # ارسال لحظه‌ای، ایمیل و مرورگر
+            NotificationService.dispatch([notification])
             
             logger.info(f"Notification created: {notification.id} for user {recipient.username}")
             return notification
@@ -60,48 +59,322 @@ class NotificationService:
             logger.error(f"Error creating notification: {e}")
             return None
     
+    @staticmethod
+    def create_bulk_notifications(recipients, message, resolution=None, notification_type='info', priority='normal', exclude=None, kind=''):
+        """
+        ایجاد یک نوتیفیکیشن برای چند گیرنده
+
+        همه ردیف‌ها با یک bulk_create ذخیره و با هم تحویل داده می‌شوند.
+        با تعیین kind، برای گیرنده‌ای که در NOTIFICATION_COALESCE_WINDOW اخیر
+        نوتیفیکیشن خوانده‌نشده‌ای از همین نوع و مصوبه دارد، ردیف جدیدی ساخته
+        نمی‌شود و همان نوتیفیکیشن به‌روز می‌شود (بدون ارسال دوباره).
+
+        Args:
+            recipients: کاربران (یا شناسه‌های کاربران) دریافت‌کننده؛ تکراری‌ها حذف می‌شوند
+            message: متن پیام، یا تابعی که برای هر گیرنده متن را برمی‌گرداند
+            resolution: مصوبه مرتبط (اختیاری)
+            notification_type: نوع نوتیفیکیشن (info, success, warning, error)
+            priority: اولویت (low, normal, high, urgent)
+            exclude: کاربری که نباید نوتیفیکیشن بگیرد (معمولاً انجام‌دهنده عمل)
+            kind: نوع رویداد برای ادغام (اختیاری)
+        """
+        try:
+            recipient_ids = []
+            for recipient in recipients:
+                recipient_id = getattr(recipient, 'id', recipient)
+                if recipient_id is None or recipient_id in recipient_ids:
+                    continue
+                if exclude is not None and recipient_id == exclude.id:
+                    continue
+                recipient_ids.append(recipient_id)
+            if not recipient_ids:
+                return []
+
+            users = User.objects.filter(id__in=recipient_ids).select_related('profile').in_bulk()
+            coalesced = []
+            if kind:
+                coalesced = NotificationService.coalesce(users, recipient_ids, message, resolution, kind)
+                coalesced_ids = {notification.recipient_id for notification in coalesced}
+                recipient_ids = [recipient_id for recipient_id in recipient_ids if recipient_id not in coalesced_ids]
+            notifications = [
+                Notification(
+                    recipient=users[recipient_id],
+                    message=message(users[recipient_id]) if callable(message) else message,
+                    resolution=resolution,
+                    notification_type=notification_type,
+                    priority=priority,
+                    kind=kind
+                )
+                for recipient_id in recipient_ids if recipient_id in users
+            ]
+            Notification.objects.bulk_create(notifications, batch_size=500)
+            NotificationService.count_unread(notifications)
+            NotificationService.dispatch(notifications)
+
+            logger.info(f"Created {len(notifications)} notifications, coalesced {len(coalesced)}")
+            return notifications + coalesced
+
+        except Exception as e:
+            logger.error(f"Error creating bulk notifications: {e}")
+            return []
+
+    @staticmethod
+    def coalesce(users, recipient_ids, message, resolution, kind):
+        """
+        به‌روزرسانی نوتیفیکیشن‌های خوانده‌نشده اخیر همین نوع و مصوبه به جای ایجاد ردیف جدید
+
+        تعداد، متن و زمان آخرین رویداد (updated_at) به‌روز می‌شود؛ sent_at که
+        کلید صفحه‌بندی لیست نوتیفیکیشن‌هاست ثابت می‌ماند. شمارنده خوانده‌نشده
+        تغییر نمی‌کند و WebSocket دوباره ارسال نمی‌شود.
+
+        Returns:
+            list: نوتیفیکیشن‌های به‌روزشده
+        """
+        now = timezone.now()
+        since = now - timedelta(seconds=settings.NOTIFICATION_COALESCE_WINDOW)
+        recent = Notification.objects.filter(
+            Q(updated_at__gte=since) | Q(updated_at__isnull=True, sent_at__gte=since),
+            recipient_id__in=[recipient_id for recipient_id in recipient_ids if recipient_id in users],
+            resolution=resolution,
+            kind=kind,
+            read=False,
+        ).order_by('-sent_at')
+        latest = {}
+        for notification in recent:
+            latest.setdefault(notification.recipient_id, notification)
+        for recipient_id, notification in latest.items():
+            text = message(users[recipient_id]) if callable(message) else message
+            notification.coalesced_count += 1
+            notification.message = f"({notification.coalesced_count} مورد جدید) {text}"
+            notification.updated_at = now
+        coalesced = list(latest.values())
+        Notification.objects.bulk_update(coalesced, ['message', 'coalesced_count', 'updated_at'], batch_size=500)
+        return coalesced
+
+    @staticmethod
+    def count_unread(notifications):
+        """افزایش شمارنده خوانده‌نشده گیرندگان پس از commit تراکنش"""
+        recipient_ids = [notification.recipient_id for notification in notifications]
+        if recipient_ids:
+            transaction.on_commit(lambda: UnreadCounter.increment(recipient_ids))
+
+    @staticmethod
+    def dispatch(notifications):
+        """
+        تحویل نوتیفیکیشن‌های ذخیره‌شده (WebSocket، ایمیل، مرورگر)
+
+        در حالت ناهمگام درخواست فقط شناسه‌ها را پس از commit تراکنش در صف Celery
+        می‌گذارد و ارسال در worker انجام می‌شود؛ کندی SMTP یا Redis درخواست را
+        معطل نمی‌کند. در حالت هم‌زمان هم تحویل پس از commit (و پس از افزایش
+        شمارنده در count_unread) انجام می‌شود تا UnreadCounter از ردیف‌های
+        commit‌نشده مقداردهی و دوباره افزایش داده نشود.
+        """
+        if not notifications:
+            return
+        if not settings.NOTIFICATION_ASYNC_DELIVERY:
+            transaction.on_commit(lambda: NotificationService.deliver(notifications))
+            return
+        notification_ids = [str(notification.id) for notification in notifications]
+        transaction.on_commit(lambda: NotificationService.enqueue_delivery(notification_ids))
+
+    @staticmethod
+    def enqueue_delivery(notification_ids):
+        """ارسال شناسه‌ها به صف تحویل در دسته‌های NOTIFICATION_DELIVERY_BATCH_SIZE تایی"""
+        from ..tasks import deliver_email_notifications, deliver_realtime_notifications
+
+        batch_size = settings.NOTIFICATION_DELIVERY_BATCH_SIZE
+        for start in range(0, len(notification_ids), batch_size):
+            batch = notification_ids[start:start + batch_size]
+            try:
+                deliver_realtime_notifications.delay(batch)
+                deliver_email_notifications.delay(batch)
+            except Exception as e:
+                logger.error(f"Error enqueuing notification delivery: {e}")
+
+    @staticmethod
+    def deliver(notifications):
+        """تحویل هم‌زمان (بدون Celery)؛ خطاها فقط لاگ می‌شوند"""
+        try:
+            NotificationService.deliver_realtime(notifications)
+        except Exception as e:
+            logger.error(f"Error sending realtime notifications: {e}")
+        try:
+            NotificationService.deliver_emails(notifications)
+        except Exception as e:
+            logger.error(f"Error sending email notifications: {e}")
+        NotificationService.deliver_browser(notifications)
+
+    @staticmethod
+    def deliver_realtime(notifications):
+        """
+        ارسال دسته‌ای WebSocket همراه تعداد خوانده‌نشده؛ خطا به فراخواننده (task) می‌رسد تا دوباره تلاش شود
+
+        برای کاربران آفلاین group_send انجام نمی‌شود و رویداد فقط در EventStream ثبت
+        می‌شود تا پس از اتصال مجدد (resume) replay شود.
+        """
+        online = Presence.online_user_ids(notification.recipient_id for notification in notifications)
+        if not online and not settings.EVENT_STREAM_ENABLED:
+            return
+        unread_counts = UnreadCounter.get_many(online)
+        send_websocket_notifications(notifications, unread_counts, online_user_ids=online)
+
+    @staticmethod
+    def deliver_emails(notifications):
+        """
+        ارسال ایمیل نوتیفیکیشن‌ها با یک اتصال SMTP
+
+        خطای باز کردن اتصال به فراخواننده می‌رسد؛ خطای هر پیام ثبت و ادامه داده می‌شود.
+
+        Returns:
+            list: شناسه نوتیفیکیشن‌هایی که ایمیلشان ارسال نشد
+        """
+        pending = [
+            notification for notification in notifications
+            if notification.recipient.email
+            and NotificationService.should_send_email(notification.recipient, notification.notification_type)
+        ]
+        digest_ids = {
+            notification.id for notification in pending
+            if NotificationService.should_send_email_digest(notification.recipient, notification.priority)
+        }
+        if digest_ids:
+            # در ایمیل خلاصه بعدی ارسال می‌شوند
+            Notification.objects.filter(id__in=digest_ids).update(digest_pending=True)
+            pending = [notification for notification in pending if notification.id not in digest_ids]
+        failed = []
+        if not pending:
+            return failed
+        with get_connection(fail_silently=False) as connection:
+            for notification in pending:
+                try:
+                    connection.send_messages([NotificationService.build_email_message(notification)])
+                except Exception as e:
+                    logger.error(f"Error sending email notification {notification.id}: {e}")
+                    failed.append(str(notification.id))
+        logger.info(f"Sent {len(pending) - len(failed)} email notifications")
+        return failed
+
+    @staticmethod
+    def send_email_digests():
+        """
+        ارسال ایمیل‌های خلاصه: برای هر کاربر یک ایمیل از نوتیفیکیشن‌های در صف
+
+        همه ایمیل‌ها با یک اتصال SMTP ارسال می‌شوند؛ نوتیفیکیشن‌های کاربری که ارسالش
+        ناموفق بود برای دوره بعد در صف می‌مانند.
+
+        Returns:
+            int: تعداد ایمیل‌های خلاصه ارسال‌شده
+        """
+        pending = (
+            Notification.objects.filter(digest_pending=True)
+            .select_related('recipient', 'resolution__meeting')
+            .order_by('recipient_id', 'sent_at')
+        )
+        digests = {}
+        for notification in pending:
+            digests.setdefault(notification.recipient_id, []).append(notification)
+        if not digests:
+            return 0
+
+        sent = 0
+        sent_ids = []
+        with get_connection(fail_silently=False) as connection:
+            for recipient_notifications in digests.values():
+                try:
+                    connection.send_messages([NotificationService.build_digest_message(recipient_notifications)])
+                except Exception as e:
+                    logger.error(f"Error sending email digest to {recipient_notifications[0].recipient.email}: {e}")
+                    continue
+                sent += 1
+                sent_ids.extend(notification.id for notification in recipient_notifications)
+
+        batch_size = settings.NOTIFICATION_DELIVERY_BATCH_SIZE
+        for start in range(0, len(sent_ids), batch_size):
+            Notification.objects.filter(id__in=sent_ids[start:start + batch_size]).update(digest_pending=False)
+        logger.info(f"Sent {sent} email digests")
+        return sent
+
+    @staticmethod
+    def deliver_browser(notifications):
+        for notification in notifications:
+            if NotificationService.should_send_browser_notification(notification.recipient, notification.notification_type):
+                NotificationService.send_browser_notification(notification)
+    
     @staticmethod
     def send_realtime_notification(notification):
         """ارسال نوتیفیکیشن لحظه‌ای از طریق WebSocket"""
         try:
-            send_websocket_notification(
-                notification.recipient,
-                notification.message,
-                notification.resolution,
-                notification.notification_type
-            )
+            NotificationService.deliver_realtime([notification])
         except Exception as e:
             logger.error(f"Error sending realtime notification: {e}")
-    
+
     @staticmethod
-    def send_email_notification(notification):
-        """ارسال نوتیفیکیشن از طریق ایمیل"""
-        try:
-            subject = f"نوتیفیکیشن جدید - {notification.notification_type.title()}"
+    def build_email_message(notification):
+        """ساخت ایمیل HTML یک نوتیفیکیشن"""
+        subject = f"نوتیفیکیشن جدید - {notification.notification_type.title()}"
+        
+        # ایجاد محتوای ایمیل
+        email_content = f"""
+        <div dir="rtl" style="font-family: Tahoma, Arial, sans-serif;">
+            <h2 style="color: #003363;">نوتیفیکیشن جدید</h2>
+            <p style="color: #333; line-height: 1.6;">{notification.message}</p>
             
-            # ایجاد محتوای ایمیل
-            email_content = f"""
-            <div dir="rtl" style="font-family: Tahoma, Arial, sans-serif;">
-                <h2 style="color: #003363;">نوتیفیکیشن جدید</h2>
-                <p style="color: #333; line-height: 1.6;">{notification.message}</p>
-                
-                {f'<p style="color: #666; font-size: 14px;">مصوبه: جلسه {notification.resolution.meeting.number} بند {notification.resolution.clause}-{notification.resolution.subclause}</p>' if notification.resolution else ''}
-                
-                <p style="color: #999; font-size: 12px; margin-top: 20px;">
-                    این ایمیل در تاریخ {notification.sent_at.strftime('%Y/%m/%d %H:%M')} ارسال شده است.
-                </p>
-            </div>
-            """
+            {f'<p style="color: #666; font-size: 14px;">مصوبه: جلسه {notification.resolution.meeting.number} بند {notification.resolution.clause}-{notification.resolution.subclause}</p>' if notification.resolution else ''}
             
-            send_mail(
-                subject=subject,
-                message=notification.message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[notification.recipient.email],
-                html_message=email_content,
-                fail_silently=False
+            <p style="color: #999; font-size: 12px; margin-top: 20px;">
+                این ایمیل در تاریخ {notification.sent_at.strftime('%Y/%m/%d %H:%M')} ارسال شده است.
+            </p>
+        </div>
+        """
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=notification.message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[notification.recipient.email],
+        )
+        email.attach_alternative(email_content, 'text/html')
+        return email
+    
+    @staticmethod
+    def build_digest_message(notifications):
+        """ساخت ایمیل خلاصه HTML برای نوتیفیکیشن‌های یک کاربر"""
+        recipient = notifications[0].recipient
+        subject = f"خلاصه نوتیفیکیشن‌ها - {len(notifications)} مورد جدید"
+
+        items = []
+        for notification in notifications:
+            resolution = (
+                f'<br><span style="color: #666; font-size: 13px;">مصوبه: جلسه {notification.resolution.meeting.number} بند {notification.resolution.clause}-{notification.resolution.subclause}</span>'
+                if notification.resolution else ''
             )
-            
+            sent_at = notification.sent_at.strftime('%Y/%m/%d %H:%M')
+            items.append(
+                f'<li style="margin-bottom: 12px;">'
+                f'<span style="color: #999; font-size: 12px;">{sent_at}</span><br>'
+                f'{notification.message}{resolution}</li>'
+            )
+        email_content = f"""
+        <div dir="rtl" style="font-family: Tahoma, Arial, sans-serif;">
+            <h2 style="color: #003363;">خلاصه نوتیفیکیشن‌ها</h2>
+            <ul style="color: #333; line-height: 1.6; padding-right: 20px;">{''.join(items)}</ul>
+        </div>
+        """
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body="\n\n".join(notification.message for notification in notifications),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[recipient.email],
+        )
+        email.attach_alternative(email_content, 'text/html')
+        return email
+    
+    @staticmethod
+    def send_email_notification(notification, connection=None):
+        """ارسال نوتیفیکیشن از طریق ایمیل"""
+        try:
+            email = NotificationService.build_email_message(notification)
+            email.connection = connection
+            email.send(fail_silently=False)
             logger.info(f"Email notification sent to {notification.recipient.email}")
             
         except Exception as e:
@@ -134,6 +407,19 @@ class NotificationService:
             logger.error(f"Error checking email settings: {e}")
             return True
     
+    @staticmethod
+    def should_send_email_digest(user, priority):
+        """
+        بررسی اینکه ایمیل به جای ارسال فوری در ایمیل خلاصه دوره‌ای جمع شود
+
+        ایمیل خلاصه انتخابی کاربر است (پیش‌فرض ارسال فوری)؛ اولویت‌های high و urgent
+        همیشه فوری ارسال می‌شوند.
+        """
+        if priority in ('high', 'urgent'):
+            return False
+        profile = getattr(user, 'profile', None)
+        return getattr(profile, 'email_delivery', 'immediate') == 'digest'
+    
     @staticmethod
     def should_send_browser_notification(user, notification_type):
         """بررسی اینکه آیا باید نوتیفیکیشن مرورگر ارسال شود یا نه"""
@@ -154,63 +440,45 @@ class NotificationService:
     def notify_resolution_created(resolution):
         """نوتیفیکیشن ایجاد مصوبه جدید"""
         try:
+            title = f"جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause}"
+
             # نوتیفیکیشن برای مدیرعامل
             if resolution.status == 'pending_ceo_approval':
-                ceos = User.objects.filter(profile__position='ceo')
-                for ceo in ceos:
-                    message = add_resolution_link(
-                        f"مصوبه جدید جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} برای تایید ارسال شده است.",
-                        resolution
-                    )
-                    NotificationService.create_notification(
-                        recipient=ceo,
-                        message=message,
-                        resolution=resolution,
-                        notification_type='info',
-                        priority='high'
-                    )
+                NotificationService.create_bulk_notifications(
+                    RoleDirectory.user_ids('ceo'),
+                    add_resolution_link(f"مصوبه جدید {title} برای تایید ارسال شده است.", resolution),
+                    resolution=resolution,
+                    notification_type='info',
+                    priority='high'
+                )
             
             # نوتیفیکیشن برای مجری (اگر تعیین شده باشد)
             if resolution.executor_unit:
-                message = add_resolution_link(
-                    f"مصوبه جدید جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} به شما واگذار شده است.",
-                    resolution
-                )
-                NotificationService.create_notification(
-                    recipient=resolution.executor_unit,
-                    message=message,
+                NotificationService.create_bulk_notifications(
+                    [resolution.executor_unit],
+                    add_resolution_link(f"مصوبه جدید {title} به شما واگذار شده است.", resolution),
                     resolution=resolution,
                     notification_type='info',
                     priority='high'
                 )
             
             # نوتیفیکیشن برای همکاران
-            for coworker in resolution.coworkers.all():
-                message = add_resolution_link(
-                    f"شما به عنوان همکار در مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} تعیین شده‌اید.",
-                    resolution
-                )
-                NotificationService.create_notification(
-                    recipient=coworker,
-                    message=message,
-                    resolution=resolution,
-                    notification_type='info',
-                    priority='normal'
-                )
+            NotificationService.create_bulk_notifications(
+                resolution.coworkers.all(),
+                add_resolution_link(f"شما به عنوان همکار در مصوبه {title} تعیین شده‌اید.", resolution),
+                resolution=resolution,
+                notification_type='info',
+                priority='normal'
+            )
             
             # نوتیفیکیشن برای واحدهای اطلاع‌رسانی
-            for inform_unit in resolution.inform_units.all():
-                message = add_resolution_link(
-                    f"مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} برای اطلاع شما ارسال شده است.",
-                    resolution
-                )
-                NotificationService.create_notification(
-                    recipient=inform_unit,
-                    message=message,
-                    resolution=resolution,
-                    notification_type='info',
-                    priority='low'
-                )
+            NotificationService.create_bulk_notifications(
+                resolution.inform_units.all(),
+                add_resolution_link(f"مصوبه {title} برای اطلاع شما ارسال شده است.", resolution),
+                resolution=resolution,
+                notification_type='info',
+                priority='low'
+            )
                 
         except Exception as e:
             logger.error(f"Error notifying resolution creation: {e}")
@@ -219,43 +487,32 @@ class NotificationService:
     def notify_resolution_approved(resolution, approved_by):
         """نوتیفیکیشن تایید مصوبه"""
         try:
+            title = f"جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause}"
+
             # نوتیفیکیشن برای مجری
             if resolution.executor_unit:
-                message = add_resolution_link(
-                    f"مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} توسط {approved_by.get_full_name()} تایید شد.",
-                    resolution
-                )
-                NotificationService.create_notification(
-                    recipient=resolution.executor_unit,
-                    message=message,
+                NotificationService.create_bulk_notifications(
+                    [resolution.executor_unit],
+                    add_resolution_link(f"مصوبه {title} توسط {approved_by.get_full_name()} تایید شد.", resolution),
                     resolution=resolution,
                     notification_type='success',
                     priority='high'
                 )
             
             # نوتیفیکیشن برای همکاران
-            for coworker in resolution.coworkers.all():
-                message = add_resolution_link(
-                    f"مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} تایید شد و آماده اجرا است.",
-                    resolution
-                )
-                NotificationService.create_notification(
-                    recipient=coworker,
-                    message=message,
-                    resolution=resolution,
-                    notification_type='success',
-                    priority='normal'
-                )
+            NotificationService.create_bulk_notifications(
+                resolution.coworkers.all(),
+                add_resolution_link(f"مصوبه {title} تایید شد و آماده اجرا است.", resolution),
+                resolution=resolution,
+                notification_type='success',
+                priority='normal'
+            )
             
             # نوتیفیکیشن برای دبیر
             if resolution.created_by:
-                message = add_resolution_link(
-                    f"مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} توسط {approved_by.get_full_name()} تایید شد.",
-                    resolution
-                )
-                NotificationService.create_notification(
-                    recipient=resolution.created_by,
-                    message=message,
+                NotificationService.create_bulk_notifications(
+                    [resolution.created_by],
+                    add_resolution_link(f"مصوبه {title} توسط {approved_by.get_full_name()} تایید شد.", resolution),
                     resolution=resolution,
                     notification_type='success',
                     priority='normal'
@@ -268,30 +525,25 @@ class NotificationService:
     def notify_resolution_returned(resolution, returned_by, reason):
         """نوتیفیکیشن برگشت مصوبه"""
         try:
+            title = f"جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause}"
+
             # نوتیفیکیشن برای مدیرعامل
-            ceos = User.objects.filter(profile__position='ceo')
-            for ceo in ceos:
-                message = add_resolution_link(
-                    f"مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} توسط {returned_by.get_full_name()} برگشت داده شد. دلیل: {reason}",
+            NotificationService.create_bulk_notifications(
+                RoleDirectory.user_ids('ceo'),
+                add_resolution_link(
+                    f"مصوبه {title} توسط {returned_by.get_full_name()} برگشت داده شد. دلیل: {reason}",
                     resolution
-                )
-                NotificationService.create_notification(
-                    recipient=ceo,
-                    message=message,
-                    resolution=resolution,
-                    notification_type='warning',
-                    priority='high'
-                )
+                ),
+                resolution=resolution,
+                notification_type='warning',
+                priority='high'
+            )
             
             # نوتیفیکیشن برای دبیر
             if resolution.created_by:
-                message = add_resolution_link(
-                    f"مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} برگشت داده شد. دلیل: {reason}",
-                    resolution
-                )
-                NotificationService.create_notification(
-                    recipient=resolution.created_by,
-                    message=message,
+                NotificationService.create_bulk_notifications(
+                    [resolution.created_by],
+                    add_resolution_link(f"مصوبه {title} برگشت داده شد. دلیل: {reason}", resolution),
                     resolution=resolution,
                     notification_type='warning',
                     priority='normal'
@@ -304,36 +556,33 @@ class NotificationService:
     def notify_chat_message(resolution, author, message, mentioned_users=None):
         """نوتیفیکیشن پیام جدید در چت"""
         try:
-            # نوتیفیکیشن برای شرکت‌کنندگان چت
-            participants = resolution.participants.all()
-            
-            for participant in participants:
-                if participant != author:  # برای خود نویسنده نوتیفیکیشن ارسال نکن
-                    # بررسی mentions
-                    is_mentioned = mentioned_users and participant in mentioned_users
-                    
-                    if is_mentioned:
-                        message_text = add_resolution_link(
-                            f"{author.get_full_name()} شما را در پیام جدیدی mention کرده است: {message[:100]}...",
-                            resolution
-                        )
-                        notification_type = 'warning'
-                        priority = 'high'
-                    else:
-                        message_text = add_resolution_link(
-                            f"پیام جدید از {author.get_full_name()} در مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause}",
-                            resolution
-                        )
-                        notification_type = 'info'
-                        priority = 'normal'
-                    
-                    NotificationService.create_notification(
-                        recipient=participant,
-                        message=message_text,
-                        resolution=resolution,
-                        notification_type=notification_type,
-                        priority=priority
-                    )
+            # نوتیفیکیشن برای شرکت‌کنندگان چت (به جز خود نویسنده)
+            participants = [participant for participant in resolution.participants.all() if participant != author]
+            mentioned = [participant for participant in participants if mentioned_users and participant in mentioned_users]
+            others = [participant for participant in participants if participant not in mentioned]
+
+            NotificationService.create_bulk_notifications(
+                mentioned,
+                add_resolution_link(
+                    f"{author.get_full_name()} شما را در پیام جدیدی mention کرده است: {message[:100]}...",
+                    resolution
+                ),
+                resolution=resolution,
+                notification_type='warning',
+                priority='high',
+                kind='chat_mention'
+            )
+            NotificationService.create_bulk_notifications(
+                others,
+                add_resolution_link(
+                    f"پیام جدید از {author.get_full_name()} در مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause}",
+                    resolution
+                ),
+                resolution=resolution,
+                notification_type='info',
+                priority='normal',
+                kind='chat_message'
+            )
                     
         except Exception as e:
             logger.error(f"Error notifying chat message: {e}")
@@ -342,34 +591,20 @@ class NotificationService:
     def notify_progress_update(resolution, updated_by, progress, description):
         """نوتیفیکیشن به‌روزرسانی پیشرفت"""
         try:
-            # نوتیفیکیشن برای مدیرعامل
-            ceos = User.objects.filter(profile__position='ceo')
-            for ceo in ceos:
-                message = add_resolution_link(
-                    f"پیشرفت مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} به {progress}% به‌روزرسانی شد.",
-                    resolution
-                )
-                NotificationService.create_notification(
-                    recipient=ceo,
-                    message=message,
-                    resolution=resolution,
-                    notification_type='info',
-                    priority='normal'
-                )
-            
-            # نوتیفیکیشن برای دبیر
+            # نوتیفیکیشن برای مدیرعامل و دبیر
+            recipients = RoleDirectory.users('ceo')
             if resolution.created_by:
-                message = add_resolution_link(
+                recipients.append(resolution.created_by)
+            NotificationService.create_bulk_notifications(
+                recipients,
+                add_resolution_link(
                     f"پیشرفت مصوبه جلسه {resolution.meeting.number} بند {resolution.clause}-{resolution.subclause} به {progress}% به‌روزرسانی شد.",
                     resolution
-                )
-                NotificationService.create_notification(
-                    recipient=resolution.created_by,
-                    message=message,
-                    resolution=resolution,
-                    notification_type='info',
-                    priority='normal'
-                )
+                ),
+                resolution=resolution,
+                notification_type='info',
+                priority='normal'
+            )
                 
         except Exception as e:
             logger.error(f"Error notifying progress update: {e}")
@@ -392,39 +627,65 @@ class NotificationService:
                 
                 # نوتیفیکیشن برای مجری
                 if resolution.executor_unit:
-                    NotificationService.create_notification(
-                        recipient=resolution.executor_unit,
-                        message=message,
+                    NotificationService.create_bulk_notifications(
+                        [resolution.executor_unit],
+                        message,
                         resolution=resolution,
                         notification_type='warning',
                         priority='high'
                     )
                 
                 # نوتیفیکیشن برای همکاران
-                for coworker in resolution.coworkers.all():
-                    NotificationService.create_notification(
-                        recipient=coworker,
-                        message=message,
-                        resolution=resolution,
-                        notification_type='warning',
-                        priority='normal'
-                    )
+                NotificationService.create_bulk_notifications(
+                    resolution.coworkers.all(),
+                    message,
+                    resolution=resolution,
+                    notification_type='warning',
+                    priority='normal'
+                )
                     
         except Exception as e:
             logger.error(f"Error notifying deadline reminder: {e}")
     
     @staticmethod
-    def cleanup_old_notifications(days=30):
-        """پاکسازی نوتیفیکیشن‌های قدیمی"""
+    def mark_notification_read(user, notification_id):
+        """
+        علامت‌گذاری یک نوتیفیکیشن کاربر به عنوان خوانده شده
+
+        Returns:
+            bool: False اگر نوتیفیکیشن وجود نداشته باشد
+        """
+        updated = Notification.objects.filter(id=notification_id, recipient=user, read=False).update(read=True)
+        if updated:
+            UnreadCounter.change({user.id: -updated})
+            UnreadCounter.push([user.id])
+            return True
+        return Notification.objects.filter(id=notification_id, recipient=user).exists()
+
+    @staticmethod
+    def mark_all_notifications_read(user):
+        """
+        علامت‌گذاری همه نوتیفیکیشن‌های کاربر به عنوان خوانده شده
+
+        Returns:
+            int: تعداد نوتیفیکیشن‌های به‌روزشده
+        """
+        updated = Notification.objects.filter(recipient=user, read=False).update(read=True)
+        if updated:
+            UnreadCounter.change({user.id: -updated})
+            UnreadCounter.push([user.id])
+        return updated
+
+    @staticmethod
+    def cleanup_old_notifications(days=None):
+        """
+        پاکسازی دسته‌ای نوتیفیکیشن‌های خوانده‌شده قدیمی (NotificationRetention)
+
+        Args:
+            days: مدت نگهداری یکسان؛ None برای تنظیمات هر نوع و اولویت
+        """
         try:
-            cutoff_date = timezone.now() - timedelta(days=days)
-            old_notifications = Notification.objects.filter(
-                sent_at__lt=cutoff_date,
-                read=True
-            )
-            count = old_notifications.count()
-            old_notifications.delete()
-            
+            count = NotificationRetention.run(days=days)['deleted']
             logger.info(f"Cleaned up {count} old notifications")
             return count
             
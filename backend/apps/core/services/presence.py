@@ -0,0 +1,101 @@
+import logging
+import time
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# کاربران آنلاین: عضو = user_id، امتیاز = زمان انقضای آخرین heartbeat
+ONLINE_KEY = 'presence:online'
+
+
+def _user_key(user_id):
+    # اتصال‌های هر کاربر: عضو = channel_name، امتیاز = زمان انقضا
+    return f'presence:user:{user_id}'
+
+
+class Presence:
+    """
+    حضور کاربران در WebSocket
+
+    هر اتصال NotificationConsumer هنگام connect و سپس هر
+    PRESENCE_HEARTBEAT_INTERVAL ثانیه زمان انقضای خود را PRESENCE_TTL ثانیه جلو
+    می‌برد؛ اتصال‌هایی که پردازه‌شان بدون disconnect از بین رفته با گذشتن TTL
+    خودبه‌خود آفلاین حساب می‌شوند. در صورت خطای Redis همه کاربران آنلاین فرض
+    می‌شوند تا ارسالی از دست نرود.
+    """
+
+    _client = None
+
+    @classmethod
+    def client(cls):
+        if cls._client is None:
+            cls._client = redis.Redis.from_url(settings.PRESENCE_REDIS_URL)
+        return cls._client
+
+    @classmethod
+    def connect(cls, user_id, channel_name):
+        """ثبت اتصال یا تمدید heartbeat آن"""
+        expires = time.time() + settings.PRESENCE_TTL
+        pipe = cls.client().pipeline()
+        pipe.zadd(_user_key(user_id), {channel_name: expires})
+        pipe.expire(_user_key(user_id), settings.PRESENCE_TTL)
+        pipe.zadd(ONLINE_KEY, {str(user_id): expires})
+        pipe.execute()
+
+    heartbeat = connect
+
+    @classmethod
+    def disconnect(cls, user_id, channel_name):
+        client = cls.client()
+        key = _user_key(user_id)
+        pipe = client.pipeline()
+        pipe.zrem(key, channel_name)
+        pipe.zremrangebyscore(key, 0, time.time())
+        pipe.zrange(key, -1, -1, withscores=True)
+        latest = pipe.execute()[-1]
+        # تا PRESENCE_RECONNECT_GRACE ثانیه آنلاین می‌ماند تا رویدادهای زمان اتصال مجدد
+        # در EventStream ثبت و پس از resume دوباره ارسال شوند
+        expires = time.time() + settings.PRESENCE_RECONNECT_GRACE
+        if latest:
+            expires = max(expires, latest[0][1])
+        client.zadd(ONLINE_KEY, {str(user_id): expires})
+
+    @classmethod
+    def online_user_ids(cls, user_ids):
+        """
+        کاربران آنلاین از بین user_ids
+
+        Returns:
+            set: شناسه کاربران آنلاین (یا همه در صورت غیرفعال بودن/خطا)
+        """
+        user_ids = list(set(user_ids))
+        if not settings.PRESENCE_ENABLED or not user_ids:
+            return set(user_ids)
+        try:
+            pipe = cls.client().pipeline()
+            for user_id in user_ids:
+                pipe.zscore(ONLINE_KEY, str(user_id))
+            scores = pipe.execute()
+        except Exception as e:
+            logger.error(f"Presence unavailable: {e}")
+            return set(user_ids)
+        now = time.time()
+        return {user_id for user_id, score in zip(user_ids, scores) if score is not None and score > now}
+
+    @classmethod
+    def online_count(cls):
+        """
+        تعداد کاربران آنلاین (پس از حذف اتصال‌های منقضی)
+
+        Returns:
+            int: تعداد کاربران آنلاین یا None در صورت خطای Redis
+        """
+        try:
+            client = cls.client()
+            client.zremrangebyscore(ONLINE_KEY, 0, time.time())
+            return client.zcard(ONLINE_KEY)
+        except Exception as e:
+            logger.error(f"Presence unavailable: {e}")
+            return None
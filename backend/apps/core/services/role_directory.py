@@ -0,0 +1,86 @@
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from .token_cache import TokenCache
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'roles:version'
+
+
+class RoleDirectory:
+    """
+    فهرست کاربران هر سمت (مدیرعامل، ناظر، دبیر، ...)
+
+    کاربران هر سمت (همراه profile) در حافظه همین پردازه و snapshot فیلدهای لازم
+    آن‌ها (بدون رمز، TokenCache.snapshots) در Redis نگه داشته می‌شوند. کلید Redis شامل شماره نسخه است و ذخیره یا حذف UserProfile نسخه را
+    افزایش می‌دهد (signals). نسخه حافظه پردازه حداکثر هر ROLE_DIRECTORY_LOCAL_TTL
+    ثانیه با Redis مقایسه می‌شود، پس تغییر سمت در سایر پردازه‌ها با همین تاخیر
+    دیده می‌شود.
+    """
+
+    # {position: (version, checked_at, users)}
+    _local = {}
+
+    @staticmethod
+    def get_version():
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, time.time_ns(), None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    @staticmethod
+    def load(position):
+        return TokenCache.snapshots(User.objects.filter(profile__position=position).order_by('id'))
+
+    @staticmethod
+    def build(snapshots):
+        return [TokenCache.build_user(snapshot) for snapshot in snapshots]
+
+    @classmethod
+    def users(cls, position):
+        """کاربران یک سمت (با profile بارگذاری‌شده)"""
+        now = time.monotonic()
+        entry = cls._local.get(position)
+        if entry and now - entry[1] < settings.ROLE_DIRECTORY_LOCAL_TTL:
+            return list(entry[2])
+
+        try:
+            version = cls.get_version()
+            if entry and entry[0] == version:
+                cls._local[position] = (version, now, entry[2])
+                return list(entry[2])
+            key = f'roles:users:{version}:{position}'
+            snapshots = cache.get(key)
+            if snapshots is None:
+                snapshots = cls.load(position)
+                cache.set(key, snapshots, settings.ROLE_DIRECTORY_TIMEOUT)
+        except Exception as e:
+            # در صورت در دسترس نبودن Redis مستقیماً از دیتابیس خوانده می‌شود
+            logger.error(f"Role directory cache unavailable: {e}")
+            return cls.build(cls.load(position))
+
+        users = cls.build(snapshots)
+
+        cls._local[position] = (version, now, users)
+        return list(users)
+
+    @classmethod
+    def user_ids(cls, position):
+        return [user.id for user in cls.users(position)]
+
+    @classmethod
+    def invalidate(cls):
+        cls._local.clear()
+        try:
+            try:
+                cache.incr(VERSION_KEY)
+            except ValueError:
+                cache.set(VERSION_KEY, time.time_ns(), None)
+        except Exception as e:
+            logger.error(f"Error invalidating role directory: {e}")
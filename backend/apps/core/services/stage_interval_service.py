@@ -0,0 +1,275 @@
+import heapq
+from array import array
+from bisect import bisect_left
+
+from django.db import connection
+
+from ..models import ResolutionAction, ResolutionStageInterval
+
+# اکشن‌هایی که مصوبه را از مرحله جاری خارج می‌کنند
+TRANSITION_ACTIONS = ('secretary_approved', 'ceo_approved', 'executor_accepted', 'return')
+
+# خروج از مرحله اجرا با رسیدن پیشرفت به ۱۰۰٪
+EXECUTION_COMPLETED = 'progress_completed'
+
+# بازه معقول مدت‌ها در آمار واحدهای مجری (۱ دقیقه تا ۱ سال)
+DURATION_MIN_SECONDS = 60
+DURATION_MAX_SECONDS = 525600 * 60
+
+# فاصله دو ستون datetime به ثانیه در SQL هر دیتابیس
+SECONDS_BETWEEN = {
+    'mssql': 'DATEDIFF_BIG(millisecond, {start}, {end}) / 1000.0',
+    'postgresql': 'EXTRACT(EPOCH FROM ({end} - {start}))',
+    'sqlite': '(julianday({end}) - julianday({start})) * 86400.0',
+}
+
+# صدک‌های گزارش‌شده در آمار مدت‌ها
+DURATION_PERCENTILES = (50, 90, 99)
+
+# دسته‌های ثابت هیستوگرام مدت‌ها: (حد پایین، حد بالا، عنوان) به ثانیه
+HOUR = 3600
+DAY = 24 * HOUR
+DURATION_HISTOGRAM_BUCKETS = (
+    (0, HOUR, 'کمتر از 1 ساعت'),
+    (HOUR, DAY, '1 ساعت تا 1 روز'),
+    (DAY, 3 * DAY, '1 تا 3 روز'),
+    (3 * DAY, 7 * DAY, '3 تا 7 روز'),
+    (7 * DAY, 30 * DAY, '1 هفته تا 1 ماه'),
+    (30 * DAY, 90 * DAY, '1 تا 3 ماه'),
+    (90 * DAY, None, 'بیش از 3 ماه'),
+)
+
+
+def percentile(values, percent):
+    """صدک با درون‌یابی خطی روی آرایه مرتب"""
+    if not values:
+        return 0
+    position = (len(values) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def duration_distribution(values, scale=1):
+    """
+    صدک‌ها و هیستوگرام یک آرایه مرتب از مدت‌ها
+
+    Args:
+        values: آرایه مرتب مدت‌ها (ثانیه)
+        scale: مقسوم‌علیه واحد خروجی صدک‌ها (60 برای دقیقه)
+    """
+    histogram = []
+    for lower, upper, label in DURATION_HISTOGRAM_BUCKETS:
+        end = bisect_left(values, upper) if upper is not None else len(values)
+        histogram.append({
+            'label': label,
+            'min_seconds': lower,
+            'max_seconds': upper,
+            'count': end - bisect_left(values, lower),
+        })
+    return {
+        'percentiles': {
+            f'p{percent}': round(percentile(values, percent) / scale, 2)
+            for percent in DURATION_PERCENTILES
+        },
+        'histogram': histogram,
+    }
+
+
+def _next_stage(action_type, action_data, resolution):
+    """مرحله‌ای که مصوبه پس از این اکشن وارد آن می‌شود (یا None)"""
+    action_data = action_data or {}
+    if action_type == 'secretary_approved':
+        return 'ceo'
+    if action_type == 'ceo_approved':
+        # مصوبات اطلاع‌رسانی پس از تایید مدیرعامل تکمیل می‌شوند
+        if action_data.get('new_status') == 'completed' or resolution.type == 'informational':
+            return None
+        return 'executor'
+    if action_type == 'executor_accepted':
+        return 'execution'
+    if action_type == 'return':
+        # رد دبیر مصوبه را منتفی می‌کند؛ برگشت مجری آن را به مدیرعامل می‌برد
+        if action_data.get('new_status') == 'cancelled':
+            return None
+        return 'ceo'
+    return None
+
+
+def _initial_stage(status):
+    if status == 'pending_secretary_approval':
+        return 'secretary'
+    if status == 'pending_ceo_approval':
+        return 'ceo'
+    return None
+
+
+def apply_action(intervals, resolution, action_type, action_data, at):
+    """
+    اعمال یک اکشن روی بازه‌های یک مصوبه (در حافظه)
+
+    Args:
+        intervals: لیست بازه‌های مصوبه به ترتیب زمان ورود (تغییر می‌کند)
+        resolution: مصوبه
+        action_type: نوع اکشن
+        action_data: داده‌های اکشن
+        at: زمان اکشن
+
+    Returns:
+        list: بازه‌های جدید یا تغییرکرده که باید ذخیره شوند
+    """
+    changed = []
+    if action_type == 'progress_update':
+        if (action_data or {}).get('new_progress') == 100:
+            # خروج از اجرا = آخرین باری که پیشرفت به ۱۰۰٪ رسیده
+            execution = [interval for interval in intervals if interval.stage == 'execution']
+            if execution:
+                execution[-1].close(at, EXECUTION_COMPLETED)
+                changed.append(execution[-1])
+        return changed
+
+    if action_type not in TRANSITION_ACTIONS:
+        return changed
+
+    current = next((interval for interval in reversed(intervals) if interval.exited_at is None), None)
+    if current is not None:
+        current.close(at, action_type)
+        changed.append(current)
+
+    stage = _next_stage(action_type, action_data, resolution)
+    if stage:
+        interval = ResolutionStageInterval(
+            resolution=resolution,
+            stage=stage,
+            cycle=1 + sum(1 for item in intervals if item.stage == stage),
+            entered_at=at,
+            entry_type=action_type,
+        )
+        intervals.append(interval)
+        changed.append(interval)
+    return changed
+
+
+class StageIntervalService:
+    """نگهداری جدول بازه‌های مراحل و آمار مدت‌زمان‌ها از روی آن"""
+
+    @staticmethod
+    def open_initial(resolution):
+        """باز کردن اولین بازه هنگام ثبت مصوبه"""
+        stage = _initial_stage(resolution.status)
+        if stage:
+            ResolutionStageInterval.objects.create(
+                resolution=resolution,
+                stage=stage,
+                entered_at=resolution.created_at,
+                entry_type='created',
+            )
+
+    @staticmethod
+    def record_action(action):
+        """به‌روزرسانی بازه‌ها پس از ثبت یک اکشن"""
+        if action.action_type not in TRANSITION_ACTIONS and action.action_type != 'progress_update':
+            return
+        resolution = action.resolution
+        intervals = list(resolution.stage_intervals.all())
+        if not intervals:
+            # مصوبه‌ای که پیش از این جدول ثبت شده؛ کل تاریخچه آن بازسازی می‌شود
+            StageIntervalService.rebuild(resolution)
+            return
+        for interval in apply_action(intervals, resolution, action.action_type, action.action_data, action.created_at):
+            interval.save()
+
+    @staticmethod
+    def build_intervals(resolution, actions):
+        """
+        ساخت بازه‌های یک مصوبه از روی تاریخچه اکشن‌ها (بدون ذخیره)
+
+        Args:
+            resolution: مصوبه
+            actions: اکشن‌های مصوبه به ترتیب زمان
+        """
+        intervals = []
+        transitions = [action for action in actions if action.action_type in TRANSITION_ACTIONS]
+        # مصوباتی که مستقیم به مدیرعامل رفته‌اند تایید دبیر ندارند
+        if transitions and transitions[0].action_type == 'ceo_approved':
+            stage = 'ceo'
+        else:
+            stage = 'secretary'
+        intervals.append(ResolutionStageInterval(
+            resolution=resolution, stage=stage, entered_at=resolution.created_at, entry_type='created'
+        ))
+        for action in actions:
+            apply_action(intervals, resolution, action.action_type, action.action_data, action.created_at)
+        return intervals
+
+    @staticmethod
+    def rebuild(resolution):
+        """حذف و بازسازی بازه‌های یک مصوبه"""
+        actions = ResolutionAction.objects.filter(resolution=resolution).order_by('created_at')
+        intervals = StageIntervalService.build_intervals(resolution, list(actions))
+        resolution.stage_intervals.all().delete()
+        ResolutionStageInterval.objects.bulk_create(intervals)
+        return intervals
+
+    @staticmethod
+    def closed(stage, **filters):
+        """بازه‌های بسته‌شده یک مرحله"""
+        return ResolutionStageInterval.objects.filter(
+            stage=stage, exited_at__isnull=False, **filters
+        )
+
+    @staticmethod
+    def durations_by_executor(queryset, *fields):
+        """
+        مدت‌ها به صورت آرایه‌های مرتب فشرده (array('d'))، به تفکیک واحد مجری مصوبه
+
+        Returns:
+            dict: (executor_unit_id, *fields) -> آرایه مرتب مدت‌ها (ثانیه)
+        """
+        rows = queryset.values_list(
+            'resolution__executor_unit', *fields, 'duration_seconds'
+        ).order_by('duration_seconds')
+        groups = {}
+        for *key, seconds in rows.iterator(chunk_size=5000):
+            groups.setdefault(tuple(key), array('d')).append(seconds)
+        return groups
+
+    @staticmethod
+    def merge_durations(groups):
+        """ادغام آرایه‌های مرتب گروه‌ها در یک آرایه مرتب"""
+        return array('d', heapq.merge(*groups.values()))
+
+    @staticmethod
+    def action_gaps_by_actor(action_types):
+        """
+        میانگین فاصله هر اکشن از اکشن قبلی همان مصوبه، به تفکیک انجام‌دهنده
+
+        یک کوئری: LAG() روی اکشن‌های هر مصوبه در CTE و سپس فیلتر نوع اکشن و
+        AVG/COUNT به تفکیک actor_id در دیتابیس؛ فیلتر نوع اکشن پس از محاسبه
+        پنجره انجام می‌شود تا «اکشن قبلی» از میان همه اکشن‌ها باشد.
+
+        Returns:
+            dict: actor_id -> (تعداد، میانگین فاصله به ثانیه با دقت میلی‌ثانیه)
+        """
+        if not action_types:
+            return {}
+        table = connection.ops.quote_name(ResolutionAction._meta.db_table)
+        gap = SECONDS_BETWEEN.get(connection.vendor, SECONDS_BETWEEN['mssql']).format(
+            start='previous_at', end='created_at'
+        )
+        placeholders = ', '.join(['%s'] * len(action_types))
+        sql = f"""
+            WITH gaps AS (
+                SELECT actor_id, action_type, created_at,
+                       LAG(created_at) OVER (PARTITION BY resolution_id ORDER BY created_at) AS previous_at
+                FROM {table}
+            )
+            SELECT actor_id, COUNT(*), AVG(CAST({gap} AS FLOAT))
+            FROM gaps
+            WHERE previous_at IS NOT NULL AND action_type IN ({placeholders})
+            GROUP BY actor_id
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql, list(action_types))
+            # دقت میلی‌ثانیه (همان DATEDIFF_BIG در SQL Server) تا همه دیتابیس‌ها یک مقدار بدهند
+            return {actor_id: (count, round(average, 3)) for actor_id, count, average in cursor.fetchall()}
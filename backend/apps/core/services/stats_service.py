@@ -0,0 +1,277 @@
+import logging
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.db.models import Case, Count, Q, When
+
+from ..models import Meeting, Resolution
+from .access_policy import ResolutionAccessPolicy
+
+# وضعیت‌هایی که در صورت گذشتن مهلت، مصوبه عقب‌افتاده حساب می‌شود
+OVERDUE_STATUSES = ['notified', 'in_progress']
+
+# وضعیت‌های «در جریان» برای کارهای معوق کاربر
+OPEN_STATUSES = ['in_progress', 'notified', 'pending_ceo_approval', 'pending_secretary_approval']
+
+OPERATIONAL = Q(type='operational')
+
+# نسخه‌های کش آمار؛ با هر تغییر مرتبط یک واحد افزایش می‌یابند
+GLOBAL_VERSION_KEY = 'stats:version:global'
+USER_VERSION_KEY = 'stats:version:user'
+
+logger = logging.getLogger(__name__)
+
+
+def jalali_months(start, end):
+    """لیست ماه‌های شمسی (YYYYMM) از start تا end، شامل هر دو"""
+    months = []
+    year, month = divmod(start, 100)
+    while year * 100 + month <= end:
+        months.append(year * 100 + month)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _resolution_buckets(today):
+    """
+    تعریف همه شمارنده‌های آماری مصوبات به صورت شرط
+
+    هر شمارنده یک Count فیلترشده است و همه در یک SELECT محاسبه می‌شوند.
+    """
+    overdue = Q(deadline__lt=today, status__in=OVERDUE_STATUSES)
+    buckets = {
+        'total': Q(),
+        'operational': OPERATIONAL,
+        'informational': Q(type='informational'),
+        'overdue': overdue,
+        'overdue_operational': overdue & OPERATIONAL,
+        'pending_executor': Q(status='notified', executor_unit__isnull=False),
+    }
+    for value, _ in Resolution.STATUS_CHOICES:
+        buckets[value] = Q(status=value)
+        buckets[f'{value}_operational'] = Q(status=value) & OPERATIONAL
+    return buckets
+
+
+class StatsCache:
+    """
+    کش نسخه‌دار آمار
+
+    هر کلید شامل شماره نسخه است و باطل‌سازی فقط نسخه را افزایش می‌دهد، پس
+    مقدار قدیمی هرگز پس از تغییر خوانده نمی‌شود و نیازی به TTL کوتاه نیست.
+    بخش سراسری (مشترک همه کاربران) و بخش هر کاربر نسخه جداگانه دارند؛
+    آمار کاربر به هر دو نسخه وابسته است. تاریخ روز هم در کلید است چون
+    «عقب‌افتاده» با تغییر روز عوض می‌شود.
+    """
+
+    @staticmethod
+    def get_version(key):
+        version = cache.get(key)
+        if version is None:
+            # شروع از زمان فعلی تا پس از پاک شدن Redis نسخه‌های قدیمی تکرار نشوند
+            cache.add(key, time.time_ns(), None)
+            version = cache.get(key)
+        return version
+
+    @staticmethod
+    def bump(key):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+    @staticmethod
+    def invalidate(user_only=False):
+        """باطل کردن آمار سراسری و آمار کاربران (یا فقط آمار کاربران)"""
+        try:
+            if not user_only:
+                StatsCache.bump(GLOBAL_VERSION_KEY)
+            StatsCache.bump(USER_VERSION_KEY)
+        except Exception as e:
+            logger.error(f"Error invalidating stats cache: {e}")
+
+    @staticmethod
+    def get_or_compute(name, builder, user=None):
+        """
+        خواندن آمار از کش یا محاسبه و ذخیره آن
+
+        Args:
+            name: نام آمار
+            builder: تابع محاسبه مقدار
+            user: برای آمار وابسته به کاربر
+        """
+        try:
+            parts = ['stats', name, date.today().isoformat(), str(StatsCache.get_version(GLOBAL_VERSION_KEY))]
+            if user is not None:
+                parts += [str(StatsCache.get_version(USER_VERSION_KEY)), str(user.id)]
+            key = ':'.join(parts)
+            value = cache.get(key)
+        except Exception as e:
+            # در صورت در دسترس نبودن Redis، آمار مستقیماً محاسبه می‌شود
+            logger.error(f"Stats cache unavailable: {e}")
+            return builder()
+
+        if value is None:
+            value = builder()
+            try:
+                cache.set(key, value, settings.STATS_CACHE_TIMEOUT)
+            except Exception as e:
+                logger.error(f"Error writing stats cache: {e}")
+        return value
+
+
+class ResolutionStatsService:
+    """موتور آمار داشبوردها: شمارش همه دسته‌ها با تعداد ثابت کوئری"""
+
+    @staticmethod
+    def resolution_counts(today=None):
+        """
+        شمارش مصوبات به تفکیک وضعیت، نوع و عقب‌افتادگی در یک کوئری
+
+        Returns:
+            dict: کلیدهای total، operational، informational، overdue،
+            overdue_operational، pending_executor، active_executors و برای هر
+            وضعیت `<status>` و `<status>_operational`
+        """
+        today = today or date.today()
+        aggregates = {
+            name: Count('id', filter=condition) if condition else Count('id')
+            for name, condition in _resolution_buckets(today).items()
+        }
+        # تعداد واحدهایی که حداقل یک مصوبه دارند (COUNT DISTINCT مقادیر null را نمی‌شمارد)
+        aggregates['active_executors'] = Count('executor_unit', distinct=True)
+        return Resolution.objects.aggregate(**aggregates)
+
+    @staticmethod
+    def meeting_counts(today=None):
+        """تعداد کل جلسات و جلسات ۳۰ روز اخیر در یک کوئری"""
+        today = today or date.today()
+        return Meeting.objects.aggregate(
+            total_meetings=Count('id'),
+            recent_meetings=Count('id', filter=Q(held_at__gte=today - timedelta(days=30))),
+        )
+
+    @staticmethod
+    def user_counts(user):
+        """شمارنده‌های وابسته به کاربر (کارهای معوق)، از کش"""
+        return StatsCache.get_or_compute(
+            'user_counts', lambda: ResolutionStatsService.compute_user_counts(user), user=user
+        )
+
+    @staticmethod
+    def compute_user_counts(user):
+        """شمارنده‌های وابسته به کاربر (کارهای معوق) در یک کوئری"""
+        policy = ResolutionAccessPolicy(user)
+        members = policy.member_q(('executor', 'coworkers', 'inform_units', 'participants'))
+        return Resolution.objects.aggregate(
+            pending_tasks_executor=Count('id', filter=Q(status='notified', executor_unit=user)),
+            my_pending_tasks=Count('id', filter=members & Q(status__in=OPEN_STATUSES)),
+        )
+
+    @staticmethod
+    def global_stats():
+        """آمار مشترک همه کاربران (مصوبات و جلسات)، از کش"""
+        return StatsCache.get_or_compute('global', ResolutionStatsService.compute_global_stats)
+
+    @staticmethod
+    def compute_global_stats(today=None):
+        stats = ResolutionStatsService.resolution_counts(today)
+        stats.update(ResolutionStatsService.meeting_counts(today))
+        return stats
+
+    @staticmethod
+    def unit_breakdown(limit=10):
+        """آمار مصوبات به تفکیک واحد مجری (فقط واحدهای برتر)"""
+        unit_stats = Resolution.objects.values(
+            'executor_unit__first_name',
+            'executor_unit__last_name',
+            'executor_unit__username'
+        ).annotate(
+            total_count=Count('id'),
+            completed_count=Count(Case(When(status='completed', then=1))),
+            notified_count=Count(Case(When(status='notified', then=1))),
+            pending_count=Count(Case(When(status='in_progress', then=1))),
+            returned_count=Count(Case(When(status='returned_to_secretary', then=1))),
+            cancelled_count=Count(Case(When(status='cancelled', then=1)))
+        ).filter(executor_unit__isnull=False).order_by('-total_count')[:limit]
+
+        data = []
+        for stat in unit_stats:
+            unit_name = f"{stat['executor_unit__first_name']} {stat['executor_unit__last_name']}".strip()
+            if not unit_name:
+                unit_name = stat['executor_unit__username']
+            data.append({
+                'unit_name': unit_name,
+                'total_count': stat['total_count'],
+                'completed_count': stat['completed_count'],
+                'notified_count': stat['notified_count'],
+                'pending_count': stat['pending_count'],
+                'returned_count': stat['returned_count'],
+                'cancelled_count': stat['cancelled_count'],
+            })
+        return data
+
+    @staticmethod
+    def deputy_notified_counts():
+        """تعداد مصوبات در حال ابلاغ هر معاون در یک کوئری"""
+        deputies = User.objects.filter(profile__position='deputy').annotate(
+            notified_count=Count('executed_resolutions', filter=Q(executed_resolutions__status='notified'))
+        ).order_by('profile__id')
+        return [
+            {
+                'unit_name': deputy.get_full_name() or deputy.username,
+                'notified_count': deputy.notified_count,
+            }
+            for deputy in deputies
+        ]
+
+    @staticmethod
+    def heatmap(start, end):
+        """نقشه حرارتی مصوبات هر واحد مجری در هر ماه شمسی (کش‌شده)"""
+        return StatsCache.get_or_compute(
+            f'heatmap:{start}:{end}', lambda: ResolutionStatsService.compute_heatmap(start, end)
+        )
+
+    @staticmethod
+    def compute_heatmap(start, end):
+        """
+        شمارش مصوبات به تفکیک واحد مجری و ماه شمسی جلسه در یک GROUP BY
+
+        Args:
+            start: اولین ماه (YYYYMM)
+            end: آخرین ماه (YYYYMM)
+        """
+        months = jalali_months(start, end)
+        rows = Resolution.objects.filter(
+            executor_unit__isnull=False,
+            meeting__jalali_month__gte=start,
+            meeting__jalali_month__lte=end,
+        ).values(
+            'executor_unit',
+            'executor_unit__first_name',
+            'executor_unit__last_name',
+            'executor_unit__username',
+            'meeting__jalali_month',
+        ).annotate(count=Count('id')).order_by('executor_unit')
+
+        column = {month: index for index, month in enumerate(months)}
+        units = []
+        data = []
+        unit_rows = {}
+        for row in rows:
+            unit_id = row['executor_unit']
+            if unit_id not in unit_rows:
+                unit_name = f"{row['executor_unit__first_name']} {row['executor_unit__last_name']}".strip()
+                units.append(unit_name or row['executor_unit__username'])
+                unit_rows[unit_id] = [0] * len(months)
+                data.append(unit_rows[unit_id])
+            unit_rows[unit_id][column[row['meeting__jalali_month']]] += row['count']
+
+        return {
+            'months': [f"{month // 100}-{month % 100:02d}" for month in months],
+            'units': units,
+            'data': data,
+        }
@@ -0,0 +1,165 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenBackendError, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.state import token_backend
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from ..models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+# فیلدهای کاربر و profile که در Redis نگه داشته می‌شوند (بدون رمز)
+USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'email', 'is_active', 'is_staff', 'is_superuser')
+PROFILE_FIELDS = ('id', 'user', 'supervisor', 'position', 'department', 'email_delivery')
+
+
+def _from_fields(model, data):
+    # سایر فیلدها deferred می‌مانند؛ save() فقط فیلدهای بارگذاری‌شده را می‌نویسد
+    field_names = [field.attname for field in model._meta.concrete_fields if field.attname in data]
+    return model.from_db(DEFAULT_DB_ALIAS, field_names, [data[name] for name in field_names])
+
+
+class TokenCache:
+    """
+    کش توکن‌های JWT و کاربران احراز هویت‌شده
+
+    payload هر توکن پس از بررسی با token_backend در یک LRU حافظه همین پردازه
+    (کلید jti) نگه داشته می‌شود؛ چون خود رشته توکن هم ذخیره و مقایسه می‌شود، توکن
+    جعلی با jti تکراری از امضا عبور نمی‌کند. انقضا و نوع توکن در هر استفاده
+    (CachedAccessToken) بررسی می‌شوند. فیلدهای لازم کاربر و profile (بدون رمز)
+    در Redis نگه داشته و با ذخیره یا حذف User و UserProfile پاک می‌شوند (signals).
+    """
+
+    # {jti: (token, payload)}
+    _claims = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def user_key(user_id):
+        return f'auth:user:{user_id}'
+
+    @classmethod
+    def payload(cls, token):
+        """
+        payload توکن بررسی‌شده با token_backend (برای هر jti یک بار)
+
+        Raises:
+            TokenBackendError: امضا، ساختار یا انقضای نامعتبر در اولین بررسی
+        """
+        if isinstance(token, bytes):
+            token = token.decode()
+        try:
+            jti = token_backend.decode(token, verify=False).get(api_settings.JTI_CLAIM)
+        except TokenBackendError:
+            jti = None
+        if jti:
+            with cls._lock:
+                entry = cls._claims.get(jti)
+                if entry and entry[0] == token:
+                    cls._claims.move_to_end(jti)
+                    return entry[1]
+
+        payload = token_backend.decode(token, verify=True)
+        if jti:
+            with cls._lock:
+                cls._claims[jti] = (token, payload)
+                cls._claims.move_to_end(jti)
+                while len(cls._claims) > settings.JWT_CLAIMS_CACHE_SIZE:
+                    cls._claims.popitem(last=False)
+        return payload
+
+    @staticmethod
+    def snapshots(queryset):
+        """
+        فیلدهای لازم کاربران queryset و profile آن‌ها (بدون رمز، قابل نگهداری در Redis)
+
+        Returns:
+            list: [{'user': {...}, 'profile': {...} یا None}] به ترتیب queryset
+        """
+        rows = queryset.values(*USER_FIELDS, *(f'profile__{name}' for name in PROFILE_FIELDS))
+        snapshots = []
+        for row in rows:
+            profile = {UserProfile._meta.get_field(name).attname: row[f'profile__{name}'] for name in PROFILE_FIELDS}
+            snapshots.append({
+                'user': {name: row[name] for name in USER_FIELDS},
+                'profile': profile if profile['id'] is not None else None,
+            })
+        return snapshots
+
+    @classmethod
+    def load_user(cls, user_id):
+        """snapshot کاربر (snapshots را ببینید) یا None اگر کاربر وجود نداشته باشد"""
+        snapshots = cls.snapshots(User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}))
+        return snapshots[0] if snapshots else None
+
+    @staticmethod
+    def build_user(data):
+        user = _from_fields(User, data['user'])
+        if data['profile'] is not None:
+            user.profile = _from_fields(UserProfile, data['profile'])
+        return user
+
+    @classmethod
+    def user(cls, user_id):
+        """کاربر با شناسه user_id (یا None)؛ در حالت معمول بدون کوئری"""
+        key = cls.user_key(user_id)
+        try:
+            data = cache.get(key)
+        except Exception as e:
+            # در صورت در دسترس نبودن Redis مستقیماً از دیتابیس خوانده می‌شود
+            logger.error(f"Auth user cache unavailable: {e}")
+            data = cls.load_user(user_id)
+        else:
+            if data is None:
+                data = cls.load_user(user_id)
+                if data is not None:
+                    try:
+                        cache.set(key, data, settings.AUTH_USER_CACHE_TIMEOUT)
+                    except Exception as e:
+                        logger.error(f"Error writing auth user cache: {e}")
+        return cls.build_user(data) if data is not None else None
+
+    @classmethod
+    def invalidate_user(cls, user_id):
+        cls.invalidate_users([user_id])
+
+    @classmethod
+    def invalidate_users(cls, user_ids):
+        if not user_ids:
+            return
+        try:
+            cache.delete_many([cls.user_key(user_id) for user_id in user_ids])
+        except Exception as e:
+            logger.error(f"Error invalidating auth user cache: {e}")
+
+
+class CachedAccessToken(AccessToken):
+    """
+    AccessToken با payload کش‌شده TokenCache
+
+    امضا برای هر jti یک بار بررسی می‌شود؛ انقضا، jti و نوع توکن (verify) در
+    هر ساخت دوباره بررسی می‌شوند.
+
+    Raises:
+        TokenError: توکن نامعتبر، منقضی یا از نوع دیگر
+    """
+
+    def __init__(self, token):
+        if isinstance(token, bytes):
+            token = token.decode()
+        self.token = token
+        self.current_time = aware_utcnow()
+        try:
+            self.payload = dict(TokenCache.payload(token))
+        except TokenBackendError:
+            raise TokenError(_('Token is invalid or expired'))
+        self.verify()
@@ -0,0 +1,140 @@
+import logging
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count
+
+from ..models import Notification
+from .presence import Presence
+from .websocket_service import send_unread_counts
+
+logger = logging.getLogger(__name__)
+
+
+class UnreadCounter:
+    """
+    شمارنده نوتیفیکیشن‌های خوانده‌نشده هر کاربر در Redis
+
+    مقدار هر کاربر با incr/decr به‌روز می‌شود و خواندن آن بدون کوئری است.
+    اگر کلید وجود نداشته باشد (اولین خواندن یا پاک شدن Redis) تغییرات نادیده
+    گرفته می‌شوند و خواندن بعدی مقدار را از جدول می‌سازد. اختلاف‌های احتمالی
+    (مثلاً تغییر هم‌زمان با ساختن کلید) با reconcile دوره‌ای برطرف می‌شوند.
+    """
+
+    @staticmethod
+    def key(user_id):
+        return f'notifications:unread:{user_id}'
+
+    @staticmethod
+    def count_from_db(user_ids):
+        rows = (
+            Notification.objects.filter(recipient_id__in=user_ids, read=False)
+            .values('recipient_id')
+            .annotate(count=Count('id'))
+        )
+        counts = {user_id: 0 for user_id in user_ids}
+        counts.update({row['recipient_id']: row['count'] for row in rows})
+        return counts
+
+    @staticmethod
+    def get_many(user_ids):
+        """
+        تعداد خوانده‌نشده چند کاربر
+
+        Returns:
+            dict: {user_id: count}
+        """
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return {}
+        try:
+            cached = cache.get_many([UnreadCounter.key(user_id) for user_id in user_ids])
+        except Exception as e:
+            logger.error(f"Unread counter unavailable: {e}")
+            return UnreadCounter.count_from_db(user_ids)
+
+        counts = {}
+        missing = []
+        for user_id in user_ids:
+            value = cached.get(UnreadCounter.key(user_id))
+            if value is None:
+                missing.append(user_id)
+            else:
+                counts[user_id] = value
+        if missing:
+            for user_id, count in UnreadCounter.count_from_db(missing).items():
+                counts[user_id] = count
+                try:
+                    cache.add(UnreadCounter.key(user_id), count, None)
+                except Exception as e:
+                    logger.error(f"Error writing unread counter: {e}")
+        return counts
+
+    @staticmethod
+    def get(user_id):
+        return UnreadCounter.get_many([user_id])[user_id]
+
+    @staticmethod
+    def change(deltas):
+        """
+        اعمال تغییرات شمارنده
+
+        Args:
+            deltas: {user_id: تغییر} (مثبت برای نوتیفیکیشن جدید، منفی برای خوانده شدن)
+        """
+        for user_id, delta in deltas.items():
+            if not delta:
+                continue
+            key = UnreadCounter.key(user_id)
+            try:
+                value = cache.incr(key, delta)
+                if value < 0:
+                    cache.delete(key)
+            except ValueError:
+                # کلید ساخته نشده؛ خواندن بعدی از جدول محاسبه می‌کند
+                continue
+            except Exception as e:
+                logger.error(f"Error updating unread counter: {e}")
+
+    @staticmethod
+    def increment(user_ids):
+        UnreadCounter.change(Counter(user_ids))
+
+    @staticmethod
+    def discount(queryset):
+        """کم کردن نوتیفیکیشن‌های خوانده‌نشده این queryset (پیش از حذف یا خواندن) از شمارنده"""
+        rows = queryset.filter(read=False).values('recipient_id').annotate(count=Count('id'))
+        deltas = {row['recipient_id']: -row['count'] for row in rows}
+        UnreadCounter.change(deltas)
+        return deltas
+
+    @staticmethod
+    def reset(user_id):
+        try:
+            cache.delete(UnreadCounter.key(user_id))
+        except Exception as e:
+            logger.error(f"Error resetting unread counter: {e}")
+
+    @staticmethod
+    def push(user_ids):
+        """ارسال تعداد جدید به گروه notifications_{user_id} کاربران آنلاین؛ خطا فقط لاگ می‌شود"""
+        try:
+            send_unread_counts(UnreadCounter.get_many(Presence.online_user_ids(user_ids)))
+        except Exception as e:
+            logger.error(f"Error pushing unread counts: {e}")
+
+    @staticmethod
+    def reconcile(batch_size=1000):
+        """
+        بازسازی شمارنده همه کاربران از جدول
+
+        Returns:
+            int: تعداد کاربران
+        """
+        user_ids = list(User.objects.order_by('id').values_list('id', flat=True))
+        for start in range(0, len(user_ids), batch_size):
+            counts = UnreadCounter.count_from_db(user_ids[start:start + batch_size])
+            cache.set_many({UnreadCounter.key(user_id): count for user_id, count in counts.items()}, None)
+        logger.info(f"Reconciled unread counters for {len(user_ids)} users")
+        return len(user_ids)
@@ -1,112 +1,207 @@
 from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from django.contrib.auth.models import User
-import json
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+import asyncio
+import hashlib
+import base64
+import logging
 import time
 
+from .event_stream import EventStream
+
+logger = logging.getLogger(__name__)
+
+
+def _resolution_payload(resolution):
+    return {
+        'id': str(resolution.id),
+        'clause': resolution.clause,
+        'subclause': resolution.subclause,
+        'meeting': {
+            'number': resolution.meeting.number
+        }
+    }
+
+
+def chat_group_name(resolution_id):
+    """نام گروه چت مصوبه (همان کدگذاری سمت frontend)"""
+    try:
+        # اگر شناسه base64 باشد، مقدار decode‌شده هش می‌شود
+        decoded = base64.b64decode(resolution_id + '==').decode('utf-8')
+        hash_object = hashlib.md5(decoded.encode())
+    except Exception:
+        hash_object = hashlib.md5(resolution_id.encode())
+    return f"chat_resolution_{hash_object.hexdigest()}"
+
+
+async def _send_events(events, channel_layer=None):
+    channel_layer = channel_layer or get_channel_layer()
+    semaphore = asyncio.Semaphore(settings.WEBSOCKET_DISPATCH_CONCURRENCY)
+
+    async def send(group_name, event):
+        async with semaphore:
+            await channel_layer.group_send(group_name, event)
+
+    await asyncio.gather(*(send(group_name, event) for group_name, event in events))
+
+
+async def adispatch_events(events, channel_layer=None):
+    """
+    ارسال دسته‌ای رویدادها به گروه‌های WebSocket (نسخه awaitable)
+
+    رویدادهای گروه کاربران و چت مصوبات پیش از ارسال در EventStream ثبت می‌شوند
+    تا پس از اتصال مجدد قابل replay باشند. همه group_send ها هم‌زمان (حداکثر
+    WEBSOCKET_DISPATCH_CONCURRENCY تا در هر لحظه) روی اتصال‌های Redis ارسال می‌شوند.
+
+    Args:
+        events: لیست (group_name, event)
+        channel_layer: پیش‌فرض get_channel_layer()
+    """
+    events = list(events)
+    if not events:
+        return
+    await sync_to_async(EventStream.record)(events)
+    await _send_events(events, channel_layer)
+
+
+def dispatch_events(events, channel_layer=None, offline_groups=()):
+    """
+    ارسال دسته‌ای رویدادها از کد هم‌زمان با یک بار ورود به event loop
+
+    رویدادهای offline_groups فقط در EventStream ثبت و ارسال نمی‌شوند تا پس از
+    اتصال مجدد replay شوند. خطای ارسال به فراخواننده می‌رسد.
+    """
+    events = list(events)
+    if not events:
+        return
+    EventStream.record(events)
+    if offline_groups:
+        events = [(group_name, event) for group_name, event in events if group_name not in offline_groups]
+    if events:
+        async_to_sync(_send_events)(events, channel_layer)
+
+
+def send_websocket_notifications(notifications, unread_counts=None, online_user_ids=None):
+    """
+    ارسال دسته‌ای نوتیفیکیشن‌های ذخیره‌شده از طریق WebSocket
+
+    به جای یک async_to_sync برای هر گیرنده، همه پیام‌ها با هم ارسال می‌شوند.
+    خطای ارسال به فراخواننده می‌رسد تا task تحویل دوباره تلاش کند.
+
+    Args:
+        notifications: لیست نوتیفیکیشن‌ها (Notification)
+        unread_counts: تعداد خوانده‌نشده هر گیرنده {user_id: count} (اختیاری)
+        online_user_ids: در صورت تعیین، برای سایر گیرندگان فقط رویداد در EventStream ثبت می‌شود
+    """
+    if not notifications:
+        return
+    resolution_payloads = {}
+    messages = []
+    for notification in notifications:
+        data = {
+            'type': 'notification_message',
+            'message': notification.message,
+            'notification_id': str(notification.id),
+            'notification_type': notification.notification_type
+        }
+        if notification.resolution_id:
+            if notification.resolution_id not in resolution_payloads:
+                resolution_payloads[notification.resolution_id] = _resolution_payload(notification.resolution)
+            data['resolution'] = resolution_payloads[notification.resolution_id]
+        if unread_counts and notification.recipient_id in unread_counts:
+            data['unread_count'] = unread_counts[notification.recipient_id]
+        messages.append((f"notifications_{notification.recipient_id}", data))
+
+    offline_groups = ()
+    if online_user_ids is not None:
+        offline_groups = {
+            f"notifications_{notification.recipient_id}" for notification in notifications
+            if notification.recipient_id not in online_user_ids
+        }
+    dispatch_events(messages, offline_groups=offline_groups)
+
+
+def send_unread_counts(unread_counts):
+    """
+    ارسال تعداد نوتیفیکیشن‌های خوانده‌نشده به گروه notifications_{user_id} هر کاربر
+
+    Args:
+        unread_counts: {user_id: count}
+    """
+    if not unread_counts:
+        return
+    dispatch_events(
+        (f"notifications_{user_id}", {'type': 'unread_count', 'count': count})
+        for user_id, count in unread_counts.items()
+    )
+
 
 def send_websocket_notification(user, message, resolution=None, notification_type='info'):
     """
     ارسال نوتیفیکیشن از طریق WebSocket به کاربر خاص
-    
+
     Args:
         user: کاربر دریافت‌کننده
         message: پیام نوتیفیکیشن
-        resolution: مصوبه مرتبط (اختیاری)
+        resolution: مصوبه مرتبط (اختیاری؛ بهتر است meeting با select_related بارگذاری شده باشد)
         notification_type: نوع نوتیفیکیشن
     """
     try:
-        channel_layer = get_channel_layer()
-        
-        # ایجاد notification_id یکتا
-        notification_id = f"{user.id}_{int(time.time())}"
-        
-        # ایجاد پیام WebSocket
         notification_data = {
             'type': 'notification_message',
             'message': message,
-            'notification_id': notification_id,
+            # ایجاد notification_id یکتا
+            'notification_id': f"{user.id}_{int(time.time())}",
             'notification_type': notification_type
         }
-        
-        # اضافه کردن اطلاعات مصوبه اگر موجود باشد
         if resolution:
-            notification_data['resolution'] = {
-                'id': str(resolution.id),
-                'clause': resolution.clause,
-                'subclause': resolution.subclause,
-                'meeting': {
-                    'number': resolution.meeting.number
-                }
-            }
-        
-        # ارسال به گروه کاربر
-        group_name = f"notifications_{user.id}"
-        print(f"Sending WebSocket notification to group {group_name}: {notification_data}")
-        
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            notification_data
-        )
-        
-        print(f"WebSocket notification sent to user {user.username}: {message}")
-        
+            notification_data['resolution'] = _resolution_payload(resolution)
+
+        dispatch_events([(f"notifications_{user.id}", notification_data)])
+        logger.debug(f"WebSocket notification sent to user {user.id}")
+
     except Exception as e:
-        print(f"Error sending WebSocket notification: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error(f"Error sending WebSocket notification: {e}")
 
 
 def send_notification_to_group(group_name, message, notification_type='info'):
     """
     ارسال نوتیفیکیشن به گروه خاص
-    
+
     Args:
         group_name: نام گروه
         message: پیام نوتیفیکیشن
         notification_type: نوع نوتیفیکیشن
     """
     try:
-        channel_layer = get_channel_layer()
-        
-        async_to_sync(channel_layer.group_send)(
-            group_name,
-            {
-                'type': 'notification_message',
-                'message': message,
-                'notification_id': f"group_{int(time.time())}",
-                'notification_type': notification_type
-            }
-        )
-        
-        print(f"WebSocket notification sent to group {group_name}: {message}")
-        
+        dispatch_events([(group_name, {
+            'type': 'notification_message',
+            'message': message,
+            'notification_id': f"group_{int(time.time())}",
+            'notification_type': notification_type
+        })])
+        logger.debug(f"WebSocket notification sent to group {group_name}")
+
     except Exception as e:
-        print(f"Error sending WebSocket notification to group: {e}")
+        logger.error(f"Error sending WebSocket notification to group: {e}")
 
 
 def send_notification_to_all_users(message, notification_type='info'):
     """
     ارسال نوتیفیکیشن به همه کاربران متصل
-    
+
     Args:
         message: پیام نوتیفیکیشن
         notification_type: نوع نوتیفیکیشن
     """
     try:
-        channel_layer = get_channel_layer()
-        
-        async_to_sync(channel_layer.group_send)(
-            "all_users",
-            {
-                'type': 'notification_message',
-                'message': message,
-                'notification_id': f"broadcast_{int(time.time())}",
-                'notification_type': notification_type
-            }
-        )
-        
-        print(f"Broadcast WebSocket notification sent: {message}")
-        
+        dispatch_events([("all_users", {
+            'type': 'notification_message',
+            'message': message,
+            'notification_id': f"broadcast_{int(time.time())}",
+            'notification_type': notification_type
+        })])
+        logger.debug("Broadcast WebSocket notification sent")
+
     except Exception as e:
-        print(f"Error sending broadcast WebSocket notification: {e}") 
\ No newline at end of file
+        logger.error(f"Error sending broadcast WebSocket notification: {e}")
@@ -0,0 +1,105 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Meeting, Resolution, ResolutionAction, UserProfile
+from .services.role_directory import RoleDirectory
+from .services.stage_interval_service import StageIntervalService
+from .services.stats_service import StatsCache
+from .services.token_cache import TokenCache
+
+# فیلدهایی که تغییرشان آمار داشبوردها را عوض می‌کند
+STATS_FIELDS = ('status', 'executor_unit_id', 'deadline', 'type')
+
+
+def _invalidate_stats_on_commit(user_only=False):
+    # پس از commit، تا خواننده‌ای داده قبل از commit را با نسخه جدید کش نکند
+    transaction.on_commit(lambda: StatsCache.invalidate(user_only=user_only))
+
+
+def _stats_snapshot(instance):
+    return tuple(instance.__dict__.get(field) for field in STATS_FIELDS)
+
+
+@receiver(post_init, sender=Resolution)
+def remember_resolution_stats_fields(sender, instance, **kwargs):
+    instance._stats_snapshot = _stats_snapshot(instance)
+
+
+@receiver(post_save, sender=Resolution)
+def open_initial_stage_interval(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        StageIntervalService.open_initial(instance)
+
+
+@receiver(post_save, sender=ResolutionAction)
+def record_stage_interval(sender, instance, created, **kwargs):
+    # بازه‌های مراحل در همان تراکنش ثبت اکشن به‌روز می‌شوند
+    if created and not kwargs.get('raw'):
+        StageIntervalService.record_action(instance)
+
+
+@receiver(post_save, sender=Resolution)
+def invalidate_stats_on_resolution_save(sender, instance, created, **kwargs):
+    snapshot = _stats_snapshot(instance)
+    if created or snapshot != getattr(instance, '_stats_snapshot', None):
+        _invalidate_stats_on_commit()
+    instance._stats_snapshot = snapshot
+
+
+@receiver(post_delete, sender=Resolution)
+@receiver(post_save, sender=Meeting)
+@receiver(post_delete, sender=Meeting)
+@receiver(post_save, sender=UserProfile)
+def invalidate_stats(sender, **kwargs):
+    _invalidate_stats_on_commit()
+
+
+def invalidate_user_stats_on_membership_change(sender, action, **kwargs):
+    # عضویت (همکار، اطلاع‌رسانی، شرکت‌کننده) فقط آمار هر کاربر را تغییر می‌دهد
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate_stats_on_commit(user_only=True)
+
+
+for field in ('coworkers', 'inform_units', 'participants'):
+    m2m_changed.connect(
+        invalidate_user_stats_on_membership_change,
+        sender=getattr(Resolution, field).through,
+        dispatch_uid=f'stats_membership_{field}',
+    )
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_role_directory(sender, **kwargs):
+    # همین حالا برای این پردازه و دوباره پس از commit برای سایر پردازه‌ها
+    RoleDirectory.invalidate()
+    transaction.on_commit(RoleDirectory.invalidate)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_role_directory_on_user_change(sender, **kwargs):
+    # ثبت last_login در هر ورود فهرست را باطل نمی‌کند
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    invalidate_role_directory(sender, **kwargs)
+
+
+def _invalidate_auth_user(user_id):
+    TokenCache.invalidate_user(user_id)
+    transaction.on_commit(lambda: TokenCache.invalidate_user(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user(sender, instance, **kwargs):
+    _invalidate_auth_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_auth_user_on_profile_change(sender, instance, **kwargs):
+    _invalidate_auth_user(instance.user_id)
@@ -1,8 +1,80 @@
 from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
+import logging
 from .models import Resolution, Notification
+from .services.ldap_sync import LDAPDirectorySync
+from .services.notification_retention import NotificationRetention
 from .services.notification_service import NotificationService
+from .services.unread_counter import UnreadCounter
+
+logger = logging.getLogger(__name__)
+
+# تلاش مجدد تحویل نوتیفیکیشن: 10، 20، 40، ... ثانیه (حداکثر 10 دقیقه)
+DELIVERY_MAX_RETRIES = 5
+DELIVERY_RETRY_BASE = 10
+DELIVERY_RETRY_MAX = 600
+
+
+def _retry_countdown(task):
+    return min(DELIVERY_RETRY_BASE * 2 ** task.request.retries, DELIVERY_RETRY_MAX)
+
+
+def _load_notifications(notification_ids):
+    return list(
+        Notification.objects.filter(id__in=notification_ids)
+        .select_related('recipient__profile', 'resolution__meeting')
+        .order_by('sent_at')
+    )
+
+
+@shared_task(bind=True, max_retries=DELIVERY_MAX_RETRIES)
+def deliver_realtime_notifications(self, notification_ids):
+    """ارسال دسته‌ای WebSocket نوتیفیکیشن‌ها"""
+    notifications = _load_notifications(notification_ids)
+    try:
+        NotificationService.deliver_realtime(notifications)
+    except Exception as exc:
+        logger.warning(f"Realtime delivery failed for {len(notifications)} notifications: {exc}")
+        raise self.retry(exc=exc, countdown=_retry_countdown(self))
+    NotificationService.deliver_browser(notifications)
+
+
+@shared_task(bind=True, max_retries=DELIVERY_MAX_RETRIES)
+def deliver_email_notifications(self, notification_ids):
+    """ارسال ایمیل نوتیفیکیشن‌ها با یک اتصال SMTP؛ فقط موارد ناموفق دوباره تلاش می‌شوند"""
+    notifications = _load_notifications(notification_ids)
+    try:
+        failed = NotificationService.deliver_emails(notifications)
+    except Exception as exc:
+        # اتصال به SMTP برقرار نشد؛ کل دسته دوباره تلاش می‌شود
+        logger.warning(f"SMTP connection failed: {exc}")
+        raise self.retry(exc=exc, countdown=_retry_countdown(self))
+    if failed:
+        raise self.retry(args=[failed], countdown=_retry_countdown(self))
+
+@shared_task
+def send_notification_digests():
+    """ارسال ایمیل‌های خلاصه نوتیفیکیشن در پایان هر دوره NOTIFICATION_DIGEST_WINDOW"""
+    return NotificationService.send_email_digests()
+
+@shared_task
+def reconcile_unread_counters():
+    """همگام‌سازی شمارنده‌های خوانده‌نشده Redis با جدول نوتیفیکیشن‌ها"""
+    return UnreadCounter.reconcile()
+
+@shared_task(bind=True)
+def cleanup_old_notifications(self):
+    """پاکسازی دسته‌ای نوتیفیکیشن‌های قدیمی؛ پیشرفت در وضعیت task گزارش می‌شود"""
+    progress = None
+    if self.request.id:
+        progress = lambda metrics: self.update_state(state='PROGRESS', meta=dict(metrics))
+    return NotificationRetention.run(progress=progress)
+
+@shared_task
+def sync_ldap_directory():
+    """همگام‌سازی کاربران و گروه‌های LDAP (فقط تفاوت‌ها)"""
+    return LDAPDirectorySync.run()
 
 @shared_task
 def check_resolution_status():
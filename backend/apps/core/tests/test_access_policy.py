@@ -0,0 +1,54 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.core.models import Meeting, Resolution, UserProfile
+from apps.core.services.access_policy import ResolutionAccessPolicy
+
+
+class ResolutionAccessPolicyTests(TestCase):
+    def create_user(self, username, position='employee'):
+        user = User.objects.create_user(username=username, password='pass12345')
+        UserProfile.objects.create(user=user, position=position)
+        return user
+
+    def setUp(self):
+        self.secretary = self.create_user('secretary', 'secretary')
+        self.auditor = self.create_user('auditor', 'auditor')
+        self.executor = self.create_user('deputy', 'deputy')
+        self.coworker = self.create_user('coworker', 'manager')
+        self.outsider = self.create_user('outsider', 'employee')
+        meeting = Meeting.objects.create(number=1, held_at=date(2024, 1, 1))
+        self.resolution = Resolution.objects.create(
+            meeting=meeting, clause='1', subclause='1', description='مصوبه',
+            type='operational', status='notified',
+            executor_unit=self.executor, created_by=self.secretary,
+        )
+        self.resolution.coworkers.add(self.coworker)
+
+    def test_view(self):
+        for user in [self.secretary, self.auditor, self.executor, self.coworker]:
+            self.assertTrue(ResolutionAccessPolicy(user).can_view(self.resolution), user.username)
+        self.assertFalse(ResolutionAccessPolicy(self.outsider).can_view(self.resolution))
+
+    def test_viewable_queryset_matches_single_check(self):
+        for user in [self.secretary, self.coworker, self.outsider]:
+            policy = ResolutionAccessPolicy(user)
+            self.assertEqual(policy.viewable().exists(), policy.can_view(self.resolution))
+
+    def test_chat_depends_on_status(self):
+        # پیش از قبول فقط دبیر، مجری و ناظر
+        self.assertTrue(ResolutionAccessPolicy(self.secretary).can_chat(self.resolution))
+        self.assertFalse(ResolutionAccessPolicy(self.coworker).can_chat(self.resolution))
+
+        self.resolution.status = 'in_progress'
+        self.resolution.save()
+        self.assertFalse(ResolutionAccessPolicy(self.secretary).can_chat(self.resolution))
+        self.assertTrue(ResolutionAccessPolicy(self.coworker).can_chat(self.resolution))
+        self.assertTrue(ResolutionAccessPolicy(self.auditor).can_chat(self.resolution))
+        self.assertFalse(ResolutionAccessPolicy(self.outsider).can_chat(self.resolution))
+
+    def test_refer(self):
+        self.assertTrue(ResolutionAccessPolicy(self.coworker).can_refer(self.resolution))
+        self.assertFalse(ResolutionAccessPolicy(self.secretary).can_refer(self.resolution))
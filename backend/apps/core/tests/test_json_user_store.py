@@ -0,0 +1,63 @@
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.core.auth import LDAPBackend
+from apps.core.services.json_user_store import JSONUserStore
+
+
+class JSONUserStoreTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'ldap_users.json')
+        self.write([{
+            'username': 'reza', 'password': 'secret', 'first_name': 'رضا', 'email': 'reza@tse.ir',
+            'groups': ['staff'], 'position': 'auditor', 'department': 'IT',
+        }])
+        override = override_settings(LDAP_USERS_FILE=self.path)
+        override.enable()
+        self.addCleanup(override.disable)
+        JSONUserStore._signature = None
+
+    def write(self, users, mtime=None):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'users': users}, f, ensure_ascii=False)
+        if mtime:
+            os.utime(self.path, ns=(mtime, mtime))
+
+    def test_file_is_parsed_once_and_reloaded_on_change(self):
+        with mock.patch('apps.core.services.json_user_store.json.load', wraps=json.load) as load:
+            self.assertEqual(JSONUserStore.get('reza')['first_name'], 'رضا')
+            self.assertIsNone(JSONUserStore.get('missing'))
+            self.assertEqual(load.call_count, 1)
+
+            self.write([{'username': 'sara', 'password': 'pw'}], mtime=10 ** 18)
+            self.assertIsNone(JSONUserStore.get('reza'))
+            self.assertIsNotNone(JSONUserStore.get('sara'))
+            self.assertEqual(load.call_count, 2)
+
+    def test_command_hashes_plaintext_passwords(self):
+        call_command('hash_ldap_users_passwords', stdout=io.StringIO())
+        with open(self.path, encoding='utf-8') as f:
+            entry = json.load(f)['users'][0]
+        self.assertNotIn('password', entry)
+        self.assertTrue(JSONUserStore.check_password(entry, 'secret'))
+        self.assertFalse(JSONUserStore.check_password(entry, 'wrong'))
+        self.assertEqual(entry['first_name'], 'رضا')
+
+    def test_fallback_login_writes_only_changes(self):
+        backend = LDAPBackend()
+        self.assertIsNone(backend._fallback_to_json('reza', 'wrong'))
+        user = backend._fallback_to_json('reza', 'secret')
+        self.assertEqual((user.profile.position, user.profile.department), ('auditor', 'IT'))
+        self.assertEqual(list(user.groups.values_list('name', flat=True)), ['staff'])
+
+        # ورود دوباره بدون تغییر فقط می‌خواند: کاربر، profile و گروه‌ها
+        with self.assertNumQueries(3):
+            backend._fallback_to_json('reza', 'secret')
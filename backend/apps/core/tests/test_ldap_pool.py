@@ -0,0 +1,47 @@
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase, override_settings
+
+try:
+    import ldap
+    from apps.core.services.ldap_pool import LDAPConnectionPool
+except ImportError:  # python-ldap اختیاری است
+    ldap = None
+
+
+@skipUnless(ldap, 'python-ldap is not installed')
+@override_settings(LDAP_NETWORK_TIMEOUT=1, LDAP_POOL_HEALTHCHECK_INTERVAL=60)
+class LDAPConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch('apps.core.services.ldap_pool.ldap.initialize', side_effect=lambda uri: mock.Mock())
+        self.initialize = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = LDAPConnectionPool('ldap://test', 'cn=admin', 'secret', size=2, timeout=0)
+
+    def test_service_bound_connection_is_reused(self):
+        with self.pool.connection() as conn:
+            conn.search_s('ou=people', 2, '(uid=a)')
+        with self.pool.connection() as again:
+            self.assertIs(again, conn)
+        self.assertEqual(self.initialize.call_count, 1)
+        conn.simple_bind_s.assert_called_once_with('cn=admin', 'secret')
+
+    def test_user_bind_rebinds_service_account_on_next_use(self):
+        with self.pool.connection() as conn:
+            pass
+        self.assertTrue(self.pool.check_credentials('uid=a,ou=people', 'pw'))
+        conn.simple_bind_s.side_effect = [ldap.INVALID_CREDENTIALS(), None]
+        self.assertFalse(self.pool.check_credentials('uid=a,ou=people', 'wrong'))
+        self.assertFalse(self.pool.check_credentials('uid=a,ou=people', ''))
+        with self.pool.connection():
+            pass
+        self.assertEqual(conn.simple_bind_s.call_args.args, ('cn=admin', 'secret'))
+        self.assertEqual(self.initialize.call_count, 1)
+
+    def test_dead_connections_are_replaced(self):
+        with self.pool.connection() as conn:
+            pass
+        conn.simple_bind_s.side_effect = ldap.SERVER_DOWN()
+        self.assertTrue(self.pool.check_credentials('uid=a,ou=people', 'pw'))
+        self.assertEqual(self.initialize.call_count, 2)
+        self.assertEqual(self.pool._created, 1)
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.core.models import UserProfile
+from apps.core.services.ldap_sync import LDAPDirectorySync
+
+
+def person(first_name, department=None):
+    return {'first_name': first_name, 'last_name': 'L', 'email': f'{first_name}@tse.ir', 'department': department}
+
+
+class LDAPDirectorySyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.existing = User.objects.create_user(username='ali', first_name='Ali', last_name='L', email='Ali@tse.ir')
+        UserProfile.objects.create(user=self.existing, position='ceo', department='IT')
+        self.manual = Group.objects.create(name='manual')
+        self.existing.groups.add(self.manual)
+
+    def test_only_differences_are_written(self):
+        people = {'ali': person('Ali', 'Finance'), 'sara': person('Sara')}
+        groups = {'staff': {'ali', 'sara'}, 'admins': set()}
+        stats = LDAPDirectorySync.apply(people, groups)
+
+        self.assertEqual(stats['users_created'], 1)
+        self.assertEqual(stats['users_updated'], 0)
+        self.assertEqual(stats['profiles_created'], 1)
+        self.assertEqual(stats['profiles_updated'], 1)
+        self.assertEqual(stats['memberships_added'], 2)
+        sara = User.objects.get(username='sara')
+        self.assertFalse(sara.has_usable_password())
+        self.assertEqual(sara.profile.position, 'employee')
+        self.existing.profile.refresh_from_db()
+        # سمت دستی حفظ می‌شود
+        self.assertEqual((self.existing.profile.position, self.existing.profile.department), ('ceo', 'Finance'))
+        self.assertEqual(set(self.existing.groups.values_list('name', flat=True)), {'manual', 'staff'})
+
+        # اجرای دوباره بدون تغییر چیزی نمی‌نویسد
+        self.assertFalse(any(LDAPDirectorySync.apply(people, groups).values()))
+
+    def test_removed_directory_members_leave_group(self):
+        LDAPDirectorySync.apply({'ali': person('Ali')}, {'staff': {'ali'}})
+        stats = LDAPDirectorySync.apply({'ali': person('Alireza')}, {'staff': set()})
+        self.assertEqual(stats['users_updated'], 1)
+        self.assertEqual(stats['memberships_removed'], 1)
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.first_name, 'Alireza')
+        self.assertEqual(list(self.existing.groups.values_list('name', flat=True)), ['manual'])
+
+    @override_settings(LDAP_SYNC_BATCH_SIZE=1)
+    def test_small_batches_and_stats_invalidation(self):
+        people = {'ali': person('Ali'), 'sara': person('Sara')}
+        with mock.patch('apps.core.services.ldap_sync.StatsCache.invalidate') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                LDAPDirectorySync.apply(people, {'staff': {'ali', 'sara'}, 'admins': {'sara'}})
+            invalidate.assert_called_once_with()
+            with self.captureOnCommitCallbacks(execute=True):
+                stats = LDAPDirectorySync.apply(people, {'staff': {'ali'}, 'admins': set()})
+        self.assertEqual(stats['memberships_removed'], 2)
+        # فقط عضویت تغییر کرده؛ آمار دوباره باطل نمی‌شود
+        self.assertEqual(invalidate.call_count, 1)
+        self.assertEqual(set(Group.objects.get(name='staff').user_set.values_list('username', flat=True)), {'ali'})
@@ -0,0 +1,308 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core import tasks
+from apps.core.models import Meeting, Notification, NotificationArchive, Resolution, UserProfile
+from apps.core.services.notification_retention import NotificationRetention
+from apps.core.services.notification_service import NotificationService
+from apps.core.services.presence import Presence
+from apps.core.services.unread_counter import UnreadCounter
+
+
+def run_eagerly(task):
+    return mock.patch.object(task, 'delay', side_effect=lambda *args: task.apply(args=args))
+
+
+def clear_presence():
+    # وضعیت حضور در Redis با rollback تست‌ها پاک نمی‌شود
+    client = Presence.client()
+    keys = list(client.scan_iter('presence:*'))
+    if keys:
+        client.delete(*keys)
+
+
+class BulkNotificationTests(TestCase):
+    def create_user(self, username, position='employee', email_delivery='immediate'):
+        user = User.objects.create_user(username=username, password='pass12345', email=f'{username}@example.com')
+        UserProfile.objects.create(user=user, position=position, email_delivery=email_delivery)
+        return user
+
+    def setUp(self):
+        clear_presence()
+        self.addCleanup(clear_presence)
+        self.users = [self.create_user(f'user{i}') for i in range(3)]
+        self.actor = self.create_user('actor')
+        meeting = Meeting.objects.create(number=1, held_at=date(2024, 1, 1))
+        self.resolution = Resolution.objects.create(
+            meeting=meeting, clause='1', subclause='1', description='مصوبه', type='operational'
+        )
+
+    def test_bulk_notifications_are_delivered_after_commit(self):
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_add)(f'notifications_{self.users[0].id}', 'test-channel')
+        Presence.connect(self.users[0].id, 'test-channel')
+
+        with run_eagerly(tasks.deliver_realtime_notifications), run_eagerly(tasks.deliver_email_notifications):
+            with self.captureOnCommitCallbacks() as callbacks:
+                # یک SELECT برای گیرندگان و یک INSERT برای همه ردیف‌ها؛ تحویل پس از commit
+                with self.assertNumQueries(2):
+                    notifications = NotificationService.create_bulk_notifications(
+                        self.users + [self.users[0], self.actor.id],
+                        'پیام گروهی',
+                        resolution=self.resolution,
+                        exclude=self.actor,
+                    )
+                self.assertEqual(len(mail.outbox), 0)
+            for callback in callbacks:
+                callback()
+
+        self.assertEqual(len(notifications), 3)
+        self.assertEqual(Notification.objects.filter(resolution=self.resolution).count(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+        event = async_to_sync(channel_layer.receive)('test-channel')
+        self.assertEqual(event['message'], 'پیام گروهی')
+        self.assertEqual(event['notification_id'], str(notifications[0].id))
+        self.assertEqual(event['resolution']['meeting']['number'], 1)
+
+    @override_settings(PRESENCE_RECONNECT_GRACE=0)
+    def test_realtime_delivery_skips_offline_users(self):
+        Presence.connect(self.users[0].id, 'online-channel')
+        Presence.disconnect(self.users[1].id, 'offline-channel')
+        notifications = NotificationService.create_bulk_notifications(self.users[:2], 'پیام')
+        with mock.patch('apps.core.services.websocket_service.EventStream.record') as record, \
+                mock.patch('apps.core.services.websocket_service._send_events') as send:
+            NotificationService.deliver_realtime(notifications)
+        # رویداد کاربر آفلاین برای replay ثبت می‌شود ولی فقط کاربر آنلاین آن را می‌گیرد
+        self.assertEqual(len(record.call_args.args[0]), 2)
+        self.assertEqual([group for group, _ in send.call_args.args[0]], [f'notifications_{self.users[0].id}'])
+
+    def test_disconnected_user_stays_online_during_reconnect_grace(self):
+        Presence.connect(self.users[1].id, 'dropped-channel')
+        Presence.disconnect(self.users[1].id, 'dropped-channel')
+        self.assertEqual(Presence.online_user_ids([self.users[1].id]), {self.users[1].id})
+        with override_settings(PRESENCE_RECONNECT_GRACE=0):
+            Presence.disconnect(self.users[1].id, 'dropped-channel')
+        self.assertEqual(Presence.online_user_ids([self.users[1].id]), set())
+
+    def test_presence_errors_do_not_break_callers(self):
+        with mock.patch.object(Presence, 'client', side_effect=ConnectionError('redis')):
+            self.assertEqual(Presence.online_user_ids([self.users[0].id]), {self.users[0].id})
+            self.assertIsNone(Presence.online_count())
+
+    def test_failed_emails_are_retried_alone(self):
+        notifications = NotificationService.create_bulk_notifications(self.users, 'پیام')
+        ids = [str(notification.id) for notification in notifications]
+        failing = ids[1]
+
+        def build(notification):
+            if str(notification.id) == failing:
+                raise ConnectionError('smtp')
+            return original_build(notification)
+
+        original_build = NotificationService.build_email_message
+        with mock.patch.object(NotificationService, 'build_email_message', side_effect=build), \
+                mock.patch.object(tasks.deliver_email_notifications, 'retry', side_effect=RuntimeError) as retry:
+            with self.assertRaises(RuntimeError):
+                tasks.deliver_email_notifications.run(ids)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(retry.call_args.kwargs['args'], [[failing]])
+
+    def test_synchronous_delivery_and_recipient_messages(self):
+        with self.settings(NOTIFICATION_ASYNC_DELIVERY=False), self.captureOnCommitCallbacks(execute=True):
+            notifications = NotificationService.create_bulk_notifications(
+                self.users, lambda recipient: f'سلام {recipient.username}'
+            )
+        self.assertEqual([n.message for n in notifications], ['سلام user0', 'سلام user1', 'سلام user2'])
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_chat_bursts_are_coalesced_per_recipient_and_resolution(self):
+        for i in range(3):
+            NotificationService.create_bulk_notifications(
+                self.users[:2], f'پیام {i}', resolution=self.resolution, kind='chat_message'
+            )
+        Notification.objects.filter(recipient=self.users[1]).update(read=True)
+        NotificationService.create_bulk_notifications(
+            self.users[:2], 'پیام آخر', resolution=self.resolution, kind='chat_message'
+        )
+
+        first = Notification.objects.get(recipient=self.users[0])
+        self.assertEqual(first.coalesced_count, 4)
+        self.assertEqual(first.message, '(4 مورد جدید) پیام آخر')
+        # جایگاه در لیست صفحه‌بندی‌شده (sent_at) ثابت می‌ماند
+        self.assertGreater(first.updated_at, first.sent_at)
+        self.assertEqual(Notification.objects.filter(recipient=self.users[1]).count(), 2)
+
+        with self.settings(NOTIFICATION_COALESCE_WINDOW=0):
+            NotificationService.create_bulk_notifications(
+                self.users[:1], 'پیام بعدی', resolution=self.resolution, kind='chat_message'
+            )
+        self.assertEqual(Notification.objects.filter(recipient=self.users[0]).count(), 2)
+
+    def test_low_priority_emails_are_collected_into_one_digest_per_user(self):
+        digest_users = [self.create_user(f'digest{i}', email_delivery='digest') for i in range(2)]
+        with self.settings(NOTIFICATION_ASYNC_DELIVERY=False), self.captureOnCommitCallbacks(execute=True):
+            for message in ('پیام اول', 'پیام دوم'):
+                NotificationService.create_bulk_notifications(digest_users, message, resolution=self.resolution)
+            NotificationService.create_bulk_notifications(digest_users[:1], 'فوری', priority='urgent')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(Notification.objects.filter(digest_pending=True).count(), 4)
+
+        with mock.patch('apps.core.services.notification_service.get_connection', wraps=get_connection) as connection:
+            self.assertEqual(tasks.send_notification_digests(), 2)
+        self.assertEqual(connection.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('پیام دوم', mail.outbox[1].body)
+        self.assertFalse(Notification.objects.filter(digest_pending=True).exists())
+        self.assertEqual(NotificationService.send_email_digests(), 0)
+
+
+@override_settings(NOTIFICATION_ASYNC_DELIVERY=False)
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_presence()
+        self.addCleanup(clear_presence)
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+
+    def notify(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(count):
+                NotificationService.create_notification(self.user, f'پیام {i}')
+
+    def test_counter_follows_create_and_read_without_queries(self):
+        self.assertEqual(UnreadCounter.get(self.user.id), 0)
+        self.notify(3)
+        with self.assertNumQueries(0):
+            self.assertEqual(UnreadCounter.get(self.user.id), 3)
+
+        channel_layer = get_channel_layer()
+        async_to_sync(channel_layer.group_add)(f'notifications_{self.user.id}', 'reader-channel')
+        Presence.connect(self.user.id, 'reader-channel')
+        notification = Notification.objects.filter(recipient=self.user).first()
+        self.assertTrue(NotificationService.mark_notification_read(self.user, notification.id))
+        self.assertTrue(NotificationService.mark_notification_read(self.user, notification.id))
+        self.assertEqual(UnreadCounter.get(self.user.id), 2)
+        event = async_to_sync(channel_layer.receive)('reader-channel')
+        self.assertEqual((event['type'], event['count']), ('unread_count', 2))
+        self.assertIn('event_id', event)
+
+        self.assertEqual(NotificationService.mark_all_notifications_read(self.user), 2)
+        self.assertEqual(UnreadCounter.get(self.user.id), 0)
+
+    def test_reconcile_repairs_drift(self):
+        # کلید پیش از ایجاد ساخته می‌شود تا شمارنده فقط با increment ها جلو برود
+        self.assertEqual(UnreadCounter.get(self.user.id), 0)
+        self.notify(2)
+        self.assertEqual(UnreadCounter.get(self.user.id), 2)
+        Notification.objects.filter(recipient=self.user).update(read=True)
+        self.assertEqual(UnreadCounter.get(self.user.id), 2)
+        tasks.reconcile_unread_counters()
+        self.assertEqual(UnreadCounter.get(self.user.id), 0)
+
+
+@override_settings(
+    NOTIFICATION_RETENTION_DAYS=30,
+    NOTIFICATION_RETENTION_BY_TYPE={'error': 90},
+    NOTIFICATION_RETENTION_BY_PRIORITY={},
+)
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+
+    def create(self, age_days, read=True, notification_type='info'):
+        notification = Notification.objects.create(
+            recipient=self.user, message='پیام', read=read, notification_type=notification_type
+        )
+        Notification.objects.filter(id=notification.id).update(sent_at=timezone.now() - timedelta(days=age_days))
+        return notification
+
+    def test_deletes_expired_read_notifications_in_batches(self):
+        expired = [self.create(40) for _ in range(5)]
+        kept = [self.create(10), self.create(40, read=False), self.create(40, notification_type='error')]
+
+        metrics = NotificationRetention.run(batch_size=2)
+
+        self.assertEqual(metrics['deleted'], 5)
+        self.assertEqual(metrics['batches'], 3)
+        self.assertTrue(metrics['complete'])
+        self.assertFalse(Notification.objects.filter(id__in=[n.id for n in expired]).exists())
+        self.assertEqual(Notification.objects.filter(id__in=[n.id for n in kept]).count(), 3)
+        self.assertFalse(NotificationArchive.objects.exists())
+
+    def test_archives_before_deleting(self):
+        notification = self.create(100, notification_type='error')
+        Notification.objects.filter(id=notification.id).update(kind='chat_message', coalesced_count=3)
+
+        metrics = NotificationRetention.run(archive=True)
+
+        self.assertEqual(metrics['archived'], 1)
+        archived = NotificationArchive.objects.get(id=notification.id)
+        self.assertEqual(archived.recipient, self.user)
+        self.assertEqual(archived.notification_type, 'error')
+        self.assertEqual((archived.kind, archived.coalesced_count), ('chat_message', 3))
+        self.assertFalse(Notification.objects.exists())
+
+
+class UserNotificationListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+        meeting = Meeting.objects.create(number=1, held_at=date(2024, 1, 1))
+        self.resolutions = [
+            Resolution.objects.create(meeting=meeting, clause=str(i), subclause='1', description='مصوبه', type='operational')
+            for i in range(2)
+        ]
+        for i in range(6):
+            Notification.objects.create(
+                recipient=self.user,
+                message=f'پیام {i}',
+                resolution=self.resolutions[i % 2],
+                read=i < 2,
+                priority='high' if i == 5 else 'normal',
+                metadata={'i': i},
+            )
+        # sent_at یکسان تا ترتیب صفحه‌ها به id وابسته شود
+        Notification.objects.update(sent_at=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_pages_cover_all_rows_with_constant_queries(self):
+        seen = []
+        cursor = None
+        while True:
+            params = {'page_size': 4}
+            if cursor:
+                params['cursor'] = cursor
+            # یک کوئری برای هر صفحه (مصوبه و جلسه با select_related)
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/notifications/user/', params)
+            seen.extend(item['id'] for item in response.data['results'])
+            cursor = response.data['next_cursor']
+            if not response.data['has_more']:
+                break
+        self.assertEqual(len(seen), 6)
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_filters_and_compact_mode(self):
+        response = self.client.get('/api/notifications/user/', {'unread': 'true', 'page_size': 10})
+        self.assertEqual(len(response.data['results']), 4)
+
+        response = self.client.get('/api/notifications/user/', {'priority': 'high', 'page_size': 10})
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get(
+            '/api/notifications/user/', {'resolution': str(self.resolutions[0].id), 'compact': '1', 'page_size': 10}
+        )
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertNotIn('metadata', response.data['results'][0])
+        self.assertEqual(response.data['results'][0]['resolution']['meeting']['number'], 1)
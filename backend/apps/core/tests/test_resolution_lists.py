@@ -0,0 +1,154 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.core.models import Meeting, Resolution, ResolutionComment, ResolutionView, UserProfile
+
+
+class ResolutionListTestMixin:
+    """داده‌های پایه برای تست لیست‌های مصوبات"""
+
+    def create_user(self, username, position='employee'):
+        user = User.objects.create_user(username=username, password='pass12345')
+        UserProfile.objects.create(user=user, position=position)
+        return user
+
+    def create_resolutions(self, count, meeting=None, **kwargs):
+        meeting = meeting or self.meeting
+        created = []
+        for i in range(count):
+            created.append(Resolution.objects.create(
+                meeting=meeting,
+                clause=str(i + 1),
+                subclause='1',
+                description=f'مصوبه {i + 1}',
+                type=kwargs.get('type', 'operational'),
+                status=kwargs.get('status', 'notified'),
+                executor_unit=kwargs.get('executor_unit', self.executor),
+                created_by=self.secretary,
+            ))
+        return created
+
+
+class ResolutionCursorPaginationTests(ResolutionListTestMixin, TestCase):
+    def setUp(self):
+        self.secretary = self.create_user('secretary', 'secretary')
+        self.executor = self.create_user('deputy', 'deputy')
+        self.meeting = Meeting.objects.create(number=1, held_at=date(2024, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.secretary)
+
+    def collect_pages(self, url, params):
+        seen = []
+        cursor = None
+        while True:
+            query = dict(params)
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get(url, query)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item['id'] for item in response.data['results'])
+            if not response.data['has_more']:
+                self.assertIsNone(response.data['next_cursor'])
+                return seen
+            cursor = response.data['next_cursor']
+
+    def test_unpaginated_response_is_a_list(self):
+        self.create_resolutions(3)
+        response = self.client.get('/api/resolutions/secretary/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+
+    def test_pages_cover_all_rows_without_duplicates(self):
+        resolutions = self.create_resolutions(7)
+        # همه ردیف‌ها با created_at یکسان تا مرتب‌سازی به id وابسته شود
+        Resolution.objects.update(created_at=timezone.now())
+
+        for url in ['/api/resolutions/secretary/', '/api/resolutions/workbench/']:
+            seen = self.collect_pages(url, {'page_size': 3})
+            self.assertEqual(len(seen), len(resolutions))
+            self.assertEqual(set(seen), {str(r.id) for r in resolutions})
+
+    def test_filters(self):
+        self.create_resolutions(2, status='completed')
+        self.create_resolutions(3, status='notified', type='informational')
+        other_meeting = Meeting.objects.create(number=2, held_at=date(2024, 2, 1))
+        self.create_resolutions(1, meeting=other_meeting)
+
+        response = self.client.get('/api/resolutions/workbench/', {'status': 'completed', 'page_size': 10})
+        self.assertEqual(len(response.data['results']), 2)
+
+        response = self.client.get('/api/resolutions/workbench/', {'type': 'informational', 'page_size': 10})
+        self.assertEqual(len(response.data['results']), 3)
+
+        response = self.client.get('/api/resolutions/secretary/', {'meeting': other_meeting.id, 'page_size': 10})
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get('/api/resolutions/secretary/', {'executor': self.secretary.id, 'page_size': 10})
+        self.assertEqual(len(response.data['results']), 0)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/resolutions/secretary/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class ResolutionListQueryCountTests(ResolutionListTestMixin, TestCase):
+    """تعداد کوئری‌های لیست مصوبات نباید با تعداد ردیف‌ها رشد کند"""
+
+    def setUp(self):
+        self.secretary = self.create_user('secretary', 'secretary')
+        self.executor = self.create_user('deputy', 'deputy')
+        self.meeting = Meeting.objects.create(number=1, held_at=date(2024, 1, 1))
+        self.client = APIClient()
+        self.client.force_authenticate(self.executor)
+
+    def add_rows(self, count):
+        coworker = self.create_user(f'coworker{Resolution.objects.count()}', 'manager')
+        for resolution in self.create_resolutions(count):
+            resolution.coworkers.add(coworker, self.secretary)
+            resolution.inform_units.add(self.secretary)
+            resolution.participants.add(coworker)
+            ResolutionView.objects.create(user=self.executor, resolution=resolution)
+            ResolutionComment.objects.create(
+                resolution=resolution,
+                author=self.executor,
+                content='پیشرفت',
+                comment_type='progress_update'
+            )
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries), response
+
+    def test_workbench_query_count_is_constant(self):
+        url = '/api/resolutions/workbench/'
+        self.add_rows(2)
+        small, response = self.count_queries(url)
+        self.assertEqual(len(response.data), 2)
+        self.assertFalse(response.data[0]['unread'])
+        self.assertIsNotNone(response.data[0]['first_viewed_at'])
+        self.assertIsNotNone(response.data[0]['last_progress_update'])
+
+        self.add_rows(8)
+        large, response = self.count_queries(url)
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(small, large)
+
+    def test_secretary_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.secretary)
+        url = '/api/resolutions/secretary/'
+        self.add_rows(2)
+        small, response = self.count_queries(url)
+        self.assertTrue(response.data[0]['unread'])
+        self.assertIsNone(response.data[0]['first_viewed_at'])
+
+        self.add_rows(8)
+        large, _ = self.count_queries(url)
+        self.assertEqual(small, large)
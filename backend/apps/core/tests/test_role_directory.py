@@ -0,0 +1,50 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from apps.core.models import UserProfile
+from apps.core.services.role_directory import RoleDirectory
+
+
+class RoleDirectoryTests(TestCase):
+    def create_user(self, username, position='employee'):
+        user = User.objects.create_user(username=username, password='pass12345')
+        UserProfile.objects.create(user=user, position=position)
+        return user
+
+    def setUp(self):
+        cache.clear()
+        self.ceo = self.create_user('ceo', 'ceo')
+        self.auditor = self.create_user('auditor', 'auditor')
+        self.create_user('employee')
+
+    def test_lookups_are_served_from_memory(self):
+        self.assertEqual(RoleDirectory.user_ids('ceo'), [self.ceo.id])
+        self.assertEqual(RoleDirectory.user_ids('auditor'), [self.auditor.id])
+        with self.assertNumQueries(0):
+            users = RoleDirectory.users('auditor') + RoleDirectory.users('auditor')
+            self.assertEqual(users[0].profile.position, 'auditor')
+            self.assertEqual(RoleDirectory.user_ids('ceo'), [self.ceo.id])
+
+        # حافظه پردازه خالی شود؛ مقدار از Redis خوانده می‌شود
+        RoleDirectory._local.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(RoleDirectory.user_ids('ceo'), [self.ceo.id])
+
+    def test_cached_users_have_no_password(self):
+        RoleDirectory.users('ceo')
+        snapshots = cache.get(f'roles:users:{RoleDirectory.get_version()}:ceo')
+        self.assertEqual([snapshot['user']['id'] for snapshot in snapshots], [self.ceo.id])
+        self.assertNotIn('password', snapshots[0]['user'])
+
+    def test_profile_changes_invalidate_directory(self):
+        self.assertEqual(RoleDirectory.user_ids('ceo'), [self.ceo.id])
+        second = self.create_user('ceo2', 'ceo')
+        self.assertEqual(RoleDirectory.user_ids('ceo'), [self.ceo.id, second.id])
+
+        self.ceo.profile.position = 'board'
+        self.ceo.profile.save()
+        self.assertEqual(RoleDirectory.user_ids('ceo'), [second.id])
+
+        second.profile.delete()
+        self.assertEqual(RoleDirectory.user_ids('ceo'), [])
@@ -0,0 +1,120 @@
+from array import array
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from apps.core.models import Meeting, Resolution, ResolutionAction, ResolutionStageInterval, UserProfile
+from apps.core.services.stage_interval_service import duration_distribution
+
+T0 = datetime(2024, 1, 1, 8, 0, tzinfo=dt_timezone.utc)
+
+
+class ResolutionStageIntervalTests(TestCase):
+    def create_user(self, username, position='employee'):
+        user = User.objects.create_user(username=username, password='pass12345')
+        UserProfile.objects.create(user=user, position=position)
+        return user
+
+    def at(self, offset):
+        return mock.patch('django.utils.timezone.now', return_value=T0 + offset)
+
+    def setUp(self):
+        self.secretary = self.create_user('secretary', 'secretary')
+        self.ceo = self.create_user('ceo', 'ceo')
+        self.executor = self.create_user('deputy', 'deputy')
+        self.meeting = Meeting.objects.create(number=1, held_at=date(2024, 1, 1))
+
+    def run_workflow(self):
+        with self.at(timedelta()):
+            resolution = Resolution.objects.create(
+                meeting=self.meeting, clause='1', subclause='1', description='مصوبه',
+                type='operational', status='pending_secretary_approval',
+                executor_unit=self.executor, created_by=self.secretary,
+            )
+        steps = [
+            (timedelta(hours=1), self.secretary, 'secretary_approved', None),
+            (timedelta(hours=3), self.ceo, 'ceo_approved', None),
+            (timedelta(hours=4), self.executor, 'return', {'reason': 'ابهام'}),
+            (timedelta(hours=6), self.ceo, 'ceo_approved', None),
+            (timedelta(hours=9), self.executor, 'executor_accepted', None),
+            (timedelta(days=1), self.executor, 'progress_update', {'new_progress': 50}),
+            (timedelta(days=2), self.executor, 'progress_update', {'new_progress': 100}),
+        ]
+        for offset, actor, action_type, data in steps:
+            with self.at(offset):
+                ResolutionAction.objects.create(
+                    resolution=resolution, actor=actor, action_type=action_type,
+                    description=action_type, action_data=data
+                )
+        Resolution.objects.filter(pk=resolution.pk).update(status='completed', progress=100)
+        return resolution
+
+    def interval_rows(self, resolution):
+        return list(resolution.stage_intervals.order_by('entered_at', 'id').values_list(
+            'stage', 'cycle', 'entry_type', 'exit_type', 'duration_seconds'
+        ))
+
+    def test_intervals_follow_workflow(self):
+        resolution = self.run_workflow()
+        self.assertEqual(self.interval_rows(resolution), [
+            ('secretary', 1, 'created', 'secretary_approved', 3600.0),
+            ('ceo', 1, 'secretary_approved', 'ceo_approved', 7200.0),
+            ('executor', 1, 'ceo_approved', 'return', 3600.0),
+            ('ceo', 2, 'return', 'ceo_approved', 7200.0),
+            ('executor', 2, 'ceo_approved', 'executor_accepted', 10800.0),
+            ('execution', 1, 'executor_accepted', 'progress_completed', 2 * 86400.0 - 9 * 3600),
+        ])
+
+    def test_backfill_matches_live_intervals(self):
+        resolution = self.run_workflow()
+        live = self.interval_rows(resolution)
+        ResolutionStageInterval.objects.all().delete()
+        call_command('backfill_stage_intervals', stdout=mock.MagicMock())
+        self.assertEqual(self.interval_rows(resolution), live)
+
+    def test_duration_endpoints(self):
+        self.run_workflow()
+        client = APIClient()
+        client.force_authenticate(self.ceo)
+
+        response = client.get('/api/stats/secretary-average-duration/')
+        self.assertEqual(response.data['average_duration_seconds'], 3600)
+        self.assertEqual(response.data['percentiles_seconds'], {'p50': 3600, 'p90': 3600, 'p99': 3600})
+        self.assertEqual([bucket['count'] for bucket in response.data['histogram']], [0, 1, 0, 0, 0, 0, 0])
+        self.assertEqual(response.data['executor_units'][0]['unit_id'], self.executor.id)
+        response = client.get('/api/stats/ceo-average-duration/')
+        self.assertEqual(response.data['average_duration_seconds'], 7200)
+
+        response = client.get('/api/stats/executor-acceptance-duration/')
+        self.assertEqual(response.data[0]['avg_acceptance_duration_minutes'], 180)
+        self.assertEqual(response.data[0]['total_assigned_resolutions'], 1)
+
+        response = client.get('/api/stats/executor-completion-duration/')
+        self.assertEqual(response.data[0]['resolution_count'], 1)
+        self.assertEqual(response.data[0]['avg_completion_duration_minutes'], (2 * 1440) - 9 * 60)
+        self.assertEqual(response.data[0]['percentiles_minutes']['p99'], (2 * 1440) - 9 * 60)
+
+    def test_duration_distribution(self):
+        values = array('d', [60, 120, 7200, 2 * 86400, 100 * 86400])
+        distribution = duration_distribution(values)
+        self.assertEqual(distribution['percentiles']['p50'], 7200)
+        self.assertAlmostEqual(distribution['percentiles']['p90'], 0.4 * 2 * 86400 + 0.6 * 100 * 86400, places=2)
+        self.assertEqual([bucket['count'] for bucket in distribution['histogram']], [2, 1, 1, 0, 0, 0, 1])
+        self.assertEqual(duration_distribution(array('d'))['percentiles'], {'p50': 0, 'p90': 0, 'p99': 0})
+
+    def test_all_users_average_duration(self):
+        self.run_workflow()
+        client = APIClient()
+        client.force_authenticate(self.ceo)
+        with self.assertNumQueries(2):
+            response = client.get('/api/users/all-users-average-duration/')
+        rows = {row['username']: row for row in response.data['users']}
+        # فاصله از اکشن قبلی (از هر نوع) همان مصوبه
+        self.assertEqual(rows['ceo']['average_duration_seconds'], 7200)
+        self.assertEqual(rows['ceo']['resolution_count'], 2)
+        self.assertEqual(rows['deputy']['average_duration_seconds'], 10800)
+        self.assertNotIn('secretary', rows)
@@ -0,0 +1,127 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.core.models import Meeting, Resolution, UserProfile
+from apps.core.services.stats_service import ResolutionStatsService
+
+
+class ResolutionStatsServiceTests(TestCase):
+    def create_user(self, username, position='employee'):
+        user = User.objects.create_user(username=username, password='pass12345')
+        UserProfile.objects.create(user=user, position=position)
+        return user
+
+    def setUp(self):
+        cache.clear()
+        self.ceo = self.create_user('ceo', 'ceo')
+        self.executor = self.create_user('deputy', 'deputy')
+        self.other = self.create_user('manager', 'manager')
+        meeting = Meeting.objects.create(number=1, held_at=date.today())
+        Meeting.objects.create(number=2, held_at=date.today() - timedelta(days=90))
+        overdue = date.today() - timedelta(days=1)
+        rows = [
+            ('notified', 'operational', self.executor, overdue),
+            ('notified', 'informational', self.executor, None),
+            ('in_progress', 'operational', self.other, overdue),
+            ('completed', 'operational', self.other, overdue),
+            ('pending_ceo_approval', 'operational', None, None),
+            ('pending_secretary_approval', 'informational', self.executor, None),
+        ]
+        for i, (status, type_, executor, deadline) in enumerate(rows):
+            resolution = Resolution.objects.create(
+                meeting=meeting, clause=str(i), subclause='1', description='مصوبه',
+                status=status, type=type_, executor_unit=executor, deadline=deadline,
+            )
+            if status == 'in_progress':
+                resolution.coworkers.add(self.executor)
+
+    def test_counts_match_individual_queries(self):
+        stats = ResolutionStatsService.global_stats()
+        self.assertEqual(stats['total'], Resolution.objects.count())
+        self.assertEqual(stats['operational'], 4)
+        self.assertEqual(stats['informational'], 2)
+        self.assertEqual(stats['notified'], 2)
+        self.assertEqual(stats['notified_operational'], 1)
+        self.assertEqual(stats['overdue'], 2)
+        self.assertEqual(stats['overdue_operational'], 2)
+        self.assertEqual(stats['pending_executor'], 2)
+        self.assertEqual(stats['active_executors'], 2)
+        self.assertEqual(stats['total_meetings'], 2)
+        self.assertEqual(stats['recent_meetings'], 1)
+
+        user_stats = ResolutionStatsService.user_counts(self.executor)
+        self.assertEqual(user_stats['pending_tasks_executor'], 2)
+        # دو مصوبه notified + pending_secretary_approval به عنوان مجری و یک in_progress به عنوان همکار
+        self.assertEqual(user_stats['my_pending_tasks'], 4)
+
+    def test_endpoints_use_constant_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.ceo)
+        for url in ['/api/stats/dashboard/', '/api/resolutions/auditor-stats/', '/api/resolutions/ceo-stats/']:
+            with CaptureQueriesContext(connection) as context:
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertLessEqual(len(context.captured_queries), 4, url)
+
+        response = client.get('/api/resolutions/ceo-stats/')
+        self.assertEqual(response.data['overdue_resolutions'], 2)
+        self.assertEqual(response.data['pending_approval'], 1)
+
+    def test_cache_is_invalidated_by_resolution_changes(self):
+        stats = ResolutionStatsService.global_stats()
+        self.assertEqual(stats['completed'], 1)
+
+        # بدون تغییر، کوئری‌ای اجرا نمی‌شود
+        with self.assertNumQueries(0):
+            ResolutionStatsService.global_stats()
+
+        resolution = Resolution.objects.get(status='in_progress')
+        with self.captureOnCommitCallbacks(execute=True):
+            resolution.status = 'completed'
+            resolution.save()
+        self.assertEqual(ResolutionStatsService.global_stats()['completed'], 2)
+
+        # تغییر پیشرفت روی آمار اثری ندارد و کش را باطل نمی‌کند
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            resolution.progress = 50
+            resolution.save()
+        self.assertEqual(callbacks, [])
+
+        # تغییر عضویت فقط آمار کاربر را باطل می‌کند
+        self.assertEqual(ResolutionStatsService.user_counts(self.other)['my_pending_tasks'], 0)
+        notified = Resolution.objects.filter(status='notified').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            notified.coworkers.add(self.other)
+        self.assertEqual(ResolutionStatsService.user_counts(self.other)['my_pending_tasks'], 1)
+
+    def test_heatmap_groups_by_jalali_month(self):
+        # 2024-01-01 = 1402-10-11 و 2024-03-25 = 1403-01-06
+        winter = Meeting.objects.create(number=10, held_at=date(2024, 1, 1))
+        spring = Meeting.objects.create(number=11, held_at='2024-03-25')
+        self.assertEqual((winter.jalali_month, spring.jalali_month), (140210, 140301))
+        for meeting, executor in [(winter, self.executor), (winter, self.executor), (spring, self.other)]:
+            Resolution.objects.create(
+                meeting=meeting, clause='9', subclause='1', description='مصوبه',
+                type='operational', executor_unit=executor,
+            )
+
+        client = APIClient()
+        client.force_authenticate(self.ceo)
+        with self.assertNumQueries(1):
+            response = client.get('/api/resolutions/heatmap/', {'from': '1402-09', 'to': '1403-01'})
+        self.assertEqual(response.data['months'], ['1402-09', '1402-10', '1402-11', '1402-12', '1403-01'])
+        self.assertEqual(response.data['units'], ['deputy', 'manager'])
+        self.assertEqual(response.data['data'], [[0, 2, 0, 0, 0], [0, 0, 0, 0, 1]])
+
+        response = client.get('/api/resolutions/heatmap/', {'fiscal_year': '1402'})
+        self.assertEqual(len(response.data['months']), 12)
+        self.assertEqual(response.data['data'], [[0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 0, 0]])
+
+        response = client.get('/api/resolutions/heatmap/', {'from': '1403-02', 'to': '1402-01'})
+        self.assertEqual(response.status_code, 400)
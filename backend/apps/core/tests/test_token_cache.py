@@ -0,0 +1,77 @@
+from datetime import timedelta
+from unittest import mock
+
+import jwt
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import TokenBackendError, TokenError
+from rest_framework_simplejwt.state import token_backend
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from apps.core.authentication import CachedJWTAuthentication
+from apps.core.models import UserProfile
+from apps.core.services.token_cache import CachedAccessToken, TokenCache
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        TokenCache._claims.clear()
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+        UserProfile.objects.create(user=self.user, position='employee')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def test_signature_is_verified_once_per_token(self):
+        with mock.patch.object(token_backend, 'decode', wraps=token_backend.decode) as decode:
+            payload = TokenCache.payload(self.token)
+            self.assertEqual(TokenCache.payload(self.token), payload)
+        verified = [call for call in decode.call_args_list if call.kwargs.get('verify', True)]
+        self.assertEqual(len(verified), 1)
+        self.assertEqual(payload['user_id'], self.user.id)
+
+    def test_forged_token_with_cached_jti_is_rejected(self):
+        payload = TokenCache.payload(self.token)
+        forged = jwt.encode(dict(payload, user_id=self.user.id + 1), 'wrong-key', algorithm='HS256')
+        with self.assertRaises(TokenBackendError):
+            TokenCache.payload(forged)
+
+    def test_expiry_is_checked_on_cached_tokens(self):
+        CachedAccessToken(self.token)
+        later = aware_utcnow() + AccessToken.lifetime + timedelta(seconds=1)
+        with mock.patch('apps.core.services.token_cache.aware_utcnow', return_value=later):
+            with self.assertRaises(TokenError):
+                CachedAccessToken(self.token)
+
+    def test_user_is_served_from_cache_until_changed(self):
+        TokenCache.user(self.user.id)
+        self.assertNotIn('password', cache.get(TokenCache.user_key(self.user.id))['user'])
+        with self.assertNumQueries(0):
+            self.assertEqual(TokenCache.user(self.user.id).profile.position, 'employee')
+
+        self.user.profile.position = 'ceo'
+        self.user.profile.save()
+        self.assertEqual(TokenCache.user(self.user.id).profile.position, 'ceo')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(TokenCache.user(self.user.id).is_active)
+
+    def test_saving_cached_user_keeps_password(self):
+        cached = TokenCache.user(self.user.id)
+        cached.first_name = 'Reza'
+        cached.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Reza')
+        self.assertTrue(self.user.check_password('pass12345'))
+
+    def test_authentication_reuses_cached_token_and_user(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        authentication = CachedJWTAuthentication()
+        user, token = authentication.authenticate(request)
+        self.assertEqual(user, self.user)
+        self.assertIsInstance(token, AccessToken)
+        with self.assertNumQueries(0):
+            self.assertEqual(authentication.authenticate(request)[0], self.user)
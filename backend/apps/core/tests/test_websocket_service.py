@@ -0,0 +1,150 @@
+import asyncio
+from datetime import date
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from apps.core.consumers import NotificationConsumer
+from apps.core.models import Meeting, Resolution, UserProfile
+from apps.core.services.event_stream import EventStream
+from apps.core.services.websocket_service import adispatch_events, chat_group_name, dispatch_events
+
+
+class DispatchEventsTests(SimpleTestCase):
+    def setUp(self):
+        self.channel_layer = get_channel_layer()
+        for index in range(3):
+            async_to_sync(self.channel_layer.group_add)(f'dispatch_test_{index}', f'dispatch-channel-{index}')
+
+    def test_events_are_sent_in_one_call(self):
+        events = [(f'dispatch_test_{index}', {'type': 'unread_count', 'count': index}) for index in range(3)]
+        with mock.patch('apps.core.services.websocket_service.async_to_sync', wraps=async_to_sync) as hop:
+            dispatch_events(events)
+        self.assertEqual(hop.call_count, 1)
+        for index in range(3):
+            event = async_to_sync(self.channel_layer.receive)(f'dispatch-channel-{index}')
+            self.assertEqual(event['count'], index)
+
+    def test_awaitable_variant_and_bounded_concurrency(self):
+        async_to_sync(adispatch_events)([('dispatch_test_0', {'type': 'unread_count', 'count': 7})])
+        self.assertEqual(async_to_sync(self.channel_layer.receive)('dispatch-channel-0')['count'], 7)
+
+        in_flight = []
+        peak = []
+
+        async def group_send(group_name, event):
+            in_flight.append(group_name)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0)
+            in_flight.remove(group_name)
+
+        layer = mock.Mock(group_send=group_send)
+        events = [(f'dispatch_test_{index}', {'type': 'unread_count', 'count': index}) for index in range(5)]
+        with self.settings(WEBSOCKET_DISPATCH_CONCURRENCY=2):
+            dispatch_events(events, layer)
+        self.assertEqual(len(peak), 5)
+        self.assertEqual(max(peak), 2)
+
+    def test_consumer_helpers_use_chat_group(self):
+        async_to_sync(self.channel_layer.group_add)(chat_group_name('abc'), 'chat-channel')
+        NotificationConsumer.send_chat_message_to_resolution('abc', 'سلام', 1, 'user')
+        event = async_to_sync(self.channel_layer.receive)('chat-channel')
+        self.assertEqual(event['type'], 'chat_message')
+        self.assertEqual(event['message'], 'سلام')
+
+
+class EventStreamTests(SimpleTestCase):
+    group = 'notifications_987654'
+
+    def setUp(self):
+        EventStream.client().delete(EventStream.key(self.group))
+
+    def tearDown(self):
+        EventStream.client().delete(EventStream.key(self.group))
+
+    def test_missed_events_are_replayed_after_last_event_id(self):
+        events = [(self.group, {'type': 'unread_count', 'count': index}) for index in range(3)]
+        # گروه‌های غیرقابل replay ثبت نمی‌شوند
+        events.append(('all_users', {'type': 'notification_message', 'message': 'همه'}))
+        layer = mock.Mock(group_send=mock.AsyncMock())
+        dispatch_events(events, layer)
+
+        first_id = events[0][1]['event_id']
+        self.assertNotIn('event_id', events[3][1])
+        replayed, complete = EventStream.replay(self.group, first_id)
+        self.assertTrue(complete)
+        self.assertEqual([event['count'] for event in replayed], [1, 2])
+        self.assertEqual(replayed[-1]['event_id'], events[2][1]['event_id'])
+
+    def test_gap_beyond_retained_events_is_incomplete(self):
+        events = [(self.group, {'type': 'unread_count', 'count': index}) for index in range(3)]
+        EventStream.record(events)
+        EventStream.client().xtrim(EventStream.key(self.group), maxlen=1, approximate=False)
+        replayed, complete = EventStream.replay(self.group, events[0][1]['event_id'])
+        self.assertFalse(complete)
+        self.assertEqual([event['count'] for event in replayed], [2])
+
+        with override_settings(EVENT_STREAM_REPLAY_LIMIT=1):
+            replayed, complete = EventStream.replay(self.group, '0-0')
+        self.assertFalse(complete)
+        self.assertEqual(EventStream.replay(self.group, 'invalid'), ([], False))
+
+    def test_missing_stream_is_incomplete(self):
+        # stream منقضی‌شده: رویدادهای بعد از last_event_id دیگر معلوم نیست
+        self.assertEqual(EventStream.replay(self.group, '1-0'), ([], False))
+
+    def test_offline_groups_are_recorded_but_not_sent(self):
+        layer = mock.Mock(group_send=mock.AsyncMock())
+        dispatch_events([(self.group, {'type': 'unread_count', 'count': 1})], layer, offline_groups={self.group})
+        layer.group_send.assert_not_called()
+        replayed, complete = EventStream.replay(self.group, '0-0')
+        self.assertEqual([event['count'] for event in replayed], [1])
+
+
+class JoinChatAccessTests(TestCase):
+    def setUp(self):
+        self.executor = User.objects.create_user(username='deputy', password='pass12345')
+        UserProfile.objects.create(user=self.executor, position='deputy')
+        self.secretary = User.objects.create_user(username='secretary', password='pass12345')
+        UserProfile.objects.create(user=self.secretary, position='secretary')
+        self.outsider = User.objects.create_user(username='outsider', password='pass12345')
+        UserProfile.objects.create(user=self.outsider, position='employee')
+        meeting = Meeting.objects.create(number=1, held_at=date(2024, 1, 1))
+        # پس از قبول، دبیر مصوبه را می‌بیند ولی در چت پیام نمی‌فرستد
+        self.resolution = Resolution.objects.create(
+            meeting=meeting, clause='1', subclause='1', description='مصوبه',
+            type='operational', status='in_progress', executor_unit=self.executor,
+        )
+
+    def join(self, user):
+        consumer = NotificationConsumer()
+        consumer.user = user
+        consumer.chat_groups = set()
+        consumer.channel_name = 'join-channel'
+        consumer.channel_layer = mock.Mock(group_add=mock.AsyncMock())
+        consumer.replay = mock.AsyncMock()
+        async_to_sync(consumer.handle_join_chat)({'resolution_id': self.resolution.public_id, 'last_event_id': '1-0'})
+        return consumer
+
+    def send_chat(self, consumer):
+        with mock.patch('apps.core.consumers.adispatch_events') as dispatch:
+            async_to_sync(consumer.handle_chat_message)({
+                'resolution_id': self.resolution.public_id, 'message': 'سلام', 'author_id': consumer.user.id,
+            })
+        return dispatch.called
+
+    def test_viewers_join_and_replay_but_only_chat_members_send(self):
+        for user, can_send in [(self.executor, True), (self.secretary, False)]:
+            consumer = self.join(user)
+            self.assertEqual(consumer.chat_groups, {chat_group_name(self.resolution.public_id)})
+            consumer.replay.assert_awaited_once()
+            self.assertEqual(self.send_chat(consumer), can_send, user.username)
+
+        for user in [self.outsider, AnonymousUser()]:
+            consumer = self.join(user)
+            self.assertEqual(consumer.chat_groups, set())
+            consumer.channel_layer.group_add.assert_not_called()
+            consumer.replay.assert_not_called()
@@ -81,6 +81,8 @@ urlpatterns = [
     path('notifications/user/', UserNotificationListView.as_view(), name='user-notifications'),
     path('notifications/<uuid:notification_id>/read/', views.mark_notification_read, name='mark-notification-read'),
     path('notifications/unread-count/', views.unread_notifications_count, name='unread-notifications-count'),
+    path('notifications/preferences/', views.notification_preferences, name='notification-preferences'),
+    path('presence/online-count/', views.online_users_count, name='online-users-count'),
     path('notifications/mark-read/<uuid:notification_id>/', views.mark_notification_read, name='mark_notification_read'),
     path('notifications/mark-all-read/', views.mark_all_notifications_read, name='mark_all_notifications_read'),
     path('notifications/test/', views.test_notification, name='test_notification'),
@@ -123,9 +125,10 @@ urlpatterns = [
 
 # Manual URL patterns for resolutions to use public_id
 urlpatterns += [
+    # پیش از مسیر جزئیات، تا heatmap به عنوان public_id خوانده نشود
+    path('resolutions/heatmap/', resolutions_heatmap, name='resolutions-heatmap'),
     path('resolutions/<str:public_id>/', views.ResolutionViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'}), name='resolution-detail'),
     path('resolutions/', views.ResolutionViewSet.as_view({'get': 'list', 'post': 'create'}), name='resolution-list'),
-    path('resolutions/heatmap/', resolutions_heatmap, name='resolutions-heatmap'),
 ]
 urlpatterns += [
     path('', include(router.urls)),
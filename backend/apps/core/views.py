@@ -35,21 +35,21 @@ import datetime
 from django.shortcuts import render
 from django.http import JsonResponse, Http404
 from rest_framework import viewsets, generics, permissions, status, filters
-from .models import Meeting, Resolution, Notification, Referral, FollowUp, UserProfile, ResolutionComment, ResolutionAction, ResolutionView
+from .models import Meeting, Resolution, Notification, Referral, FollowUp, UserProfile, ResolutionComment, ResolutionAction, ResolutionView, jalali_month_of
 from .serializers import (
-    MeetingSerializer, ResolutionSerializer, NotificationSerializer, 
+    MeetingSerializer, ResolutionSerializer, NotificationSerializer, CompactNotificationSerializer,
     ReferralSerializer, FollowUpSerializer, UserSerializer,
     ResolutionCommentSerializer, ResolutionActionSerializer, ResolutionInteractionSerializer
 )
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model, authenticate
 User = get_user_model()
 from django.db.models import Q, Prefetch
 from django.shortcuts import get_object_or_404
-from datetime import date, datetime, timedelta, time
-from django.db.models import Count, Case, When
+from datetime import datetime, timedelta, time
+from django.db.models import Count
 from django.db import transaction
 from django.contrib.auth.models import Group
 from django.utils import timezone
@@ -58,11 +58,25 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.tokens import RefreshToken
 from .consumers import NotificationConsumer
+from .pagination import NotificationCursorPagination, ResolutionCursorPagination
+from .filters import NotificationListFilter, ResolutionListFilter
+from .services.access_policy import ResolutionAccessPolicy
+from .services.stats_service import ResolutionStatsService, StatsCache, jalali_months
+from .services.stage_interval_service import (
+    StageIntervalService, EXECUTION_COMPLETED, DURATION_MIN_SECONDS, DURATION_MAX_SECONDS,
+    duration_distribution
+)
+
+# اکشن‌های تصمیم کاربران برای آمار میانگین مدت زمان همه کاربران
+USER_DURATION_ACTION_TYPES = ('secretary_approved', 'ceo_approved', 'executor_accepted')
+from django_filters.rest_framework import DjangoFilterBackend
 
 from .services.notification_service import NotificationService
+from .services.role_directory import RoleDirectory
+from .services.presence import Presence
+from .services.unread_counter import UnreadCounter
 import pytz
 from django.db.models import OuterRef, Subquery, Max
-from persiantools.jdatetime import JalaliDate
 from collections import defaultdict
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
@@ -153,17 +167,8 @@ class ResolutionViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        user = request.user
         # چک دسترسی دقیقاً مثل سایر viewها
-        has_access = (
-            instance.executor_unit == user or
-            user in instance.coworkers.all() or
-            user in instance.inform_units.all() or
-            user in instance.participants.all() or
-            instance.created_by == user or
-            (hasattr(user, 'profile') and user.profile.position in ['secretary', 'auditor', 'ceo'])
-        )
-        if not has_access:
+        if not ResolutionAccessPolicy(request.user).can_view(instance):
             return Response(
                 {"error": "شما به این مصوبه دسترسی ندارید."},
                 status=status.HTTP_403_FORBIDDEN
@@ -210,6 +215,7 @@ def user_info(request):
     position = getattr(user.profile, 'position', None) if hasattr(user, 'profile') else None
     department = getattr(user.profile, 'department', None) if hasattr(user, 'profile') else None
     position_display = getattr(user.profile, 'position_display', None) if hasattr(user, 'profile') else None
+    email_delivery = getattr(user.profile, 'email_delivery', None) if hasattr(user, 'profile') else None
     
     return Response({
         'id': user.id,
@@ -222,7 +228,8 @@ def user_info(request):
         'profile': {
             'department': department,
             'position_display': position_display,
-            'position': position
+            'position': position,
+            'email_delivery': email_delivery
         }
     })
 
@@ -237,80 +244,72 @@ def user_list(request):
 class SecretaryResolutionListView(generics.ListAPIView):
     serializer_class = ResolutionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ResolutionCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ResolutionListFilter
 
     def get_queryset(self):
         user = self.request.user
         # دبیران، ناظران، مدیرعامل و کارشناس دبیرخانه به همه مصوبات دسترسی دارند
         if (user.groups.filter(name__iexact='secretary').exists() or 
             (hasattr(user, 'profile') and user.profile.position in ['secretary', 'auditor', 'ceo', 'employee'])):
-            return Resolution.objects.all().order_by('-created_at')
-        # سایر کاربران فقط مصوباتی را می‌بینند که وضعیت آن pending_secretary_approval نیست
-        return Resolution.objects.filter(
-            ~Q(status='pending_secretary_approval'),
-            Q(executor_unit=user) |
-            Q(coworkers=user) |
-            Q(inform_units=user)
-        ).distinct().order_by('-created_at')
+            queryset = Resolution.objects.all().order_by('-created_at')
+        else:
+            # سایر کاربران فقط مصوباتی را می‌بینند که وضعیت آن pending_secretary_approval نیست
+            policy = ResolutionAccessPolicy(user)
+            queryset = Resolution.objects.filter(
+                ~Q(status='pending_secretary_approval'),
+                policy.member_q(('executor', 'coworkers', 'inform_units'))
+            ).order_by('-created_at')
+        return ResolutionSerializer.setup_eager_loading(queryset, user)
 
 class UserWorkbenchListView(generics.ListAPIView):
     serializer_class = ResolutionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ResolutionCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ResolutionListFilter
 
     def get_queryset(self):
         user = self.request.user
+        policy = ResolutionAccessPolicy(user)
+        # عضویت با EXISTS بررسی می‌شود تا join و distinct لازم نباشد
+        members = policy.member_q(('executor', 'coworkers', 'inform_units', 'participants'))
         # ناظران، دبیر و مدیرعامل به همه مصوبات دسترسی دارند
-        if hasattr(user, 'profile') and user.profile.position in ['auditor', 'ceo', 'secretary']:
-            return Resolution.objects.all().order_by('-created_at')
+        if policy.has_position('auditor', 'ceo', 'secretary'):
+            queryset = Resolution.objects.all().order_by('-created_at')
         # واحد مجری می‌تواند مصوبه‌های pending_ceo_approval را هم ببیند
-        if Resolution.objects.filter(executor_unit=user).exists():
-            return Resolution.objects.filter(
-                Q(executor_unit=user) |
-                Q(coworkers=user) |
-                Q(inform_units=user) |
-                Q(participants=user)
-            ).distinct().order_by('-created_at')
-        # سایر کاربران فقط مصوباتی را می‌بینند که وضعیت آن pending_ceo_approval یا pending_secretary_approval نیست
-        return Resolution.objects.filter(
-            ~Q(status='pending_ceo_approval'),
-            ~Q(status='pending_secretary_approval'),
-            Q(executor_unit=user) |
-            Q(coworkers=user) |
-            Q(inform_units=user) |
-            Q(participants=user)
-        ).distinct().order_by('-created_at')
-
-    def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        data = serializer.data
-
-        # دریافت لیست مصوبات مشاهده شده توسط کاربر
-        viewed_resolutions = set(str(v) for v in ResolutionView.objects.filter(
-            user=request.user,
-            resolution_id__in=[item['id'] for item in data]
-        ).values_list('resolution_id', flat=True))
-
-        # اضافه کردن فیلد unread به هر مصوبه
-        for item in data:
-            item['unread'] = item['id'] not in viewed_resolutions
-            if not item['unread']:
-                view = ResolutionView.objects.filter(
-                    user=request.user,
-                    resolution_id=item['id']
-                ).first()
-                item['first_viewed_at'] = view.first_viewed_at.isoformat() if view else None
-            else:
-                item['first_viewed_at'] = None
-
-        return Response(data)
+        elif Resolution.objects.filter(executor_unit=user).exists():
+            queryset = Resolution.objects.filter(members).order_by('-created_at')
+        else:
+            # سایر کاربران فقط مصوباتی را می‌بینند که وضعیت آن pending_ceo_approval یا pending_secretary_approval نیست
+            queryset = Resolution.objects.filter(
+                ~Q(status='pending_ceo_approval'),
+                ~Q(status='pending_secretary_approval'),
+                members
+            ).order_by('-created_at')
+        # unread و first_viewed_at از annotate همین queryset خوانده می‌شوند
+        return ResolutionSerializer.setup_eager_loading(queryset, user)
 
 class UserNotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = NotificationListFilter
+
+    def get_serializer_class(self):
+        if self.request.query_params.get('compact') in ('1', 'true'):
+            return CompactNotificationSerializer
+        return NotificationSerializer
 
     def get_queryset(self):
         user = self.request.user
-        return Notification.objects.filter(recipient=user).order_by('-sent_at')
+        return (
+            Notification.objects.filter(recipient=user)
+            .select_related('resolution__meeting')
+            .order_by('-sent_at', '-id')
+        )
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -376,16 +375,9 @@ def test_users(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def mark_notification_read(request, notification_id):
-    try:
-        notification = Notification.objects.get(
-            id=notification_id,
-            recipient=request.user
-        )
-        notification.read = True
-        notification.save()
+    if NotificationService.mark_notification_read(request.user, notification_id):
         return Response({'status': 'success'})
-    except Notification.DoesNotExist:
-        return Response({'error': 'Notification not found'}, status=404)
+    return Response({'error': 'Notification not found'}, status=404)
 
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
@@ -393,10 +385,7 @@ def mark_all_notifications_read(request):
     """Mark all unread notifications as read for the current user"""
     try:
         # Update all unread notifications for the current user
-        updated_count = Notification.objects.filter(
-            recipient=request.user,
-            read=False
-        ).update(read=True)
+        updated_count = NotificationService.mark_all_notifications_read(request.user)
         
         return Response({
             'status': 'success',
@@ -410,9 +399,26 @@ def mark_all_notifications_read(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def unread_notifications_count(request):
-    user = request.user
-    count = Notification.objects.filter(recipient=user, read=False).count()
-    return Response({'count': count})
+    return Response({'count': UnreadCounter.get(request.user.id)})
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def online_users_count(request):
+    """تعداد کاربران متصل به WebSocket (برای پایش)"""
+    return Response({'count': Presence.online_count()})
+
+@api_view(['GET', 'PUT'])
+@permission_classes([IsAuthenticated])
+def notification_preferences(request):
+    """تنظیم نحوه ارسال ایمیل نوتیفیکیشن‌ها (فوری یا خلاصه دوره‌ای)"""
+    profile, _ = UserProfile.objects.get_or_create(user=request.user)
+    if request.method == 'PUT':
+        email_delivery = request.data.get('email_delivery')
+        if email_delivery not in dict(UserProfile.EMAIL_DELIVERY_CHOICES):
+            return Response({'error': 'Invalid email_delivery'}, status=400)
+        profile.email_delivery = email_delivery
+        profile.save(update_fields=['email_delivery'])
+    return Response({'email_delivery': profile.email_delivery})
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -544,26 +550,17 @@ def resolution_detail_interaction(request, public_id):
             'participants'
         ).select_related('meeting', 'executor_unit').get(public_id=public_id)
         user = request.user
-        # ثبت اولین مشاهده
-        ResolutionView.objects.get_or_create(user=user, resolution=resolution)
         
         # بررسی دسترسی
-        has_access = (
-            resolution.executor_unit == user or
-            user in resolution.coworkers.all() or
-            user in resolution.inform_units.all() or
-            user in resolution.participants.all() or
-            resolution.created_by == user or
-            hasattr(user, 'profile') and user.profile.position == 'secretary' or
-            hasattr(user, 'profile') and user.profile.position == 'auditor'
-        )
-        
-        if not has_access:
+        if not ResolutionAccessPolicy(user).can_view(resolution):
             return Response(
                 {"error": "شما به این مصوبه دسترسی ندارید."}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
+        # ثبت اولین مشاهده
+        ResolutionView.objects.get_or_create(user=user, resolution=resolution)
+        
         serializer = ResolutionInteractionSerializer(resolution, context={'request': request})
         return Response(serializer.data)
         
@@ -582,15 +579,7 @@ def add_resolution_comment(request, public_id):
         
         # بررسی دسترسی
         user = request.user
-        has_access = (
-            resolution.executor_unit == user or
-            user in resolution.coworkers.all() or
-            user in resolution.inform_units.all() or
-            user in resolution.participants.all() or
-            resolution.created_by == user
-        )
-        
-        if not has_access:
+        if not ResolutionAccessPolicy(user).can_act(resolution):
             return Response(
                 {"error": "شما به این مصوبه دسترسی ندارید."}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -604,9 +593,8 @@ def add_resolution_comment(request, public_id):
         if serializer.is_valid():
             comment = serializer.save(author=user, resolution=resolution)
             
-            # اگر کاربر در participants نیست، اضافه‌اش کن
-            if user not in resolution.participants.all():
-                resolution.participants.add(user)
+            # اگر کاربر در participants نیست، اضافه‌اش کن (add تکراری را نادیده می‌گیرد)
+            resolution.participants.add(user)
             
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -698,12 +686,7 @@ def refer_resolution(request, public_id):
         
         # بررسی دسترسی - مجری و همکاران می‌توانند ارجاع دهند
         user = request.user
-        can_refer = (
-            resolution.executor_unit == user or
-            user in resolution.coworkers.all()
-        )
-        
-        if not can_refer:
+        if not ResolutionAccessPolicy(user).can_refer(resolution):
             return Response(
                 {"error": "شما مجاز به ارجاع این مصوبه نیستید."}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -759,14 +742,13 @@ def refer_resolution(request, public_id):
         )
         
         # ایجاد نوتیفیکیشن برای کاربران ارجاع شده
-        for user_obj in users:
-            meeting_num = to_persian_numbers(str(resolution.meeting.number))
-            clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
-            NotificationService.create_notification(
-                recipient=user_obj,
-                message=f"مصوبه جلسه {meeting_num} بند {clause_subclause} به شما ارجاع داده شده است.",
-                resolution=resolution
-            )
+        meeting_num = to_persian_numbers(str(resolution.meeting.number))
+        clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
+        NotificationService.create_bulk_notifications(
+            users,
+            f"مصوبه جلسه {meeting_num} بند {clause_subclause} به شما ارجاع داده شده است.",
+            resolution=resolution
+        )
         
         return Response({
             "message": "ارجاع با موفقیت انجام شد.",
@@ -795,6 +777,40 @@ def get_subordinates_for_referral(request):
     
     return Response({"subordinates": serializer.data})
 
+def _chat_participants(resolution):
+    """
+    لیست کاربرانی که در چت مصوبه حضور دارند
+
+    بعد از قبول: مجری، همکاران، واحدهای اطلاع‌رسانی و participants (به جز دبیر)؛
+    در حالت‌های گفتگو فقط واحد مجری. ناظران و مدیرعامل در همه مراحل اضافه می‌شوند.
+    """
+    chat_participants = []
+    if resolution.status in ['in_progress', 'completed']:
+        if resolution.executor_unit:
+            chat_participants.append(resolution.executor_unit)
+        chat_participants.extend(resolution.coworkers.select_related('profile'))
+        chat_participants.extend(resolution.inform_units.select_related('profile'))
+        chat_participants.extend(
+            resolution.participants.select_related('profile').exclude(profile__position='secretary')
+        )
+    elif resolution.status in ['notified', 'pending_ceo_approval', 'returned_to_secretary']:
+        # فقط واحد مجری (دبیر حذف شد)
+        if resolution.executor_unit:
+            chat_participants.append(resolution.executor_unit)
+
+    # ناظران و مدیرعامل در همه مراحل
+    chat_participants.extend(RoleDirectory.users('auditor'))
+    chat_participants.extend(RoleDirectory.users('ceo'))
+
+    # حذف تکرارها با حفظ ترتیب
+    seen = set()
+    unique_participants = []
+    for participant in chat_participants:
+        if participant.id not in seen:
+            seen.add(participant.id)
+            unique_participants.append(participant)
+    return unique_participants
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def resolution_interactions(request, public_id):
@@ -803,51 +819,16 @@ def resolution_interactions(request, public_id):
         resolution = get_object_or_404(Resolution, public_id=public_id)
         user = request.user
         
-        # منطق دسترسی جدید بر اساس وضعیت مصوبه
-        is_secretary = hasattr(user, 'profile') and user.profile.position == 'secretary'
-        is_auditor = hasattr(user, 'profile') and user.profile.position == 'auditor'
-        is_executor = resolution.executor_unit == user
-        is_creator = resolution.created_by == user
-        is_ceo = hasattr(user, 'profile') and user.profile.position == 'ceo'
+        # منطق دسترسی بر اساس وضعیت مصوبه (سیاست دسترسی متمرکز)
+        policy = ResolutionAccessPolicy(user)
+        is_secretary = policy.is_secretary
+        is_executor = policy.is_executor(resolution)
         
         # دسترسی به مشاهده تعاملات (همه می‌توانند ببینند)
-        view_access = (
-            is_secretary or is_auditor or is_executor or is_creator or
-            (hasattr(user, 'profile') and user.profile.position == 'ceo') or  # مدیرعامل می‌تواند ببیند
-            user in resolution.coworkers.all() or
-            user in resolution.inform_units.all() or
-            user in resolution.participants.all()
-        )
+        view_access = policy.can_view(resolution)
         
         # دسترسی به ارسال پیام (محدود بر اساس وضعیت)
-        if resolution.status == 'notified':
-            # فقط دبیر، واحد مجری، ناظر و مدیرعامل می‌توانند چت کنند
-            chat_access = is_secretary or is_executor or is_auditor or (hasattr(user, 'profile') and user.profile.position == 'ceo')
-        elif resolution.status == 'pending_ceo_approval':
-            # در حالت گفتگو، فقط دبیر، معاون، ناظر و مدیرعامل می‌توانند چت کنند
-            chat_access = is_secretary or is_executor or is_auditor or (hasattr(user, 'profile') and user.profile.position == 'ceo')
-        elif resolution.status == 'returned_to_secretary':
-            # در حالت گفتگو، فقط دبیر، معاون، ناظر و مدیرعامل می‌توانند چت کنند
-            chat_access = is_secretary or is_executor or is_auditor or (hasattr(user, 'profile') and user.profile.position == 'ceo')
-        elif resolution.status in ['in_progress', 'completed']:
-            # بعد از قبول، واحد مجری، همکاران، ناظر و مدیرعامل می‌توانند چت کنند (دبیر خیر)
-            chat_access = (
-                is_executor or
-                user in resolution.coworkers.all() or
-                user in resolution.inform_units.all() or
-                user in resolution.participants.all() or
-                is_auditor or  # ناظر می‌تواند چت را ببیند
-                (hasattr(user, 'profile') and user.profile.position == 'ceo')  # مدیرعامل می‌تواند چت را ببیند
-            ) and not is_secretary  # فقط دبیر منع شده
-        else:
-            # در سایر حالات (مثل cancelled)، همه participants می‌توانند چت کنند
-            chat_access = (
-                is_executor or is_creator or
-                user in resolution.coworkers.all() or
-                user in resolution.inform_units.all() or
-                user in resolution.participants.all() or
-                (hasattr(user, 'profile') and user.profile.position == 'ceo')  # مدیرعامل می‌تواند چت کند
-            )
+        chat_access = view_access and policy.can_chat(resolution)
         
         # برای مشاهده کافی است view_access داشته باشد
         if not view_access:
@@ -862,55 +843,7 @@ def resolution_interactions(request, public_id):
             serializer = ResolutionCommentSerializer(comments, many=True)
             
             # تعیین participants که دسترسی چت دارند
-            chat_participants = []
-            if resolution.status in ['in_progress', 'completed']:
-                # بعد از قبول: مجری، همکاران، واحدهای اطلاع‌رسانی
-                if resolution.executor_unit:
-                    chat_participants.append(resolution.executor_unit)
-                
-                for participant in resolution.coworkers.all():
-                    if participant not in chat_participants:
-                        chat_participants.append(participant)
-                        
-                for participant in resolution.inform_units.all():
-                    if participant not in chat_participants:
-                        chat_participants.append(participant)
-                        
-                for participant in resolution.participants.all():
-                    if participant not in chat_participants:
-                        # فقط اگر دبیر نباشه
-                        if not (hasattr(participant, 'profile') and participant.profile.position == 'secretary'):
-                            chat_participants.append(participant)
-            elif resolution.status == 'notified':
-                # فقط واحد مجری (دبیر حذف شد)
-                if resolution.executor_unit:
-                    chat_participants.append(resolution.executor_unit)
-            elif resolution.status == 'pending_ceo_approval':
-                # فقط واحد مجری (دبیر حذف شد)
-                if resolution.executor_unit:
-                    chat_participants.append(resolution.executor_unit)
-            elif resolution.status == 'returned_to_secretary':
-                # فقط واحد مجری (دبیر حذف شد)
-                if resolution.executor_unit:
-                    chat_participants.append(resolution.executor_unit)
-            
-            # اضافه کردن همه ناظران به لیست چت در همه مراحل
-            auditors = User.objects.filter(profile__position='auditor')
-            for auditor in auditors:
-                if auditor not in chat_participants:
-                    chat_participants.append(auditor)
-            
-            # اضافه کردن مدیرعامل به لیست چت در همه مراحل
-            ceos = User.objects.filter(profile__position='ceo')
-            for ceo in ceos:
-                if ceo not in chat_participants:
-                    chat_participants.append(ceo)
-            
-            # حذف تکرارها
-            unique_participants = []
-            for p in chat_participants:
-                if p not in unique_participants:
-                    unique_participants.append(p)
+            unique_participants = _chat_participants(resolution)
             
             # اضافه کردن اطلاعات دسترسی برای فرانت‌اند
             response_data = {
@@ -941,55 +874,7 @@ def resolution_interactions(request, public_id):
                     )
             
             # تعیین participants که دسترسی چت دارند (برای POST)
-            chat_participants = []
-            if resolution.status in ['in_progress', 'completed']:
-                # بعد از قبول: مجری، همکاران، واحدهای اطلاع‌رسانی
-                if resolution.executor_unit:
-                    chat_participants.append(resolution.executor_unit)
-                
-                for participant in resolution.coworkers.all():
-                    if participant not in chat_participants:
-                        chat_participants.append(participant)
-                        
-                for participant in resolution.inform_units.all():
-                    if participant not in chat_participants:
-                        chat_participants.append(participant)
-                        
-                for participant in resolution.participants.all():
-                    if participant not in chat_participants:
-                        # فقط اگر دبیر نباشه
-                        if not (hasattr(participant, 'profile') and participant.profile.position == 'secretary'):
-                            chat_participants.append(participant)
-            elif resolution.status == 'notified':
-                # فقط واحد مجری (دبیر حذف شد)
-                if resolution.executor_unit:
-                    chat_participants.append(resolution.executor_unit)
-            elif resolution.status == 'pending_ceo_approval':
-                # فقط واحد مجری (دبیر حذف شد)
-                if resolution.executor_unit:
-                    chat_participants.append(resolution.executor_unit)
-            elif resolution.status == 'returned_to_secretary':
-                # فقط واحد مجری (دبیر حذف شد)
-                if resolution.executor_unit:
-                    chat_participants.append(resolution.executor_unit)
-            
-            # اضافه کردن همه ناظران به لیست چت در همه مراحل (برای POST)
-            auditors = User.objects.filter(profile__position='auditor')
-            for auditor in auditors:
-                if auditor not in chat_participants:
-                    chat_participants.append(auditor)
-            
-            # اضافه کردن مدیرعامل به لیست چت در همه مراحل (برای POST)
-            ceos = User.objects.filter(profile__position='ceo')
-            for ceo in ceos:
-                if ceo not in chat_participants:
-                    chat_participants.append(ceo)
-            
-            # حذف تکرارها
-            unique_participants = []
-            for p in chat_participants:
-                if p not in unique_participants:
-                    unique_participants.append(p)
+            unique_participants = _chat_participants(resolution)
             
             # اضافه کردن تعامل جدید
             content = request.data.get('content', '')
@@ -1072,9 +957,8 @@ def resolution_interactions(request, public_id):
                     if mentioned_user != user and mentioned_user not in notify_users:
                         notify_users.append(mentioned_user)
             
-            # اگر کاربر در participants نیست، اضافه‌اش کن
-            if user not in resolution.participants.all():
-                resolution.participants.add(user)
+            # اگر کاربر در participants نیست، اضافه‌اش کن (add تکراری را نادیده می‌گیرد)
+            resolution.participants.add(user)
             
             # اضافه کردن کاربری که پیامش reply شده به لیست نوتیف
             if reply_to_comment and reply_to_comment.author != user:
@@ -1084,27 +968,27 @@ def resolution_interactions(request, public_id):
             # ارسال نوتیفیکیشن فقط برای:
             # 1. کاربران mention شده
             # 2. کاربری که پیامش reply شده
-            for participant in notify_users:
-                if mentions_data and participant.id in mentions_data:
-                    # نوتیف برای mention
-                    meeting_num = to_persian_numbers(str(resolution.meeting.number))
-                    clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
-                    message = f"شما در مصوبه جلسه {meeting_num} بند {clause_subclause} نام‌برده شدید."
-                    NotificationService.create_notification(
-                        recipient=participant,
-                        message=message,
-                        resolution=resolution
-                    )
-                elif reply_to_comment and participant == reply_to_comment.author:
-                    # نوتیف برای reply
-                    meeting_num = to_persian_numbers(str(resolution.meeting.number))
-                    clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
-                    message = f"به پیام شما در مصوبه جلسه {meeting_num} بند {clause_subclause} پاسخ داده شد."
-                    NotificationService.create_notification(
-                        recipient=participant,
-                        message=message,
-                        resolution=resolution
-                    )
+            meeting_num = to_persian_numbers(str(resolution.meeting.number))
+            clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
+            mentioned = [participant for participant in notify_users if mentions_data and participant.id in mentions_data]
+            replied = [
+                participant for participant in notify_users
+                if participant not in mentioned and reply_to_comment and participant == reply_to_comment.author
+            ]
+            # نوتیف برای mention
+            NotificationService.create_bulk_notifications(
+                mentioned,
+                f"شما در مصوبه جلسه {meeting_num} بند {clause_subclause} نام‌برده شدید.",
+                resolution=resolution,
+                kind='chat_mention'
+            )
+            # نوتیف برای reply
+            NotificationService.create_bulk_notifications(
+                replied,
+                f"به پیام شما در مصوبه جلسه {meeting_num} بند {clause_subclause} پاسخ داده شد.",
+                resolution=resolution,
+                kind='chat_reply'
+            )
             
             # Send WebSocket notification for new interaction
             from .consumers import NotificationConsumer
@@ -1133,18 +1017,8 @@ def resolution_progress(request, public_id):
         
         # بررسی دسترسی
         user = request.user
-        has_access = (
-            resolution.executor_unit == user or
-            user in resolution.coworkers.all() or
-            user in resolution.inform_units.all() or
-            user in resolution.participants.all() or
-            resolution.created_by == user or
-            (hasattr(user, 'profile') and user.profile.position == 'secretary') or
-            (hasattr(user, 'profile') and user.profile.position == 'auditor') or
-            (hasattr(user, 'profile') and user.profile.position == 'ceo')
-        )
-        
-        if not has_access:
+        policy = ResolutionAccessPolicy(user)
+        if not policy.can_view(resolution):
             return Response(
                 {"error": "شما به این مصوبه دسترسی ندارید."}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -1158,8 +1032,7 @@ def resolution_progress(request, public_id):
         
         elif request.method == 'POST':
             # بررسی مجوز برای بروزرسانی - ناظران فقط می‌توانند مشاهده کنند
-            is_auditor = hasattr(user, 'profile') and user.profile.position == 'auditor'
-            if is_auditor:
+            if policy.is_auditor:
                 return Response(
                     {"error": "ناظران فقط می‌توانند پیشرفت را مشاهده کنند، نه به‌روزرسانی کنند."}, 
                     status=status.HTTP_403_FORBIDDEN
@@ -1216,37 +1089,19 @@ def resolution_progress(request, public_id):
                 related_comment=comment
             )
             
-            # اگر کاربر در participants نیست، اضافه‌اش کن
-            if user not in resolution.participants.all():
-                resolution.participants.add(user)
+            # اگر کاربر در participants نیست، اضافه‌اش کن (add تکراری را نادیده می‌گیرد)
+            resolution.participants.add(user)
             
-            # ایجاد نوتیفیکیشن برای سایر participants
-            participants = resolution.get_all_participants()
-            for participant in participants:
-                if participant != user:  # خودش نوتیف نگیره
-                    meeting_num = to_persian_numbers(str(resolution.meeting.number))
-                    clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
-                    progress_persian = to_persian_numbers(str(progress))
-                    NotificationService.create_notification(
-                        recipient=participant,
-                        message=f"پیشرفت مصوبه جلسه {meeting_num} بند {clause_subclause} به {progress_persian}% رسید.",
-                        resolution=resolution
-                    )
-
-            # ایجاد نوتیفیکیشن برای همه ناظرها
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            auditors = User.objects.filter(profile__position='auditor')
-            for auditor in auditors:
-                if auditor != user and auditor not in participants:
-                    meeting_num = to_persian_numbers(str(resolution.meeting.number))
-                    clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
-                    progress_persian = to_persian_numbers(str(progress))
-                    NotificationService.create_notification(
-                        recipient=auditor,
-                        message=f"پیشرفت مصوبه جلسه {meeting_num} بند {clause_subclause} به {progress_persian}% رسید.",
-                        resolution=resolution
-                    )
+            # ایجاد نوتیفیکیشن برای سایر participants و همه ناظرها (خودش نوتیف نگیره)
+            meeting_num = to_persian_numbers(str(resolution.meeting.number))
+            clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
+            progress_persian = to_persian_numbers(str(progress))
+            NotificationService.create_bulk_notifications(
+                resolution.get_all_participants() + RoleDirectory.users('auditor'),
+                f"پیشرفت مصوبه جلسه {meeting_num} بند {clause_subclause} به {progress_persian}% رسید.",
+                resolution=resolution,
+                exclude=user
+            )
             
             # برگرداندن داده‌های کامنت با ساختار مناسب برای فرانت‌اند
             response_data = {
@@ -1403,13 +1258,11 @@ def return_resolution(request, public_id):
         clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
         
         # اطمینان از اینکه همه مدیرعامل‌ها نوتیف بگیرند
-        ceos = User.objects.filter(profile__position='ceo')
-        for ceo in ceos:
-            NotificationService.create_notification(
-                recipient=ceo,
-                message=f"مصوبه جلسه {meeting_num} بند {clause_subclause} توسط واحد مجری برگشت داده شد.\nدلیل: {reason}",
-                resolution=resolution
-            )
+        NotificationService.create_bulk_notifications(
+            RoleDirectory.user_ids('ceo'),
+            f"مصوبه جلسه {meeting_num} بند {clause_subclause} توسط واحد مجری برگشت داده شد.\nدلیل: {reason}",
+            resolution=resolution
+        )
         
         return Response(
             {"message": "مصوبه با موفقیت به مدیرعامل برگشت داده شد.", "status": resolution.status}, 
@@ -1535,15 +1388,13 @@ def edit_resolution(request, public_id):
                     )
                     
                     # ایجاد نوتیفیکیشن برای مدیرعامل
-                    ceos = User.objects.filter(profile__position='ceo')
-                    for ceo in ceos:
-                        meeting_num = to_persian_numbers(str(updated_resolution.meeting.number))
-                        clause_subclause = to_persian_numbers(f"{updated_resolution.clause}-{updated_resolution.subclause}")
-                        NotificationService.create_notification(
-                            recipient=ceo,
-                            message=f"مصوبه جلسه {meeting_num} بند {clause_subclause} ویرایش شده و برای تایید ارسال شده است.",
-                            resolution=updated_resolution
-                        )
+                    meeting_num = to_persian_numbers(str(updated_resolution.meeting.number))
+                    clause_subclause = to_persian_numbers(f"{updated_resolution.clause}-{updated_resolution.subclause}")
+                    NotificationService.create_bulk_notifications(
+                        RoleDirectory.user_ids('ceo'),
+                        f"مصوبه جلسه {meeting_num} بند {clause_subclause} ویرایش شده و برای تایید ارسال شده است.",
+                        resolution=updated_resolution
+                    )
                 else:
                     # اگر مدیرعامل ویرایش کند، وضعیت بر اساس نوع مصوبه تغییر کند
                     if updated_resolution.type == 'informational':
@@ -1663,20 +1514,20 @@ def add_resolution_participants(request, public_id):
                     )
         
         # اضافه کردن کاربران به participants
-        added_count = 0
-        for participant in participants:
-            if participant not in resolution.participants.all():
-                resolution.participants.add(participant)
-                added_count += 1
-                
-                # ایجاد نوتیفیکیشن برای عضو جدید
-                meeting_num = to_persian_numbers(str(resolution.meeting.number))
-                clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
-                NotificationService.create_notification(
-                    recipient=participant,
-                    message=f"شما به گروه پیگیری مصوبه جلسه {meeting_num} بند {clause_subclause} اضافه شدید.",
-                    resolution=resolution
-                )
+        existing_ids = set(resolution.participants.values_list('id', flat=True))
+        new_participants = [participant for participant in participants if participant.id not in existing_ids]
+        added_count = len(new_participants)
+        if new_participants:
+            resolution.participants.add(*new_participants)
+            
+            # ایجاد نوتیفیکیشن برای اعضای جدید
+            meeting_num = to_persian_numbers(str(resolution.meeting.number))
+            clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
+            NotificationService.create_bulk_notifications(
+                new_participants,
+                f"شما به گروه پیگیری مصوبه جلسه {meeting_num} بند {clause_subclause} اضافه شدید.",
+                resolution=resolution
+            )
         
         if added_count == 0:
             return Response(
@@ -1843,55 +1694,28 @@ def auditor_stats(request):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # آمار کلی مصوبات
-        total_resolutions = Resolution.objects.count()
-        operational_resolutions = Resolution.objects.filter(type='operational').count()
-        informational_resolutions = Resolution.objects.filter(type='informational').count()
-        
-        # آمار مصوبات عملیاتی (فقط عملیاتی)
-        completed_resolutions = Resolution.objects.filter(status='completed', type='operational').count()
-        cancelled_resolutions = Resolution.objects.filter(status='cancelled', type='operational').count()
-        notified_resolutions = Resolution.objects.filter(status='notified', type='operational').count()
-        pending_resolutions = Resolution.objects.filter(status='in_progress', type='operational').count()
-        returned_resolutions = Resolution.objects.filter(status='returned_to_secretary', type='operational').count()
-        
-        # آمار انتظار تایید
-        pending_ceo_approval = Resolution.objects.filter(status='pending_ceo_approval').count()
-        pending_secretary_approval = Resolution.objects.filter(status='pending_secretary_approval').count()
-        pending_approval = pending_ceo_approval + pending_secretary_approval
-        
-        # مصوبات عقب افتاده (فقط عملیاتی)
-        today = date.today()
-        overdue_resolutions = Resolution.objects.filter(
-            deadline__lt=today,
-            status__in=['notified', 'in_progress'],
-            type='operational'
-        ).count()
-        
-        # آمار جلسات
-        total_meetings = Meeting.objects.count()
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_meetings = Meeting.objects.filter(held_at__gte=thirty_days_ago).count()
-        
-        # تعداد واحدهای فعال (واحدهایی که حداقل یک مصوبه دارند)
-        active_executors = Resolution.objects.filter(executor_unit__isnull=False).values('executor_unit').distinct().count()
+        # همه شمارنده‌ها از موتور آمار (یک کوئری برای مصوبات، یک کوئری برای جلسات)
+        stats = ResolutionStatsService.global_stats()
+        pending_ceo_approval = stats['pending_ceo_approval']
+        pending_secretary_approval = stats['pending_secretary_approval']
         
         return Response({
-            'total_resolutions': total_resolutions,
-            'operational_resolutions': operational_resolutions,
-            'informational_resolutions': informational_resolutions,
-            'completed_resolutions': completed_resolutions,
-            'cancelled_resolutions': cancelled_resolutions,
-            'notified_resolutions': notified_resolutions,
-            'pending_resolutions': pending_resolutions,
-            'returned_resolutions': returned_resolutions,
-            'overdue_resolutions': overdue_resolutions,
-            'total_meetings': total_meetings,
-            'recent_meetings': recent_meetings,
-            'active_executors': active_executors,
+            'total_resolutions': stats['total'],
+            'operational_resolutions': stats['operational'],
+            'informational_resolutions': stats['informational'],
+            # آمار مصوبات عملیاتی (فقط عملیاتی)
+            'completed_resolutions': stats['completed_operational'],
+            'cancelled_resolutions': stats['cancelled_operational'],
+            'notified_resolutions': stats['notified_operational'],
+            'pending_resolutions': stats['in_progress_operational'],
+            'returned_resolutions': stats['returned_to_secretary_operational'],
+            'overdue_resolutions': stats['overdue_operational'],
+            'total_meetings': stats['total_meetings'],
+            'recent_meetings': stats['recent_meetings'],
+            'active_executors': stats['active_executors'],
             'pending_ceo_approval': pending_ceo_approval,
             'pending_secretary_approval': pending_secretary_approval,
-            'pending_approval': pending_approval,
+            'pending_approval': pending_ceo_approval + pending_secretary_approval,
         })
         
     except Exception as e:
@@ -1905,61 +1729,30 @@ def auditor_stats(request):
 def dashboard_stats(request):
     """آمار داشبورد - اطلاعات کلی مصوبات"""
     try:
-        from django.db.models import Count, Q
-        from datetime import date
-        
-        # 1. تعداد کل مصوبات
-        total_resolutions = Resolution.objects.count()
-        
-        # 2. تعداد مصوبات به تفکیک نوع
-        operational_resolutions = Resolution.objects.filter(type='operational').count()
-        informational_resolutions = Resolution.objects.filter(type='informational').count()
-        
-        # 3. تعداد مصوبات در انتظار تایید دبیر
-        pending_secretary_approval = Resolution.objects.filter(status='pending_secretary_approval').count()
-        
-        # 4. تعداد مصوبات در انتظار تایید مدیرعامل
-        pending_ceo_approval = Resolution.objects.filter(status='pending_ceo_approval').count()
-        
-        # 5. تعداد مصوبات در انتظار تایید واحد مجری
+        # آمار مشترک (یک کوئری با شمارنده‌های فیلترشده) و آمار کاربر جاری
+        stats = ResolutionStatsService.global_stats()
+        user_stats = ResolutionStatsService.user_counts(request.user)
+        
+        total_resolutions = stats['total']
+        operational_resolutions = stats['operational']
+        informational_resolutions = stats['informational']
+        pending_secretary_approval = stats['pending_secretary_approval']
+        pending_ceo_approval = stats['pending_ceo_approval']
         # مصوباتی که وضعیت "در حال ابلاغ" دارند و هنوز توسط واحد مجری پذیرفته نشده‌اند
-        pending_executor_approval = Resolution.objects.filter(
-            status='notified',
-            executor_unit__isnull=False
-        ).count()
-        
-        # آمار اضافی برای داشبورد
-        completed_resolutions = Resolution.objects.filter(status='completed').count()
-        in_progress_resolutions = Resolution.objects.filter(status='in_progress').count()
-        cancelled_resolutions = Resolution.objects.filter(status='cancelled').count()
-        
-        # مصوبات عقب افتاده
-        today = date.today()
-        overdue_resolutions = Resolution.objects.filter(
-            deadline__lt=today,
-            status__in=['notified', 'in_progress']
-        ).count()
-        
-        # آمار جلسات
-        total_meetings = Meeting.objects.count()
+        pending_executor_approval = stats['pending_executor']
+        completed_resolutions = stats['completed']
+        in_progress_resolutions = stats['in_progress']
+        cancelled_resolutions = stats['cancelled']
+        overdue_resolutions = stats['overdue']
+        total_meetings = stats['total_meetings']
         
         # تعداد تسک‌های pending کاربر جاری و نقش‌های خاص
-        user = request.user
-        from django.db.models import Q
-        # دبیر
-        pending_tasks_secretary = Resolution.objects.filter(status='pending_secretary_approval').count()
-        # مدیرعامل
-        pending_tasks_ceo = Resolution.objects.filter(status='pending_ceo_approval').count()
+        pending_tasks_secretary = pending_secretary_approval
+        pending_tasks_ceo = pending_ceo_approval
         # مجری (فقط مصوباتی که مجری خود کاربر است و notified)
-        pending_tasks_executor = Resolution.objects.filter(
-            status='notified',
-            executor_unit=user
-        ).count()
+        pending_tasks_executor = user_stats['pending_tasks_executor']
         # حالت قبلی (برای کاربر عادی یا سایر نقش‌ها)
-        my_pending_tasks = Resolution.objects.filter(
-            Q(executor_unit=user) | Q(coworkers=user) | Q(inform_units=user) | Q(participants=user),
-            status__in=['in_progress', 'notified', 'pending_ceo_approval', 'pending_secretary_approval']
-        ).distinct().count()
+        my_pending_tasks = user_stats['my_pending_tasks']
         
         return Response({
             # آمار اصلی درخواستی
@@ -2054,34 +1847,8 @@ def recent_resolutions(request):
 def resolutions_by_unit(request):
     """آمار مصوبات به تفکیک واحد مجری برای نمودار (برای همه کاربران لاگین‌شده)"""
     try:
-        # آمار مصوبات به تفکیک واحد مجری
-        unit_stats = Resolution.objects.select_related('executor_unit').values(
-            'executor_unit__first_name', 
-            'executor_unit__last_name', 
-            'executor_unit__username'
-        ).annotate(
-            total_count=Count('id'),
-            completed_count=Count(Case(When(status='completed', then=1))),
-            notified_count=Count(Case(When(status='notified', then=1))),
-            pending_count=Count(Case(When(status='in_progress', then=1))),
-            returned_count=Count(Case(When(status='returned_to_secretary', then=1))),
-            cancelled_count=Count(Case(When(status='cancelled', then=1)))
-        ).filter(executor_unit__isnull=False).order_by('-total_count')[:10]  # فقط 10 واحد برتر
-        # تبدیل به فرمت مناسب برای نمودار
-        data = []
-        for stat in unit_stats:
-            unit_name = f"{stat['executor_unit__first_name']} {stat['executor_unit__last_name']}".strip()
-            if not unit_name:
-                unit_name = stat['executor_unit__username']
-            data.append({
-                'unit_name': unit_name,
-                'total_count': stat['total_count'],
-                'completed_count': stat['completed_count'],
-                'notified_count': stat['notified_count'],
-                'pending_count': stat['pending_count'],
-                'returned_count': stat['returned_count'],
-                'cancelled_count': stat['cancelled_count'],
-            })
+        # آمار مشترک همه کاربران؛ از کش (باطل‌سازی با تغییر مصوبات)
+        data = StatsCache.get_or_compute('resolutions_by_unit', ResolutionStatsService.unit_breakdown)
         return Response(data)
     except Exception as e:
         return Response({"error": f"خطا در دریافت آمار واحدها: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -2093,39 +1860,18 @@ def unit_notified_resolutions(request):
     try:
         user = request.user
         position = getattr(user.profile, 'position', None) if hasattr(user, 'profile') else None
-        # اگر کاربر ناظر یا مدیرعامل است، آمار همه واحدها را بده
+        # اگر کاربر ناظر یا مدیرعامل است، آمار همه واحدها را بده (بخش سراسری کش)
         if position in ['auditor', 'ceo', 'secretary']:
-            from django.db.models import Count
-            from apps.core.models import UserProfile
-            units = UserProfile.objects.filter(position='deputy')
-            data = []
-            for unit in units:
-                notified_count = Resolution.objects.filter(
-                    executor_unit=unit.user,
-                    status='notified'
-                ).count()
-                unit_name = unit.user.get_full_name() or unit.user.username
-                data.append({
-                    'unit_name': unit_name,
-                    'notified_count': notified_count
-                })
+            data = StatsCache.get_or_compute(
+                'deputy_notified_counts', ResolutionStatsService.deputy_notified_counts
+            )
             return Response(data)
-        # اگر کاربر deputy است، فقط آمار خودش را بده
-        if position == 'deputy':
-            notified_count = Resolution.objects.filter(
-                executor_unit=user,
-                status='notified'
-            ).count()
-            unit_name = user.get_full_name() or user.username
-            return Response({
-                'unit_name': unit_name,
-                'notified_count': notified_count
-            })
-        # سایر کاربران: آمار واحد خودشان (در صورت وجود)
-        notified_count = Resolution.objects.filter(
-            executor_unit=user,
-            status='notified'
-        ).count()
+        # deputy و سایر کاربران: آمار واحد خودشان (بخش کاربر کش)
+        notified_count = StatsCache.get_or_compute(
+            'notified_count',
+            lambda: Resolution.objects.filter(executor_unit=user, status='notified').count(),
+            user=user
+        )
         unit_name = user.get_full_name() or user.username
         return Response({
             'unit_name': unit_name,
@@ -2570,51 +2316,24 @@ def ceo_stats(request):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # آمار کلی مصوبات
-        total_resolutions = Resolution.objects.count()
-        operational_resolutions = Resolution.objects.filter(type='operational').count()
-        informational_resolutions = Resolution.objects.filter(type='informational').count()
-        
-        # آمار مصوبات عملیاتی (فقط عملیاتی)
-        completed_resolutions = Resolution.objects.filter(status='completed', type='operational').count()
-        cancelled_resolutions = Resolution.objects.filter(status='cancelled', type='operational').count()
-        notified_resolutions = Resolution.objects.filter(status='notified', type='operational').count()
-        pending_resolutions = Resolution.objects.filter(status='in_progress', type='operational').count()
-        returned_resolutions = Resolution.objects.filter(status='returned_to_secretary', type='operational').count()
-        
-        # مصوبات در انتظار تایید مدیرعامل (وضعیت جدید)
-        pending_ceo_approval = Resolution.objects.filter(status='pending_ceo_approval', type='operational').count()
-        
-        # مصوبات عقب افتاده (فقط عملیاتی)
-        today = date.today()
-        overdue_resolutions = Resolution.objects.filter(
-            deadline__lt=today,
-            status__in=['notified', 'in_progress'],
-            type='operational'
-        ).count()
-        
-        # آمار جلسات
-        total_meetings = Meeting.objects.count()
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_meetings = Meeting.objects.filter(held_at__gte=thirty_days_ago).count()
-        
-        # تعداد واحدهای فعال (واحدهایی که حداقل یک مصوبه دارند)
-        active_executors = Resolution.objects.filter(executor_unit__isnull=False).values('executor_unit').distinct().count()
+        stats = ResolutionStatsService.global_stats()
         
         return Response({
-            'total_resolutions': total_resolutions,
-            'operational_resolutions': operational_resolutions,
-            'informational_resolutions': informational_resolutions,
-            'completed_resolutions': completed_resolutions,
-            'cancelled_resolutions': cancelled_resolutions,
-            'notified_resolutions': notified_resolutions,
-            'pending_resolutions': pending_resolutions,
-            'returned_resolutions': returned_resolutions,
-            'overdue_resolutions': overdue_resolutions,
-            'total_meetings': total_meetings,
-            'recent_meetings': recent_meetings,
-            'active_executors': active_executors,
-            'pending_approval': pending_ceo_approval,
+            'total_resolutions': stats['total'],
+            'operational_resolutions': stats['operational'],
+            'informational_resolutions': stats['informational'],
+            # آمار مصوبات عملیاتی (فقط عملیاتی)
+            'completed_resolutions': stats['completed_operational'],
+            'cancelled_resolutions': stats['cancelled_operational'],
+            'notified_resolutions': stats['notified_operational'],
+            'pending_resolutions': stats['in_progress_operational'],
+            'returned_resolutions': stats['returned_to_secretary_operational'],
+            'overdue_resolutions': stats['overdue_operational'],
+            'total_meetings': stats['total_meetings'],
+            'recent_meetings': stats['recent_meetings'],
+            'active_executors': stats['active_executors'],
+            # مصوبات در انتظار تایید مدیرعامل (وضعیت جدید)
+            'pending_approval': stats['pending_ceo_approval_operational'],
         })
         
     except Exception as e:
@@ -2669,10 +2388,11 @@ def approve_resolution_by_ceo(request, public_id):
             related_action=action
         )
         
+        meeting_num = to_persian_numbers(str(resolution.meeting.number))
+        clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
+
         # ایجاد نوتیفیکیشن برای مجری (فقط عملیاتی)
         if resolution.type != 'informational' and resolution.executor_unit:
-            meeting_num = to_persian_numbers(str(resolution.meeting.number))
-            clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
             NotificationService.create_notification(
                 recipient=resolution.executor_unit,
                 message=f"مصوبه جلسه {meeting_num} بند {clause_subclause} توسط مدیرعامل تایید شد و به شما ابلاغ شده است.",
@@ -2681,30 +2401,23 @@ def approve_resolution_by_ceo(request, public_id):
         
         # ایجاد نوتیفیکیشن برای همکاران (فقط عملیاتی)
         if resolution.type != 'informational':
-            for coworker in resolution.coworkers.all():
-                meeting_num = to_persian_numbers(str(resolution.meeting.number))
-                clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
-                NotificationService.create_notification(
-                    recipient=coworker,
-                    message=f"مصوبه جلسه {meeting_num} بند {clause_subclause} توسط مدیرعامل تایید شد و در آن به عنوان همکار انتخاب شده‌اید.",
-                    resolution=resolution
-                )
-        
-        # ایجاد نوتیفیکیشن برای واحدهای اطلاع‌رسانی (همه انواع)
-        for inform_unit in resolution.inform_units.all():
-            meeting_num = to_persian_numbers(str(resolution.meeting.number))
-            clause_subclause = to_persian_numbers(f"{resolution.clause}-{resolution.subclause}")
-            if resolution.type == 'informational':
-                message = f"مصوبه اطلاع‌رسانی جلسه {meeting_num} بند {clause_subclause} توسط مدیرعامل تایید شد و جهت اطلاع ارسال شده است."
-            else:
-                message = f"مصوبه جلسه {meeting_num} بند {clause_subclause} توسط مدیرعامل تایید شد و جهت اطلاع ارسال شده است."
-            
-            NotificationService.create_notification(
-                recipient=inform_unit,
-                message=message,
+            NotificationService.create_bulk_notifications(
+                resolution.coworkers.all(),
+                f"مصوبه جلسه {meeting_num} بند {clause_subclause} توسط مدیرعامل تایید شد و در آن به عنوان همکار انتخاب شده‌اید.",
                 resolution=resolution
             )
         
+        # ایجاد نوتیفیکیشن برای واحدهای اطلاع‌رسانی (همه انواع)
+        if resolution.type == 'informational':
+            message = f"مصوبه اطلاع‌رسانی جلسه {meeting_num} بند {clause_subclause} توسط مدیرعامل تایید شد و جهت اطلاع ارسال شده است."
+        else:
+            message = f"مصوبه جلسه {meeting_num} بند {clause_subclause} توسط مدیرعامل تایید شد و جهت اطلاع ارسال شده است."
+        NotificationService.create_bulk_notifications(
+            resolution.inform_units.all(),
+            message,
+            resolution=resolution
+        )
+        
         # ایجاد نوتیفیکیشن برای دبیر (همه انواع)
         if resolution.created_by:
             NotificationService.create_notification(
@@ -2826,14 +2539,12 @@ def approve_resolution_by_secretary(request, public_id):
                     )
                 
                 # ارسال نوتیفیکیشن به مدیرعامل
-                ceos = User.objects.filter(profile__position='ceo')
-                for ceo in ceos:
-                    if ceo != user:
-                        NotificationService.create_notification(
-                            recipient=ceo,
-                            resolution=resolution,
-                            message=f'مصوبه {resolution.clause}-{resolution.subclause} توسط دبیر تایید شده و در انتظار تایید شماست'
-                        )
+                NotificationService.create_bulk_notifications(
+                    RoleDirectory.user_ids('ceo'),
+                    f'مصوبه {resolution.clause}-{resolution.subclause} توسط دبیر تایید شده و در انتظار تایید شماست',
+                    resolution=resolution,
+                    exclude=user
+                )
                 
                 return Response({
                     'message': 'مصوبه با موفقیت تایید شد و برای تایید مدیرعامل ارسال شد',
@@ -2900,20 +2611,7 @@ def resolution_timeline(request, public_id):
         user = request.user
         
         # بررسی دسترسی
-        is_secretary = hasattr(user, 'profile') and user.profile.position == 'secretary'
-        is_auditor = hasattr(user, 'profile') and user.profile.position == 'auditor'
-        is_executor = resolution.executor_unit == user
-        is_creator = resolution.created_by == user
-        is_ceo = hasattr(user, 'profile') and user.profile.position == 'ceo'
-        
-        can_view = (
-            is_secretary or is_auditor or is_executor or is_creator or is_ceo or
-            user in resolution.coworkers.all() or
-            user in resolution.inform_units.all() or
-            user in resolution.participants.all()
-        )
-        
-        if not can_view:
+        if not ResolutionAccessPolicy(user).can_view(resolution):
             return Response(
                 {"error": "شما به این مصوبه دسترسی ندارید."}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -3010,18 +2708,9 @@ def resolution_user_duration(request, public_id, user_id):
         
         # بررسی دسترسی
         current_user = request.user
-        is_secretary = hasattr(current_user, 'profile') and current_user.profile.position == 'secretary'
-        is_auditor = hasattr(current_user, 'profile') and current_user.profile.position == 'auditor'
-        is_executor = resolution.executor_unit == current_user
-        is_creator = resolution.created_by == current_user
-        is_ceo = hasattr(current_user, 'profile') and current_user.profile.position == 'ceo'
-        
         can_view = (
-            is_secretary or is_auditor or is_executor or is_creator or is_ceo or
-            current_user in resolution.coworkers.all() or
-            current_user in resolution.inform_units.all() or
-            current_user in resolution.participants.all() or
-            current_user == user  # کاربر می‌تواند مدت زمان خودش را ببیند
+            current_user == user or  # کاربر می‌تواند مدت زمان خودش را ببیند
+            ResolutionAccessPolicy(current_user).can_view(resolution)
         )
         
         if not can_view:
@@ -3206,59 +2895,24 @@ def user_average_duration(request, user_id):
 def all_users_average_duration(request):
     """محاسبه میانگین مدت زمان تمام کاربران"""
     try:
-        # دریافت تمام کاربران
-        users = User.objects.filter(is_active=True)
-        user_durations = []
+        # میانگین فاصله هر اکشن تصمیم (قبول/تایید) از اکشن قبلی همان مصوبه، در یک کوئری با LAG() و GROUP BY
+        gaps = StageIntervalService.action_gaps_by_actor(USER_DURATION_ACTION_TYPES)
+        users = User.objects.filter(id__in=list(gaps), is_active=True).select_related('profile')
         
+        user_durations = []
         for user in users:
-            # محاسبه میانگین مدت زمان برای هر کاربر
-            actions = ResolutionAction.objects.filter(
-                actor=user,
-                action_type__in=['accept', 'approve', 'start_execution']
-            ).select_related('resolution')
-            
-            total_duration = timedelta()
-            resolution_count = 0
-            
-            for action in actions:
-                resolution = action.resolution
-                
-                # پیدا کردن اکشن قبلی
-                previous_action = ResolutionAction.objects.filter(
-                    resolution=resolution,
-                    created_at__lt=action.created_at
-                ).order_by('-created_at').first()
-                
-                if previous_action:
-                    duration = action.created_at - previous_action.created_at
-                    total_duration += duration
-                    resolution_count += 1
-            
-            if resolution_count > 0:
-                average_duration = total_duration / resolution_count
-                
-                def format_duration(td):
-                    days = td.days
-                    hours = td.seconds // 3600
-                    minutes = (td.seconds % 3600) // 60
-                    
-                    if days > 0:
-                        return f"{days} روز و {hours} ساعت"
-                    elif hours > 0:
-                        return f"{hours} ساعت و {minutes} دقیقه"
-                    else:
-                        return f"{minutes} دقیقه"
-                
-                user_durations.append({
-                    'user_id': user.id,
-                    'username': user.username,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'position': getattr(user.profile, 'position', 'unknown') if hasattr(user, 'profile') else 'unknown',
-                    'average_duration': format_duration(average_duration),
-                    'average_duration_seconds': average_duration.total_seconds(),
-                    'resolution_count': resolution_count
-                })
+            count, average_seconds = gaps[user.id]
+            average_duration = timedelta(seconds=average_seconds)
+            user_durations.append({
+                'user_id': user.id,
+                'username': user.username,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'position': getattr(user.profile, 'position', 'unknown') if hasattr(user, 'profile') else 'unknown',
+                'average_duration': _format_duration(average_duration),
+                'average_duration_seconds': average_duration.total_seconds(),
+                'resolution_count': count
+            })
         
         # مرتب کردن بر اساس مدت زمان (کمترین اول)
         user_durations.sort(key=lambda x: x['average_duration_seconds'])
@@ -3273,58 +2927,68 @@ def all_users_average_duration(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+def _format_duration(td):
+    """نمایش فارسی مدت زمان (روز/ساعت/دقیقه)"""
+    days = td.days
+    hours = td.seconds // 3600
+    minutes = (td.seconds % 3600) // 60
+    if days > 0:
+        return f"{days} روز و {hours} ساعت"
+    elif hours > 0:
+        return f"{hours} ساعت و {minutes} دقیقه"
+    else:
+        return f"{minutes} دقیقه"
+
+EXECUTOR_NAME_FIELDS = (
+    'resolution__executor_unit__first_name',
+    'resolution__executor_unit__last_name',
+    'resolution__executor_unit__username',
+)
+
+def _executor_unit_name(row, prefix='resolution__executor_unit__'):
+    """نام واحد مجری از ستون‌های values()"""
+    full_name = f"{row[prefix + 'first_name']} {row[prefix + 'last_name']}".strip()
+    return full_name or row[prefix + 'username']
+
+def _average_duration_response(queryset):
+    """پاسخ استاندارد میانگین، صدک‌ها و هیستوگرام مدت زمان از روی بازه‌های مراحل"""
+    groups = StageIntervalService.durations_by_executor(queryset, *EXECUTOR_NAME_FIELDS)
+    durations = StageIntervalService.merge_durations(groups)
+    distribution = duration_distribution(durations)
+    average_duration = timedelta(seconds=sum(durations) / len(durations) if durations else 0)
+
+    executor_units = []
+    for (unit_id, *names), unit_durations in groups.items():
+        if unit_id is None:
+            continue
+        unit_distribution = duration_distribution(unit_durations)
+        executor_units.append({
+            'unit_id': unit_id,
+            'unit_name': _executor_unit_name(dict(zip(EXECUTOR_NAME_FIELDS, names))),
+            'average_duration_seconds': sum(unit_durations) / len(unit_durations),
+            'resolution_count': len(unit_durations),
+            'percentiles_seconds': unit_distribution['percentiles'],
+            'histogram': unit_distribution['histogram'],
+        })
+    executor_units.sort(key=lambda x: x['unit_id'])
+
+    return Response({
+        'average_duration': _format_duration(average_duration) if durations else '0 دقیقه',
+        'average_duration_seconds': average_duration.total_seconds(),
+        'resolution_count': len(durations),
+        'percentiles_seconds': distribution['percentiles'],
+        'histogram': distribution['histogram'],
+        'executor_units': executor_units,
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def secretary_workbench_average_duration(request):
     """محاسبه میانگین مدت زمان مصوبات در کارتابل دبیر"""
     try:
-        # پیدا کردن مصوباتی که در کارتابل دبیر بوده‌اند
-        resolutions = Resolution.objects.all()
-        
-        total_duration = timedelta()
-        resolution_count = 0
-        
-        for resolution in resolutions:
-            # زمان ایجاد مصوبه از خود مدل Resolution
-            created_time = resolution.created_at
-
-            # پیدا کردن اکشن تایید دبیر
-            secretary_approve_action = ResolutionAction.objects.filter(
-                resolution=resolution,
-                action_type='secretary_approved'
-            ).order_by('created_at').first()
-
-            if created_time and secretary_approve_action:
-                duration = secretary_approve_action.created_at - created_time
-                total_duration += duration
-                resolution_count += 1
-        
-        if resolution_count > 0:
-            average_duration = total_duration / resolution_count
-            
-            def format_duration(td):
-                days = td.days
-                hours = td.seconds // 3600
-                minutes = (td.seconds % 3600) // 60
-                
-                if days > 0:
-                    return f"{days} روز و {hours} ساعت"
-                elif hours > 0:
-                    return f"{hours} ساعت و {minutes} دقیقه"
-                else:
-                    return f"{minutes} دقیقه"
-            
-            return Response({
-                'average_duration': format_duration(average_duration),
-                'average_duration_seconds': average_duration.total_seconds(),
-                'resolution_count': resolution_count
-            })
-        else:
-            return Response({
-                'average_duration': '0 دقیقه',
-                'average_duration_seconds': 0,
-                'resolution_count': 0
-            })
+        # از ثبت مصوبه تا اولین تایید دبیر
+        intervals = StageIntervalService.closed('secretary', exit_type='secretary_approved', cycle=1)
+        return _average_duration_response(intervals)
         
     except Exception as e:
         return Response(
@@ -3337,56 +3001,11 @@ def secretary_workbench_average_duration(request):
 def ceo_workbench_average_duration(request):
     """محاسبه میانگین مدت زمان مصوبات در کارتابل مدیرعامل"""
     try:
-        # پیدا کردن مصوباتی که در کارتابل مدیرعامل بوده‌اند
-        resolutions = Resolution.objects.all()
-        
-        total_duration = timedelta()
-        resolution_count = 0
-        
-        for resolution in resolutions:
-            # پیدا کردن اکشن تایید دبیر
-            secretary_approve_action = ResolutionAction.objects.filter(
-                resolution=resolution,
-                action_type='secretary_approved'
-            ).order_by('created_at').first()
-
-            # پیدا کردن اکشن تایید مدیرعامل
-            ceo_approval_action = ResolutionAction.objects.filter(
-                resolution=resolution,
-                action_type='ceo_approved'
-            ).order_by('created_at').first()
-
-            if secretary_approve_action and ceo_approval_action:
-                duration = ceo_approval_action.created_at - secretary_approve_action.created_at
-                total_duration += duration
-                resolution_count += 1
-        
-        if resolution_count > 0:
-            average_duration = total_duration / resolution_count
-            
-            def format_duration(td):
-                days = td.days
-                hours = td.seconds // 3600
-                minutes = (td.seconds % 3600) // 60
-                
-                if days > 0:
-                    return f"{days} روز و {hours} ساعت"
-                elif hours > 0:
-                    return f"{hours} ساعت و {minutes} دقیقه"
-                else:
-                    return f"{minutes} دقیقه"
-            
-            return Response({
-                'average_duration': format_duration(average_duration),
-                'average_duration_seconds': average_duration.total_seconds(),
-                'resolution_count': resolution_count
-            })
-        else:
-            return Response({
-                'average_duration': '0 دقیقه',
-                'average_duration_seconds': 0,
-                'resolution_count': 0
-            })
+        # از اولین تایید دبیر تا اولین تایید مدیرعامل
+        intervals = StageIntervalService.closed(
+            'ceo', entry_type='secretary_approved', exit_type='ceo_approved', cycle=1
+        )
+        return _average_duration_response(intervals)
         
     except Exception as e:
         return Response(
@@ -3399,58 +3018,12 @@ def ceo_workbench_average_duration(request):
 def executor_workbench_average_duration(request):
     """محاسبه میانگین مدت زمان مصوبات در کارتابل واحد مجری (قبل از شروع اجرا)"""
     try:
-        # پیدا کردن مصوباتی که در کارتابل مجری بوده‌اند
-        resolutions = Resolution.objects.filter(
-            status__in=['notified', 'in_progress']
+        # از ابلاغ (تایید مدیرعامل) تا قبول واحد مجری
+        intervals = StageIntervalService.closed(
+            'executor', exit_type='executor_accepted',
+            resolution__status__in=['notified', 'in_progress']
         )
-        
-        total_duration = timedelta()
-        resolution_count = 0
-        
-        for resolution in resolutions:
-            # پیدا کردن اکشن ابلاغ به مجری
-            notify_action = ResolutionAction.objects.filter(
-                resolution=resolution,
-                action_type='notify'
-            ).order_by('-created_at').first()
-            
-            # پیدا کردن اکشن شروع اجرا
-            start_execution_action = ResolutionAction.objects.filter(
-                resolution=resolution,
-                action_type='start_execution'
-            ).order_by('-created_at').first()
-            
-            if notify_action and start_execution_action:
-                duration = start_execution_action.created_at - notify_action.created_at
-                total_duration += duration
-                resolution_count += 1
-        
-        if resolution_count > 0:
-            average_duration = total_duration / resolution_count
-            
-            def format_duration(td):
-                days = td.days
-                hours = td.seconds // 3600
-                minutes = (td.seconds % 3600) // 60
-                
-                if days > 0:
-                    return f"{days} روز و {hours} ساعت"
-                elif hours > 0:
-                    return f"{hours} ساعت و {minutes} دقیقه"
-                else:
-                    return f"{minutes} دقیقه"
-            
-            return Response({
-                'average_duration': format_duration(average_duration),
-                'average_duration_seconds': average_duration.total_seconds(),
-                'resolution_count': resolution_count
-            })
-        else:
-            return Response({
-                'average_duration': '0 دقیقه',
-                'average_duration_seconds': 0,
-                'resolution_count': 0
-            })
+        return _average_duration_response(intervals)
         
     except Exception as e:
         return Response(
@@ -3518,56 +3091,21 @@ def meeting_to_resolution_average_duration(request):
 def executor_units_execution_duration(request):
     """میانگین مدت زمان اجرای مصوبات برای هر واحد مجری (برای بارچارت داشبورد)"""
     try:
-        from django.db.models import F
-        import pytz
-        from datetime import datetime, time, timedelta
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        tz = pytz.timezone(getattr(settings, 'TIME_ZONE', 'UTC'))
-        units = {}
-        resolutions = Resolution.objects.select_related('executor_unit').all()
-        for res in resolutions:
-            if not res.executor_unit:
-                continue
-            start_action = ResolutionAction.objects.filter(
-                resolution=res,
-                action_type='executor_accepted'
-            ).order_by('created_at').first()
-            if not start_action:
-                continue
-            start_time = start_action.created_at
-            if start_time.tzinfo is None or start_time.tzinfo.utcoffset(start_time) is None:
-                start_time = tz.localize(start_time)
-            end_comment = ResolutionComment.objects.filter(
-                resolution=res,
-                comment_type='progress_update',
-                action_data__icontains='"new_progress": 100'
-            ).order_by('-created_at').first()
-            if not end_comment:
-                continue
-            end_time = end_comment.created_at
-            if end_time.tzinfo is None or end_time.tzinfo.utcoffset(end_time) is None:
-                end_time = tz.localize(end_time)
-            duration = (end_time - start_time).total_seconds() / 60
-            unit_id = res.executor_unit.id
-            unit_name = str(res.executor_unit)
-            if hasattr(res.executor_unit, 'get_full_name'):
-                unit_name = res.executor_unit.get_full_name() or str(res.executor_unit)
-            if unit_id not in units:
-                units[unit_id] = {
-                    'unit_id': unit_id,
-                    'unit_name': unit_name,
-                    'durations': []
-                }
-            units[unit_id]['durations'].append(duration)
+        # از اولین قبول مجری تا آخرین رسیدن پیشرفت به ۱۰۰٪
+        intervals = StageIntervalService.closed('execution', cycle=1, exit_type=EXECUTION_COMPLETED)
+        groups = StageIntervalService.durations_by_executor(intervals, *EXECUTOR_NAME_FIELDS)
         result = []
-        for unit in units.values():
-            avg_duration = sum(unit['durations']) / len(unit['durations']) if unit['durations'] else 0
+        for (unit_id, *names), durations in sorted(groups.items(), key=lambda item: item[0][0] or 0):
+            if unit_id is None:
+                continue
+            distribution = duration_distribution(durations, scale=60)
             result.append({
-                'unit_id': unit['unit_id'],
-                'unit_name': unit['unit_name'],
-                'avg_execution_duration_minutes': avg_duration,
-                'count': len(unit['durations'])
+                'unit_id': unit_id,
+                'unit_name': _executor_unit_name(dict(zip(EXECUTOR_NAME_FIELDS, names))),
+                'avg_execution_duration_minutes': sum(durations) / len(durations) / 60,
+                'count': len(durations),
+                'percentiles_minutes': distribution['percentiles'],
+                'histogram': distribution['histogram'],
             })
         return Response(result)
     except Exception as e:
@@ -3580,70 +3118,34 @@ def executor_units_execution_duration(request):
 def executor_completion_duration(request):
     """دریافت میانگین مدت زمان تکمیل مصوبات توسط مجری (از قبول تا 100%)"""
     try:
-        from django.db.models import Avg, Count, Q
-        from datetime import datetime, timedelta
-        
-        # دریافت مصوبات عملیاتی که تکمیل شده‌اند
-        completed_operational_resolutions = Resolution.objects.filter(
-            type='operational',
-            status='completed',
-            progress=100
-        ).select_related('executor_unit')
+        # مصوبات عملیاتی تکمیل‌شده؛ فقط مدت‌های معقول (بیش از 1 دقیقه و کمتر از 1 سال)
+        intervals = StageIntervalService.closed(
+            'execution',
+            exit_type=EXECUTION_COMPLETED,
+            resolution__type='operational',
+            resolution__status='completed',
+            resolution__progress=100,
+            duration_seconds__gte=DURATION_MIN_SECONDS,
+            duration_seconds__lte=DURATION_MAX_SECONDS
+        )
+        groups = StageIntervalService.durations_by_executor(
+            intervals,
+            'resolution__executor_unit__username',
+            'resolution__executor_unit__profile__department'
+        )
         
         executor_stats = []
-        
-        # گروه‌بندی بر اساس واحد مجری
-        executor_groups = completed_operational_resolutions.values('executor_unit').annotate(
-            count=Count('id')
-        ).filter(executor_unit__isnull=False)
-        
-        for group in executor_groups:
-            executor_id = group['executor_unit']
-            executor = User.objects.get(id=executor_id)
-            
-            # دریافت مصوبات این واحد مجری
-            resolutions = completed_operational_resolutions.filter(executor_unit_id=executor_id)
-            
-            total_duration_minutes = 0
-            valid_resolutions = 0
-            
-            for resolution in resolutions:
-                # پیدا کردن زمان قبول مصوبه توسط مجری
-                acceptance_action = ResolutionAction.objects.filter(
-                    resolution=resolution,
-                    action_type='executor_accepted'
-                ).first()
-                
-                if acceptance_action:
-                    acceptance_time = acceptance_action.created_at
-                    
-                    # پیدا کردن آخرین به‌روزرسانی پیشرفت به 100%
-                    completion_action = ResolutionAction.objects.filter(
-                        resolution=resolution,
-                        action_type='progress_update',
-                        action_data__contains={'new_progress': 100}
-                    ).order_by('-created_at').first()
-                    
-                    if completion_action:
-                        completion_time = completion_action.created_at
-                        
-                        # محاسبه مدت زمان از قبول تا تکمیل (100%)
-                        duration = completion_time - acceptance_time
-                        duration_minutes = duration.total_seconds() / 60
-                        
-                        # فقط مصوبات با مدت زمان معقول (بیش از 1 دقیقه و کمتر از 1 سال)
-                        if 1 <= duration_minutes <= 525600:  # 1 دقیقه تا 1 سال
-                            total_duration_minutes += duration_minutes
-                            valid_resolutions += 1
-            
-            if valid_resolutions > 0:
-                avg_duration_minutes = total_duration_minutes / valid_resolutions
-                
-                executor_stats.append({
-                    'unit_name': executor.profile.department if hasattr(executor, 'profile') and executor.profile.department else executor.username,
-                    'avg_completion_duration_minutes': round(avg_duration_minutes, 2),
-                    'resolution_count': valid_resolutions
-                })
+        for (unit_id, username, department), durations in groups.items():
+            if unit_id is None:
+                continue
+            distribution = duration_distribution(durations, scale=60)
+            executor_stats.append({
+                'unit_name': department or username,
+                'avg_completion_duration_minutes': round(sum(durations) / len(durations) / 60, 2),
+                'resolution_count': len(durations),
+                'percentiles_minutes': distribution['percentiles'],
+                'histogram': distribution['histogram'],
+            })
         
         # مرتب‌سازی بر اساس میانگین مدت زمان (صعودی)
         executor_stats.sort(key=lambda x: x['avg_completion_duration_minutes'])
@@ -3661,71 +3163,37 @@ def executor_completion_duration(request):
 def executor_acceptance_duration(request):
     """دریافت میانگین مدت زمان قبول مصوبات توسط مجری (از تایید مدیرعامل تا قبول مجری)"""
     try:
-        from django.db.models import Avg, Count, Q
-        from datetime import datetime, timedelta
-        
-        # دریافت همه مصوبات عملیاتی که به مجری اختصاص داده شده‌اند (قبول شده یا نشده)
-        all_operational_resolutions = Resolution.objects.filter(
+        # همه مصوبات عملیاتی که به مجری اختصاص داده شده‌اند (قبول شده یا نشده)
+        assigned = Resolution.objects.filter(
             type='operational',
             executor_unit__isnull=False
-        ).select_related('executor_unit')
-        
-        executor_stats = []
+        ).values(
+            'executor_unit', 'executor_unit__username', 'executor_unit__profile__department'
+        ).annotate(total=Count('id')).order_by('executor_unit')
         
-        # گروه‌بندی بر اساس واحد مجری
-        executor_groups = all_operational_resolutions.values('executor_unit').annotate(
-            count=Count('id')
-        ).filter(executor_unit__isnull=False)
+        # فقط مدت‌های معقول (بیش از 1 دقیقه و کمتر از 1 سال)
+        intervals = StageIntervalService.closed(
+            'executor',
+            entry_type='ceo_approved',
+            exit_type='executor_accepted',
+            resolution__type='operational',
+            duration_seconds__gte=DURATION_MIN_SECONDS,
+            duration_seconds__lte=DURATION_MAX_SECONDS
+        )
+        groups = StageIntervalService.durations_by_executor(intervals)
         
-        for group in executor_groups:
-            executor_id = group['executor_unit']
-            executor = User.objects.get(id=executor_id)
-            
-            # دریافت مصوبات این واحد مجری
-            resolutions = all_operational_resolutions.filter(executor_unit_id=executor_id)
-            
-            total_duration_minutes = 0
-            valid_resolutions = 0
-            
-            for resolution in resolutions:
-                # پیدا کردن زمان تایید توسط مدیرعامل
-                ceo_approval_action = ResolutionAction.objects.filter(
-                    resolution=resolution,
-                    action_type='ceo_approved'
-                ).order_by('-created_at').first()
-                
-                if ceo_approval_action:
-                    ceo_approval_time = ceo_approval_action.created_at
-                    
-                    # پیدا کردن اولین قبول توسط مجری
-                    executor_acceptance_action = ResolutionAction.objects.filter(
-                        resolution=resolution,
-                        action_type='executor_accepted'
-                    ).order_by('created_at').first()
-                    
-                    if executor_acceptance_action:
-                        acceptance_time = executor_acceptance_action.created_at
-                        
-                        # محاسبه مدت زمان از تایید مدیرعامل تا قبول مجری
-                        duration = acceptance_time - ceo_approval_time
-                        duration_minutes = duration.total_seconds() / 60
-                        
-                        # فقط مصوبات با مدت زمان معقول (بیش از 1 دقیقه و کمتر از 1 سال)
-                        if 1 <= duration_minutes <= 525600:  # 1 دقیقه تا 1 سال
-                            total_duration_minutes += duration_minutes
-                            valid_resolutions += 1
-            
+        executor_stats = []
+        for row in assigned:
             # همیشه واحد مجری را اضافه کن، حتی اگر هیچ مصوبه‌ای قبول نکرده باشد
-            if valid_resolutions > 0:
-                avg_duration_minutes = total_duration_minutes / valid_resolutions
-            else:
-                avg_duration_minutes = 0
-            
+            durations = groups.get((row['executor_unit'],), ())
+            distribution = duration_distribution(durations, scale=60)
             executor_stats.append({
-                'unit_name': executor.profile.department if hasattr(executor, 'profile') and executor.profile.department else executor.username,
-                'avg_acceptance_duration_minutes': round(avg_duration_minutes, 2),
-                'resolution_count': valid_resolutions,
-                'total_assigned_resolutions': resolutions.count()
+                'unit_name': row['executor_unit__profile__department'] or row['executor_unit__username'],
+                'avg_acceptance_duration_minutes': round(sum(durations) / len(durations) / 60, 2) if durations else 0,
+                'resolution_count': len(durations),
+                'total_assigned_resolutions': row['total'],
+                'percentiles_minutes': distribution['percentiles'],
+                'histogram': distribution['histogram'],
             })
         
         # مرتب‌سازی بر اساس میانگین مدت زمان (صعودی)
@@ -3749,17 +3217,9 @@ def recent_changed_resolutions(request):
     limit = int(request.GET.get('limit', 10))
 
     # دسترسی کاربر به مصوبات (منطق مشابه سایر لیست‌ها)
-    access_q = Q()
-    if hasattr(user, 'profile') and user.profile.position in ['auditor', 'ceo', 'secretary']:
-        access_q = Q()
-    else:
-        access_q = (
-            Q(executor_unit=user) |
-            Q(coworkers=user) |
-            Q(inform_units=user) |
-            Q(participants=user) |
-            Q(created_by=user)
-        )
+    policy = ResolutionAccessPolicy(user)
+    access_q = policy.view_q()
+    if not policy.has_position('auditor', 'ceo', 'secretary'):
         # سایر کاربران فقط مصوباتی را می‌بینند که وضعیت آن pending_ceo_approval یا pending_secretary_approval نیست
         access_q &= ~Q(status='pending_ceo_approval') & ~Q(status='pending_secretary_approval')
 
@@ -3776,64 +3236,63 @@ def recent_changed_resolutions(request):
     ).filter(access_q)
 
     # مرتب‌سازی بر اساس آخرین کامنت و یونیک کردن (۱۰ مورد)
-    resolutions = resolutions_with_comments.order_by('-last_comment').distinct()[:limit]
+    resolutions = ResolutionSerializer.setup_eager_loading(
+        resolutions_with_comments, user
+    ).order_by('-last_comment')[:limit]
 
     # سریالایز کردن داده‌ها
     serializer = ResolutionSerializer(resolutions, many=True, context={'request': request})
     return Response(serializer.data)
 
+# حداکثر بازه قابل درخواست برای نقشه حرارتی (ماه)
+HEATMAP_MAX_MONTHS = 120
+
+def _parse_jalali_month(value):
+    """تبدیل ماه شمسی به فرم 1402-11 به عدد YYYYMM"""
+    year, month = value.split('-')
+    year, month = int(year), int(month)
+    if not 1 <= month <= 12:
+        raise ValueError(value)
+    return year * 100 + month
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def resolutions_heatmap(request):
     """
     خروجی: { months: ["1402-11", ...], units: ["..."], data: [[count,...], ...] }
-    محور افقی: ۱۲ ماه اخیر شمسی (مثلاً 1402-11)
+    محور افقی: ماه‌های شمسی (پیش‌فرض ۱۲ ماه اخیر، مثلاً 1402-11)
     محور عمودی: واحد مجری (نام)
     مقدار: تعداد مصوبات هر واحد در هر ماه
+
+    پارامترهای اختیاری:
+        fiscal_year: سال مالی شمسی (مثلاً 1402) = فروردین تا اسفند همان سال
+        from, to: بازه دلخواه ماه‌ها (مثلاً from=1401-07&to=1402-06)
     """
-    from collections import defaultdict
-    import pytz
-    tz = pytz.timezone(getattr(settings, 'TIME_ZONE', 'Asia/Tehran'))
-    # 1. استخراج ۱۲ ماه اخیر شمسی
-    today = datetime.now(tz)
-    months = []
-    for i in range(11, -1, -1):
-        d = today - timedelta(days=30*i)
-        j = JalaliDate.to_jalali(d)
-        months.append(f"{j.year}-{j.month:02d}")
-    months = sorted(list(set(months)))  # مرتب‌سازی و حذف تکراری احتمالی
-    # 2. استخراج واحدهای مجری
-    units_qs = Resolution.objects.filter(executor_unit__isnull=False).values_list('executor_unit__id', 'executor_unit__first_name', 'executor_unit__last_name', 'executor_unit__username').distinct()
-    units = []
-    unit_id_to_name = {}
-    for uid, first, last, username in units_qs:
-        name = f"{first or ''} {last or ''}".strip() or username
-        units.append(name)
-        unit_id_to_name[uid] = name
-    # 3. شمارش مصوبات هر واحد در هر ماه
-    data_dict = defaultdict(lambda: defaultdict(int))
-    resolutions = Resolution.objects.select_related('meeting', 'executor_unit').filter(executor_unit__isnull=False, meeting__isnull=False)
-    for res in resolutions:
-        if not res.meeting or not res.meeting.held_at:
-            continue
-        jdate = JalaliDate.to_jalali(res.meeting.held_at)
-        month_str = f"{jdate.year}-{jdate.month:02d}"
-        if month_str not in months:
-            continue
-        unit_name = unit_id_to_name.get(res.executor_unit.id)
-        if not unit_name:
-            continue
-        data_dict[unit_name][month_str] += 1
-    # 4. ساخت آرایه داده
-    data = []
-    for unit in units:
-        row = [data_dict[unit][m] for m in months]
-        data.append(row)
-    return Response({
-        'months': months,
-        'units': units,
-        'data': data
-    })
+    try:
+        if request.GET.get('fiscal_year'):
+            year = int(request.GET['fiscal_year'])
+            start, end = year * 100 + 1, year * 100 + 12
+        else:
+            current = jalali_month_of(timezone.localdate())
+            end = _parse_jalali_month(request.GET['to']) if request.GET.get('to') else current
+            if request.GET.get('from'):
+                start = _parse_jalali_month(request.GET['from'])
+            else:
+                # ۱۲ ماه منتهی به ماه پایان
+                year, month = divmod(end, 100)
+                start = (year - 1) * 100 + month + 1 if month < 12 else year * 100 + 1
+    except ValueError:
+        return Response(
+            {"error": "پارامترهای بازه نامعتبر است (fiscal_year=1402 یا from/to به فرم 1402-01)"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if start > end or len(jalali_months(start, end)) > HEATMAP_MAX_MONTHS:
+        return Response(
+            {"error": f"بازه باید حداکثر {HEATMAP_MAX_MONTHS} ماه و شروع آن پیش از پایان باشد"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response(ResolutionStatsService.heatmap(start, end))
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -0,0 +1,4 @@
+# بارگذاری اپ Celery همراه Django تا shared_task ها از تنظیمات CELERY_* استفاده کنند
+from apps.core.celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -11,9 +11,11 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 from pathlib import Path
+import json
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
+from celery.schedules import crontab
 
 # Load environment variables
 load_dotenv()
@@ -109,6 +111,67 @@ CHANNEL_LAYERS = {
     },
 }
 
+# حداکثر group_send هم‌زمان در هر دسته ارسال WebSocket
+WEBSOCKET_DISPATCH_CONCURRENCY = int(os.getenv('WEBSOCKET_DISPATCH_CONCURRENCY', 100))
+
+# حضور کاربران در WebSocket؛ برای کاربران آفلاین نوتیفیکیشن لحظه‌ای ارسال نمی‌شود
+PRESENCE_ENABLED = os.getenv('PRESENCE_ENABLED', 'True').lower() == 'true'
+PRESENCE_REDIS_URL = os.getenv('PRESENCE_REDIS_URL', 'redis://redis:6379/3')
+PRESENCE_TTL = int(os.getenv('PRESENCE_TTL', 90))
+PRESENCE_HEARTBEAT_INTERVAL = int(os.getenv('PRESENCE_HEARTBEAT_INTERVAL', 30))
+PRESENCE_RECONNECT_GRACE = int(os.getenv('PRESENCE_RECONNECT_GRACE', 60))
+
+# رویدادهای WebSocket کاربران و چت مصوبات برای replay پس از اتصال مجدد (Redis Streams)
+EVENT_STREAM_ENABLED = os.getenv('EVENT_STREAM_ENABLED', 'True').lower() == 'true'
+EVENT_STREAM_REDIS_URL = os.getenv('EVENT_STREAM_REDIS_URL', PRESENCE_REDIS_URL)
+EVENT_STREAM_MAXLEN = int(os.getenv('EVENT_STREAM_MAXLEN', 200))
+EVENT_STREAM_TTL = int(os.getenv('EVENT_STREAM_TTL', 60 * 60 * 24))
+EVENT_STREAM_REPLAY_LIMIT = int(os.getenv('EVENT_STREAM_REPLAY_LIMIT', 200))
+
+# Cache configuration (Redis همان سرور channels، دیتابیس جداگانه)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL', 'redis://redis:6379/1'),
+        'KEY_PREFIX': 'roham',
+    },
+}
+
+# آمار داشبوردها با رویداد باطل می‌شوند؛ این زمان فقط برای پاک شدن نسخه‌های قدیمی است
+STATS_CACHE_TIMEOUT = int(os.getenv('STATS_CACHE_TIMEOUT', 60 * 60 * 24))
+
+# فهرست کاربران هر سمت با signals باطل می‌شود؛ نسخه حافظه پردازه هر ROLE_DIRECTORY_LOCAL_TTL ثانیه با Redis مقایسه می‌شود
+ROLE_DIRECTORY_TIMEOUT = int(os.getenv('ROLE_DIRECTORY_TIMEOUT', 60 * 60 * 24))
+ROLE_DIRECTORY_LOCAL_TTL = int(os.getenv('ROLE_DIRECTORY_LOCAL_TTL', 30))
+
+# claims توکن‌های JWT بررسی‌شده در LRU هر پردازه؛ کاربر احراز هویت‌شده در Redis (با signals باطل می‌شود)
+JWT_CLAIMS_CACHE_SIZE = int(os.getenv('JWT_CLAIMS_CACHE_SIZE', 2048))
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60 * 15))
+
+# Celery (تحویل ناهمگام نوتیفیکیشن‌ها)
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://redis:6379/2')
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ALWAYS_EAGER = os.getenv('CELERY_TASK_ALWAYS_EAGER', 'False').lower() == 'true'
+
+# با False، WebSocket و ایمیل مثل قبل در همان درخواست ارسال می‌شوند
+NOTIFICATION_ASYNC_DELIVERY = os.getenv('NOTIFICATION_ASYNC_DELIVERY', 'True').lower() == 'true'
+# حداکثر تعداد نوتیفیکیشن در هر task تحویل
+NOTIFICATION_DELIVERY_BATCH_SIZE = int(os.getenv('NOTIFICATION_DELIVERY_BATCH_SIZE', 200))
+# فاصله ارسال ایمیل‌های خلاصه (ثانیه) برای نوتیفیکیشن‌های low و normal
+NOTIFICATION_DIGEST_WINDOW = int(os.getenv('NOTIFICATION_DIGEST_WINDOW', 15 * 60))
+# پنجره ادغام نوتیفیکیشن‌های پشت‌سرهم چت برای یک گیرنده و مصوبه (ثانیه)
+NOTIFICATION_COALESCE_WINDOW = int(os.getenv('NOTIFICATION_COALESCE_WINDOW', 10 * 60))
+
+# نگهداری نوتیفیکیشن‌های خوانده‌شده (روز)؛ مقدار هر نوع یا اولویت (JSON) بر پیش‌فرض مقدم است
+NOTIFICATION_RETENTION_DAYS = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 30))
+NOTIFICATION_RETENTION_BY_TYPE = json.loads(os.getenv('NOTIFICATION_RETENTION_BY_TYPE', '{}'))
+NOTIFICATION_RETENTION_BY_PRIORITY = json.loads(os.getenv('NOTIFICATION_RETENTION_BY_PRIORITY', '{}'))
+# انتقال به NotificationArchive به جای حذف
+NOTIFICATION_ARCHIVE_ENABLED = os.getenv('NOTIFICATION_ARCHIVE_ENABLED', 'False').lower() == 'true'
+NOTIFICATION_CLEANUP_BATCH_SIZE = int(os.getenv('NOTIFICATION_CLEANUP_BATCH_SIZE', 1000))
+NOTIFICATION_CLEANUP_MAX_SECONDS = int(os.getenv('NOTIFICATION_CLEANUP_MAX_SECONDS', 600))
+
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
@@ -192,7 +255,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.core.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -289,9 +352,49 @@ LDAP_BIND_DN = os.getenv('LDAP_BIND_DN', 'cn=admin,dc=rh-tse,dc=local')
 LDAP_BIND_PASSWORD = os.getenv('LDAP_BIND_PASSWORD', 'admin123')
 LDAP_USER_BASE = 'ou=people,dc=rh-tse,dc=local'
 LDAP_GROUP_BASE = 'ou=groups,dc=rh-tse,dc=local'
+# کاربران جایگزین در نبود LDAP (رمزها با hash_ldap_users_passwords هش می‌شوند)
+LDAP_USERS_FILE = os.getenv('LDAP_USERS_FILE', BASE_DIR / 'ldap_users.json')
+
+# اتصال‌های LDAP با bind حساب سرویس بین ورودها دوباره استفاده می‌شوند
+LDAP_POOL_SIZE = int(os.getenv('LDAP_POOL_SIZE', 5))
+LDAP_POOL_TIMEOUT = int(os.getenv('LDAP_POOL_TIMEOUT', 5))
+LDAP_POOL_HEALTHCHECK_INTERVAL = int(os.getenv('LDAP_POOL_HEALTHCHECK_INTERVAL', 60))
+LDAP_NETWORK_TIMEOUT = int(os.getenv('LDAP_NETWORK_TIMEOUT', 5))
+# گروه‌ها از memberOf همان جستجوی کاربر خوانده می‌شوند؛ در نبود آن جستجوی جداگانه گروه‌ها
+LDAP_USE_MEMBEROF = os.getenv('LDAP_USE_MEMBEROF', 'True').lower() == 'true'
+# همگام‌سازی دوره‌ای کاربران و گروه‌های LDAP (ثانیه)؛ ورود فقط فیلدهای تغییرکرده را می‌نویسد
+LDAP_SYNC_ENABLED = os.getenv('LDAP_SYNC_ENABLED', 'False').lower() == 'true'
+LDAP_SYNC_INTERVAL = int(os.getenv('LDAP_SYNC_INTERVAL', 60 * 60))
+LDAP_SYNC_PAGE_SIZE = int(os.getenv('LDAP_SYNC_PAGE_SIZE', 500))
+LDAP_SYNC_BATCH_SIZE = int(os.getenv('LDAP_SYNC_BATCH_SIZE', 500))
 
 # Custom authentication backend for LDAP and case-insensitive username
 AUTHENTICATION_BACKENDS = [
     'apps.core.auth.LDAPBackend',
     'apps.core.auth.CaseInsensitiveModelBackend',
 ]
+
+# تنظیمات beat برای اجرای task‌ها
+CELERY_BEAT_SCHEDULE = {
+    'check-resolution-status': {
+        'task': 'apps.core.tasks.check_resolution_status',
+        'schedule': crontab(hour=0, minute=0),  # هر روز در ساعت 00:00
+    },
+    'send-notification-digests': {
+        'task': 'apps.core.tasks.send_notification_digests',
+        'schedule': NOTIFICATION_DIGEST_WINDOW,
+    },
+    'reconcile-unread-counters': {
+        'task': 'apps.core.tasks.reconcile_unread_counters',
+        'schedule': crontab(minute=30),  # هر ساعت
+    },
+    'cleanup-old-notifications': {
+        'task': 'apps.core.tasks.cleanup_old_notifications',
+        'schedule': crontab(hour=2, minute=0),  # هر روز در ساعت 02:00
+    },
+}
+if LDAP_SYNC_ENABLED:
+    CELERY_BEAT_SCHEDULE['sync-ldap-directory'] = {
+        'task': 'apps.core.tasks.sync_ldap_directory',
+        'schedule': LDAP_SYNC_INTERVAL,
+    }